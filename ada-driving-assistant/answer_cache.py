@@ -0,0 +1,190 @@
+"""
+Short-lived in-process cache of /api/ask answers.
+
+Drivers repeat themselves: "anything ahead?", "is the road clear?" a minute
+later, on the same route, with nothing changed.  An answer is reused when
+all of these match, within one session:
+
+  - the question intent     normalize_intent(): filler dropped, synonyms
+                            folded ("anything ahead" == "any hazards on
+                            the road"; "clear" and "blocked" stay apart)
+  - the situation           fingerprint() of the driver's position (a
+                            _POS_CELL_DEG grid cell) and heading (one of
+                            eight sectors), the nearby events (ids and
+                            distances rounded to _DIST_BUCKET_M), the
+                            parking context, streets looked up / suggested
+  - the last assistant turn so follow-ups are not answered out of context
+
+An answer is stored under the assistant turn that preceded the question and
+under itself, so asking the same question again right after hears the same
+answer without a Claude call.  Entries expire after ANSWER_CACHE_TTL_S
+seconds (default 60; 0 disables the cache); ANSWER_CACHE_SIZE (default 512)
+caps the number kept, least recently used first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+TTL_S          = float(os.environ.get("ANSWER_CACHE_TTL_S", "60"))
+_MAX_ENTRIES   = int(os.environ.get("ANSWER_CACHE_SIZE", "512"))
+_DIST_BUCKET_M = 50     # distances within one bucket count as unchanged
+_POS_CELL_DEG  = 0.001  # positions within one grid cell (~110 m × 90 m) count as unchanged
+_HEADING_SECTORS = 8    # headings within one 45° sector count as unchanged
+
+_cache: OrderedDict = OrderedDict()   # (session_id, intent, fingerprint, last turn hash) → (expires, answer)
+_lock  = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+
+
+# ── Question intent ───────────────────────────────────────────────────────────
+
+_FILLER = frozenset("""
+    a an the is are was were be there any ada hey hi ok okay please
+    can could would will you me i my we us tell let know see do does did what whats
+    how s it its of for on in to up at now currently just still so again
+""".split())
+
+# Synonyms folded onto one word, so phrasings of the same question compare equal.
+# Words of opposite meaning ("clear", "blocked") are kept apart: "is it clear?"
+# and "is it blocked?" expect opposite yes/no answers.
+_SYNONYMS = {
+    "hazard":    "hazard", "hazards": "hazard", "obstacle": "hazard", "obstacles": "hazard",
+    "problem":   "hazard", "problems": "hazard", "issue": "hazard", "issues": "hazard",
+    "trouble":   "hazard", "event": "hazard", "events": "hazard",
+    "anything":  "hazard", "something": "hazard",
+    "ahead":     "route", "road": "route", "way": "route", "route": "route", "path": "route",
+    "parking":   "park", "parked": "park", "spot": "park", "spots": "park",
+}
+
+
+def normalize_intent(question: str) -> str:
+    """
+    Reduce a question to its content words: lower-cased, punctuation and
+    filler removed, synonyms folded, sorted and de-duplicated.  Street names
+    and other specifics are kept, so "is Shattuck clear?" and "is the road
+    clear?" stay distinct.
+    """
+    words = re.findall(r"[a-z0-9]+", question.lower().replace("'", ""))
+    return " ".join(sorted({_SYNONYMS.get(w, w) for w in words if w not in _FILLER}))
+
+
+# ── Situation fingerprint ─────────────────────────────────────────────────────
+
+def _event_key(obj: dict) -> list:
+    ident = obj.get("event_id") or obj.get("id")
+    if not ident:
+        ident = f"{obj.get('type')}@{obj.get('lat')},{obj.get('lon')}"
+    dist = obj.get("_distance_m")
+    return [str(ident), None if dist is None else int(dist // _DIST_BUCKET_M),
+            bool(obj.get("_off_route"))]
+
+
+def _position_key(location: dict) -> list:
+    """Grid cell of the driver's position and sector of their heading (None when unknown)."""
+    lat, lon, bearing = location.get("lat"), location.get("lon"), location.get("bearing")
+    cell = None if lat is None or lon is None else \
+        [math.floor(float(lat) / _POS_CELL_DEG), math.floor(float(lon) / _POS_CELL_DEG)]
+    sector = None if bearing is None else \
+        round(float(bearing) / (360 / _HEADING_SECTORS)) % _HEADING_SECTORS
+    return [cell, sector]
+
+
+def fingerprint(nearby: list[dict], location: dict) -> str:
+    """Hash of everything situational that an answer depends on."""
+    state = {
+        "position":    _position_key(location),
+        "events":      sorted(_event_key(o) for o in nearby),
+        "parking":     location.get("parking"),
+        "checked":     sorted(location.get("checked_streets", [])),
+        "suggestions": location.get("street_suggestions", {}),
+        "destination": location.get("destination", ""),
+    }
+    blob = json.dumps(state, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def _turn_hash(text: str | None) -> str:
+    return hashlib.sha1((text or "").encode()).hexdigest()[:16]
+
+
+def last_assistant_turn(history: list[dict]) -> str | None:
+    """Content of the most recent assistant message, or None."""
+    for m in reversed(history):
+        if m.get("role") == "assistant":
+            content = m.get("content")
+            return content if isinstance(content, str) else json.dumps(content)
+    return None
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+def get(session_id: str, intent: str, fp: str, last_turn: str | None) -> str | None:
+    """Return the cached answer, or None on a miss or expiry."""
+    if TTL_S <= 0:
+        return None
+    key = (session_id, intent, fp, _turn_hash(last_turn))
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > now:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+        if entry is not None:
+            del _cache[key]
+        _stats["misses"] += 1
+        return None
+
+
+def put(session_id: str, intent: str, fp: str, last_turn: str | None, answer: str) -> None:
+    """Store answer for this question after last_turn, and after the answer itself."""
+    if TTL_S <= 0:
+        return
+    expires = time.monotonic() + TTL_S
+    with _lock:
+        for turn in (last_turn, answer):
+            key = (session_id, intent, fp, _turn_hash(turn))
+            _cache[key] = (expires, answer)
+            _cache.move_to_end(key)
+        _stats["stores"] += 1
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def record_bypass() -> None:
+    """Count a request that asked not to use the cache."""
+    with _lock:
+        _stats["bypassed"] += 1
+
+
+def invalidate(session_id: str) -> None:
+    """Forget every cached answer for a session."""
+    with _lock:
+        for key in [k for k in _cache if k[0] == session_id]:
+            del _cache[key]
+
+
+def stats() -> dict:
+    """Return hit/miss/store/bypass counters plus current size and TTL."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {**_stats,
+                "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+                "size":     len(_cache),
+                "ttl_s":    TTL_S}
+
+
+def clear() -> None:
+    """Empty the cache and reset the counters."""
+    with _lock:
+        _cache.clear()
+        for k in _stats:
+            _stats[k] = 0
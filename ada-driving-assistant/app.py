@@ -5,23 +5,34 @@ ADA Driving Assistant — Flask web application.
 import json
 import math
 import os
+import threading
 import time
 import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as _wait_futures
 from datetime import datetime, timedelta, timezone
 from urllib.parse import parse_qs
 
 import boto3
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, Response, jsonify, render_template, request, send_from_directory
 
+import answer_cache
+import fast_answers
+import geocoding
+import route_cache
 import sessions as sess
 import schedule as sched_mod
-from assistant import answer_question
-from events import (clear_event, event_lat_lon, get_events_by_city,
-                    get_events_by_street, get_events_near, put_event)
+from assistant import answer_question, stream_answer
+from events import (clear_event, event_geohash6, event_lat_lon,
+                    geohash6_cover, get_events_by_city, get_events_by_street,
+                    get_events_in_cell, get_events_near,
+                    get_events_updated_since, put_event, put_events)
 from location import (find_nearby_objects, find_objects_on_street,
                       find_street_suggestions, find_streets_mentioned,
-                      geocode_address, object_center, random_location)
+                      geocode_address, object_center, random_location,
+                      street_cities, streets_stats)
 from parking import get_parking_context
 
 _PARKING_KEYWORDS = {"park", "parking", "curb", "spot"}
@@ -36,38 +47,329 @@ app = Flask(__name__)
 
 S3_BUCKET = os.environ.get("S3_BUCKET", "ada-driving-assistant")
 
-# ── DynamoDB events cache (per city, refresh every 5 minutes) ────────────────
-
-_events_cache: dict = {}   # city → (loaded_at, [events])
-_CACHE_TTL = 300           # seconds
+# ── DynamoDB events cache (per city, delta sync) ─────────────────────────────
+#
+# Each city is loaded in full once, then kept current by fetching only the
+# items written or updated since its high-water mark (city-updated-index).
+# Events reported or cleared through this API are applied in place.  A full
+# reload still runs hourly to catch what the delta path can't see (TTL
+# deletes, legacy items without updated_at), and whenever a delta query fails.
+#
+# Cities that need a sync are refreshed concurrently on a small thread pool.
+# A request waits at most _CITY_LOAD_TIMEOUT for each city and otherwise
+# answers from the stale entry while the load finishes in the background;
+# one in-flight refresh per city is shared by every request that needs it.
+
+_events_cache: dict = {}   # city → entry, see _full_load
+_CACHE_TTL        = 60     # seconds between syncs with DynamoDB
+_FULL_RESYNC_SEC  = 3600   # full city reload interval
+_DELTA_OVERLAP_S  = 10     # re-read this far behind the high-water mark (GSI lag)
+_DELTA_SYNC       = os.environ.get("EVENTS_DELTA_SYNC", "1") != "0"
+_CITY_LOAD_TIMEOUT = float(os.environ.get("CITY_LOAD_TIMEOUT", "8"))   # seconds
+
+_events_lock   = threading.RLock()   # guards entry mutation (syncs + local writes)
+_inflight: dict = {}                 # (refresh fn, city | cell) → Future of the running refresh
+_inflight_lock = threading.Lock()
+_load_pool     = ThreadPoolExecutor(max_workers=int(os.environ.get("CITY_LOAD_WORKERS", "8")),
+                                    thread_name_prefix="events-load")
 
 _SUPPORTED_CITIES = [
     "Berkeley", "Albany", "ElCerrito", "Richmond", "Emeryville", "Oakland",
 ]
 
+# Concatenated EventStore over all cities, rebuilt when any city refreshes
+_all_events_store: dict = {"parts": None, "store": None}
 
-def get_events_for_city(city: str) -> list[dict]:
-    now = time.time()
+
+def _build_event_store(evts: list[dict]):
+    """Columnar store for one city's events, or None (no NumPy → list path)."""
+    try:
+        from event_store import build_event_store
+        return build_event_store(evts)
+    except Exception as exc:
+        app.logger.warning("Could not build event store: %s", exc)
+        return None
+
+
+def _iso_ts(value) -> datetime | None:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _is_expired(ev: dict, now: datetime) -> bool:
+    inactive = _iso_ts(ev.get("inactive_at", ""))
+    try:
+        return inactive is None or inactive <= now
+    except TypeError:   # naive timestamp
+        return True
+
+
+def _is_active_now(ev: dict, now: datetime) -> bool:
+    active = _iso_ts(ev.get("active_at", ""))
+    try:
+        return active is not None and active <= now and not _is_expired(ev, now)
+    except TypeError:
+        return False
+
+
+def _refresh_views(entry: dict) -> None:
+    """Drop expired events and rebuild the city's list and EventStore."""
+    now = datetime.now(timezone.utc)
+    entry["events"] = {eid: ev for eid, ev in entry["events"].items()
+                       if not _is_expired(ev, now)}
+    entry["list"]   = list(entry["events"].values())
+    entry["store"]  = _build_event_store(entry["list"])
+
+
+def _apply_change(entry: dict, ev: dict) -> None:
+    """Upsert a new/updated event, or remove it if it is cleared or expired."""
+    eid = ev.get("event_id")
+    if not eid:
+        return
+    if _is_expired(ev, datetime.now(timezone.utc)):
+        entry["events"].pop(eid, None)
+    else:
+        entry["events"][eid] = ev
+
+
+def _full_load(city: str) -> dict:
+    started = datetime.now(timezone.utc)
+    # Include not-yet-active events: the cache decides activity at query time
+    evts    = get_events_by_city(city, started, include_pending=True)
+    loaded  = time.time()
+    entry   = {
+        "synced_at": loaded,
+        "full_at":   loaded,
+        "hwm":       started.isoformat(timespec="microseconds"),
+        "events":    {ev.get("event_id") or str(uuid.uuid4()): ev for ev in evts},
+    }
+    _refresh_views(entry)
+    return entry
+
+
+def _delta_sync(city: str, entry: dict) -> None:
+    since   = (datetime.fromisoformat(entry["hwm"]) - timedelta(seconds=_DELTA_OVERLAP_S))
+    changed = get_events_updated_since(city, since.isoformat(timespec="microseconds"))
+    with _events_lock:
+        for ev in changed:
+            _apply_change(entry, ev)
+            entry["hwm"] = max(entry["hwm"], str(ev.get("updated_at", "")))
+        entry["synced_at"] = time.time()
+        if changed:
+            _refresh_views(entry)
+
+
+def _is_fresh(entry: dict | None) -> bool:
+    return bool(entry) and time.time() - entry["synced_at"] < _CACHE_TTL
+
+
+def _refresh_city(city: str) -> dict | None:
+    """Bring one city's entry up to date (runs on _load_pool)."""
     entry = _events_cache.get(city)
-    if entry and now - entry[0] < _CACHE_TTL:
-        return entry[1]
+    if _is_fresh(entry):
+        return entry   # another refresh finished while this one was queued
+    if entry and _DELTA_SYNC and time.time() - entry["full_at"] < _FULL_RESYNC_SEC:
+        try:
+            _delta_sync(city, entry)
+            return entry
+        except Exception as exc:
+            app.logger.warning("Delta sync failed for %s, reloading: %s", city, exc)
     try:
-        evts = get_events_by_city(city, datetime.now(timezone.utc))
-        _events_cache[city] = (now, evts)
-        return evts
+        entry = _full_load(city)
+        with _events_lock:
+            _events_cache[city] = entry
+        return entry
     except Exception as exc:
         app.logger.warning("Could not load events for %s from DynamoDB: %s", city, exc)
-        return entry[1] if entry else []
+        return entry
+
+
+def _clear_inflight(key: tuple, fut) -> None:
+    with _inflight_lock:
+        if _inflight.get(key) is fut:
+            del _inflight[key]
+
+
+def _submit_refresh(refresh, key: str):
+    """Start refresh(key), or join the same refresh already running (single flight)."""
+    inflight_key = (refresh.__name__, key)
+    with _inflight_lock:
+        fut = _inflight.get(inflight_key)
+        if fut is not None:
+            return fut
+        fut = _load_pool.submit(refresh, key)
+        _inflight[inflight_key] = fut
+    # Outside the lock: the callback runs immediately if fut is already done
+    fut.add_done_callback(lambda f: _clear_inflight(inflight_key, f))
+    return fut
+
+
+def _load_entries(keys: list[str], cache: dict, refresh) -> list[dict | None]:
+    """
+    Return the cache entry for each key, refreshing stale ones concurrently.
+    A key whose refresh misses _CITY_LOAD_TIMEOUT gets its stale entry (or
+    None on a cold cache); its refresh keeps running for later requests.
+    """
+    entries = {key: cache.get(key) for key in keys}
+    futures = {key: _submit_refresh(refresh, key)
+               for key, entry in entries.items() if not _is_fresh(entry)}
+    if futures:
+        _wait_futures(list(futures.values()), timeout=_CITY_LOAD_TIMEOUT)
+    for key, fut in futures.items():
+        if fut.done() and fut.exception() is None:
+            entries[key] = fut.result()
+        else:
+            app.logger.warning("Events load for %s timed out, serving stale cache", key)
+            entries[key] = cache.get(key)
+    return [entries[key] for key in keys]
+
+
+def _city_entries(cities: list[str]) -> list[dict | None]:
+    return _load_entries(cities, _events_cache, _refresh_city)
+
+
+def _cache_apply_local(evs: list[dict]) -> None:
+    """Apply events written by this API to their city and cell cache entries in place."""
+    with _events_lock:
+        touched = {}
+        for ev in evs:
+            for entry in (_events_cache.get(ev.get("city")),
+                          _cell_cache.get(event_geohash6(ev))):
+                if entry:
+                    _apply_change(entry, ev)
+                    touched[id(entry)] = entry
+        for entry in touched.values():
+            _refresh_views(entry)
+
+
+def _cache_remove_local(event_id: str) -> None:
+    """Remove a cleared event from whichever city and cell caches hold it."""
+    with _events_lock:
+        for entry in list(_events_cache.values()) + list(_cell_cache.values()):
+            if entry["events"].pop(event_id, None) is not None:
+                _refresh_views(entry)
+
+
+def _active_events(entry: dict | None, now: datetime) -> list[dict]:
+    if not entry:
+        return []
+    if entry["store"] is not None:
+        return entry["store"].active_rows(now)
+    return [ev for ev in entry["list"] if _is_active_now(ev, now)]
+
+
+def get_events_for_city(city: str) -> list[dict]:
+    return _active_events(_city_entries([city])[0], datetime.now(timezone.utc))
 
 
 def get_all_events() -> list[dict]:
     """Return active events across all supported cities (for route-based queries)."""
+    now    = datetime.now(timezone.utc)
     result = []
-    for city in _SUPPORTED_CITIES:
-        result.extend(get_events_for_city(city))
+    for entry in _city_entries(_SUPPORTED_CITIES):
+        result.extend(_active_events(entry, now))
     return result
 
 
+def get_all_event_objects():
+    """
+    Return events across all supported cities for the /api/ask search
+    functions, which apply the active-window filter themselves: one
+    EventStore when every city has one, else a plain list.
+    """
+    entries = [e for e in _city_entries(_SUPPORTED_CITIES) if e]
+    stores  = tuple(e["store"] for e in entries)
+    if any(s is None for s in stores):
+        return [ev for e in entries for ev in e["list"]]
+    if _all_events_store["parts"] != stores:
+        from event_store import EventStore
+        _all_events_store["store"] = EventStore.concat(list(stores))
+        _all_events_store["parts"] = stores
+    return _all_events_store["store"]
+
+
+# ── Route-scoped events (geohash6 cells) ─────────────────────────────────────
+#
+# Route questions only need events near the polyline.  The route is covered
+# with the geohash6 cells within _ROUTE_BUFFER_M of it (computed once per
+# compiled route) and only those cells are queried, in parallel, through
+# geohash6-index.  Cells are cached like cities, without the delta sync:
+# they are small enough to simply reload after _CACHE_TTL.
+
+_cell_cache: OrderedDict = OrderedDict()   # geohash6 → entry (same shape as a city entry)
+_CELL_CACHE_MAX  = 2000
+_ROUTE_BUFFER_M  = 250    # > the 200 m reach of find_objects_along_route
+_ROUTE_MAX_CELLS = 150    # longer routes fall back to the city-wide cache
+_ROUTE_PREFETCH  = os.environ.get("ROUTE_PREFETCH", "1") != "0"
+
+
+def _refresh_cell(cell: str) -> dict | None:
+    """Reload one geohash6 cell's events (runs on _load_pool)."""
+    entry = _cell_cache.get(cell)
+    if _is_fresh(entry):
+        return entry
+    try:
+        evts = get_events_in_cell(cell, datetime.now(timezone.utc))
+    except Exception as exc:
+        app.logger.warning("Could not load events for cell %s: %s", cell, exc)
+        return entry
+    entry = {"synced_at": time.time(),
+             "events": {ev.get("event_id") or str(uuid.uuid4()): ev for ev in evts}}
+    _refresh_views(entry)
+    with _events_lock:
+        _cell_cache[cell] = entry
+        _cell_cache.move_to_end(cell)
+        while len(_cell_cache) > _CELL_CACHE_MAX:
+            _cell_cache.popitem(last=False)
+    return entry
+
+
+_route_cells_lock = threading.Lock()
+
+
+def _route_cells(route) -> list[str]:
+    """
+    geohash6 cells around a CompiledRoute, cached on the route itself.  The
+    route is shared through route_cache, so the field is set under a lock
+    and the first cover computed is the one every caller gets.
+    """
+    cells = route.geohash6_cells
+    if cells is None:
+        cover = geohash6_cover(route.coords, _ROUTE_BUFFER_M)
+        with _route_cells_lock:
+            if route.geohash6_cells is None:
+                route.geohash6_cells = cover
+            cells = route.geohash6_cells
+    return cells
+
+
+def get_route_event_objects(route):
+    """
+    Return the events in the geohash6 cells around route — an EventStore, or
+    a list without NumPy — or None when the route-scoped path can't be used
+    (disabled, route too long, or a cell could not be loaded at all).
+    """
+    if not _ROUTE_PREFETCH:
+        return None
+    cells = _route_cells(route)
+    if not cells or len(cells) > _ROUTE_MAX_CELLS:
+        return None
+    entries = _load_entries(cells, _cell_cache, _refresh_cell)
+    if any(e is None for e in entries):
+        return None
+    with _events_lock:
+        for cell in cells:
+            if cell in _cell_cache:
+                _cell_cache.move_to_end(cell)
+    stores = [e["store"] for e in entries]
+    if any(st is None for st in stores):
+        return [ev for e in entries for ev in e["list"]]
+    from event_store import EventStore
+    return EventStore.concat(stores)
+
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 @app.route("/")
@@ -87,8 +389,11 @@ def serve_logo():
 
 @app.route("/api/location/random")
 def api_random_location():
+    city = request.args.get("city") or None
+    if city is not None and city not in _SUPPORTED_CITIES:
+        return jsonify({"error": f"city must be one of {', '.join(_SUPPORTED_CITIES)}"}), 400
     try:
-        loc = random_location()
+        loc = random_location(city, enrich=request.args.get("enrich") == "1" or None)
         return jsonify(loc)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
@@ -169,18 +474,23 @@ def api_session_resume(session_id):
 
 # -- Q&A ----------------------------------------------------------------------
 
-@app.route("/api/ask", methods=["POST"])
-def api_ask():
-    data       = request.json or {}
+def _ask_context(data: dict):
+    """
+    Validate an /api/ask body and gather everything the answer needs.
+    Returns (ctx, None) or (None, error response); ctx has session_id,
+    question, location, nearby, history, history_info (which turns the
+    history window includes and its token budget) and sources (nearby
+    objects with the map coordinates of their centres).
+    """
     session_id = data.get("session_id", "").strip()
     question   = data.get("question", "").strip()
 
     if not session_id or not question:
-        return jsonify({"error": "session_id and question are required"}), 400
+        return None, (jsonify({"error": "session_id and question are required"}), 400)
 
     session = sess.get_session(session_id)
     if not session:
-        return jsonify({"error": "Session not found"}), 404
+        return None, (jsonify({"error": "Session not found"}), 404)
 
     current_lat     = data.get("current_lat")
     current_lon     = data.get("current_lon")
@@ -221,9 +531,8 @@ def api_ask():
         if parking:
             location["parking"] = parking
 
-    objects = get_all_events()
-
     route_streets_list: list | None = None
+    question_cities = street_cities(loc_lat, loc_lon)   # whose street names the question may use
     route_json = session.get("route_coords_json", "")
     if route_json:
         try:
@@ -231,14 +540,20 @@ def api_ask():
             from location import find_objects_along_route
             route_streets_raw = session.get("route_streets_json", "")
             route_streets_list = _json.loads(route_streets_raw) if route_streets_raw else None
+            route = route_cache.get_compiled_route(session_id, route_json)
+            question_cities = street_cities(loc_lat, loc_lon, bbox=route.bbox)
+            route_objects = get_route_event_objects(route)
+            if route_objects is None:
+                route_objects = get_all_event_objects()
             nearby = find_objects_along_route(
-                _json.loads(route_json), objects, route_streets=route_streets_list
+                route, route_objects, route_streets=route_streets_list
             )
         except Exception as exc:
             app.logger.warning("Route corridor filter failed: %s", exc)
-            nearby = find_nearby_objects(location["lat"], location["lon"], objects)
+            nearby = find_nearby_objects(location["lat"], location["lon"],
+                                         get_all_event_objects())
     else:
-        nearby = find_nearby_objects(location["lat"], location["lon"], objects)
+        nearby = find_nearby_objects(location["lat"], location["lon"], get_all_event_objects())
 
     # Adjust distances from current position (not route origin) when driver has moved
     if current_dist_m is not None and float(current_dist_m) > 0:
@@ -256,13 +571,14 @@ def api_ask():
         nearby = adjusted
 
     # Merge objects from any off-route streets the user explicitly asked about
-    mentioned = find_streets_mentioned(question, route_streets_list)
+    mentioned = find_streets_mentioned(question, route_streets_list, cities=question_cities)
     if not mentioned:
-        suggestions = find_street_suggestions(question)
+        suggestions = find_street_suggestions(question, cities=question_cities)
         if suggestions:
             location["street_suggestions"] = suggestions
     if mentioned:
         location["checked_streets"] = mentioned   # tell the AI which streets we looked up
+        objects = get_all_event_objects()         # off-route streets need the city-wide set
         route_set_lower = {s.lower() for s in route_streets_list} if route_streets_list else set()
         nearby_keys: set = set()
         for obj in nearby:
@@ -280,16 +596,7 @@ def api_ask():
                     nearby.append(tagged)
                     nearby_keys.add(key)
 
-    history       = sess.get_history(session_id, session=session)
-
-    try:
-        answer, usage = answer_question(question, location, nearby, history)
-    except Exception as exc:
-        app.logger.error("Anthropic API error: %s", exc)
-        return jsonify({"error": f"AI service error: {exc}"}), 503
-
-    sess.add_message(session_id, "user",      question)
-    sess.add_message(session_id, "assistant", answer)
+    window        = sess.history_window(session_id, session=session)
 
     # Attach computed center coords to each source so the map can place markers
     sources_with_coords = []
@@ -297,8 +604,191 @@ def api_ask():
         olat, olon = object_center(obj)
         sources_with_coords.append({**obj, "_lat": olat, "_lon": olon})
 
-    return jsonify({"answer": answer, "nearby_count": len(nearby),
-                    "sources": sources_with_coords, "usage": usage})
+    return {"session_id": session_id, "question": question, "location": location,
+            "nearby": nearby, "history": window["messages"], "sources": sources_with_coords,
+            "history_info": {k: v for k, v in window.items() if k != "messages"}}, None
+
+
+def _no_call_usage() -> dict:
+    """Usage for an answer given without a Claude call, shaped like a Claude answer's."""
+    return {"input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0, "model": None}
+
+
+def _answer_without_claude(ctx: dict, use_cache: bool) -> tuple:
+    """
+    The lookup chain /api/ask and /api/ask/stream share before calling
+    Claude: the fast_answers rules, then answer_cache (skipped, though
+    still refreshed, when use_cache is false).  Returns (hit, cache_key):
+    hit is {"answer", "mode" ("local" or "cached"), "fast_path"} or None,
+    and cache_key is where Claude's answer goes (None after a fast answer).
+    """
+    fast = fast_answers.answer(ctx["question"], ctx["location"], ctx["nearby"])
+    if fast:
+        return {"answer": fast["answer"], "mode": "local",
+                "fast_path": {"intent": fast["intent"], "confidence": fast["confidence"]}}, None
+
+    cache_key = (ctx["session_id"], answer_cache.normalize_intent(ctx["question"]),
+                 answer_cache.fingerprint(ctx["nearby"], ctx["location"]),
+                 answer_cache.last_assistant_turn(ctx["history"]))
+    if not use_cache:
+        answer_cache.record_bypass()
+        return None, cache_key
+    answer = answer_cache.get(*cache_key)
+    if answer is None:
+        return None, cache_key
+    return {"answer": answer, "mode": "cached", "fast_path": None}, cache_key
+
+
+def _save_exchange(ctx: dict, answer: str) -> None:
+    sess.add_message(ctx["session_id"], "user",      ctx["question"])
+    sess.add_message(ctx["session_id"], "assistant", answer)
+
+
+@app.route("/api/ask", methods=["POST"])
+def api_ask():
+    """
+    Answer a driver's question.  Simple questions are answered by the
+    fast_answers rules ("fast_path": intent); an unchanged situation asked
+    the same way is answered from answer_cache ("cached": true); send
+    "no_cache": true to skip the cache.  Otherwise Claude answers.
+    """
+    started = time.perf_counter()
+    data = request.json or {}
+    ctx, error = _ask_context(data)
+    if error:
+        return error
+
+    hit, cache_key = _answer_without_claude(ctx, not data.get("no_cache"))
+    if hit:
+        answer, usage = hit["answer"], _no_call_usage()
+    else:
+        try:
+            answer, usage = answer_question(ctx["question"], ctx["location"], ctx["nearby"], ctx["history"])
+        except Exception as exc:
+            app.logger.error("Anthropic API error: %s", exc)
+            return jsonify({"error": f"AI service error: {exc}"}), 503
+        answer_cache.put(*cache_key, answer)
+    _save_exchange(ctx, answer)
+
+    # Nothing reaches the driver before the whole answer does: first token = total
+    total_ms = (time.perf_counter() - started) * 1000
+    _record_ask_latency(hit["mode"] if hit else "buffered", total_ms, total_ms)
+
+    return jsonify({"answer": answer, "nearby_count": len(ctx["nearby"]),
+                    "sources": ctx["sources"], "usage": usage, "history": ctx["history_info"],
+                    "cached": bool(hit) and hit["mode"] == "cached",
+                    "fast_path": hit["fast_path"] if hit else None})
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@app.route("/api/ask/stream", methods=["POST"])
+def api_ask_stream():
+    """
+    /api/ask answered over server-sent events as Claude generates it:
+
+      event: sources  {"sources", "nearby_count"}          before generation starts
+      event: token    {"text"}                             each piece of the answer
+      event: done     {"answer", "usage", "history", "cached", "fast_path",
+                       "ttft_ms", "total_ms"}
+      event: error    {"error"}                            generation failed
+
+    Fast answers and cached answers come first, as on /api/ask, and are sent
+    as a single token; streamed answers are stored in answer_cache.  The
+    exchange is saved to the session only once the answer is complete.
+    Validation errors are plain JSON responses, as on /api/ask.
+    """
+    started = time.perf_counter()
+    data = request.json or {}
+    ctx, error = _ask_context(data)
+    if error:
+        return error
+
+    def generate():
+        yield _sse("sources", {"sources": ctx["sources"], "nearby_count": len(ctx["nearby"])})
+        hit, cache_key = _answer_without_claude(ctx, not data.get("no_cache"))
+        ttft_ms = None
+        if hit:
+            answer, usage = hit["answer"], _no_call_usage()
+            yield _sse("token", {"text": answer})
+        else:
+            answer, usage = "", {}
+            try:
+                for kind, value in stream_answer(ctx["question"], ctx["location"],
+                                                 ctx["nearby"], ctx["history"]):
+                    if kind == "text":
+                        if ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - started) * 1000
+                        yield _sse("token", {"text": value})
+                    else:
+                        answer, usage = value
+            except Exception as exc:
+                app.logger.error("Anthropic API error (stream): %s", exc)
+                yield _sse("error", {"error": f"AI service error: {exc}"})
+                return
+            answer_cache.put(*cache_key, answer)
+        _save_exchange(ctx, answer)
+
+        total_ms = (time.perf_counter() - started) * 1000
+        ttft_ms  = total_ms if ttft_ms is None else ttft_ms
+        _record_ask_latency(hit["mode"] if hit else "stream", ttft_ms, total_ms)
+        yield _sse("done", {"answer": answer, "usage": usage, "history": ctx["history_info"],
+                            "cached": bool(hit) and hit["mode"] == "cached",
+                            "fast_path": hit["fast_path"] if hit else None,
+                            "ttft_ms": round(ttft_ms), "total_ms": round(total_ms)})
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# -- Ask latency ---------------------------------------------------------------
+#
+# Time to first token is the latency a driver feels: for /api/ask/stream it is
+# when the first answer token is sent, for /api/ask it is the whole request.
+# Answers from answer_cache count as "cached" and fast_answers as "local", on
+# either route.  The last _LATENCY_WINDOW samples of each are kept for
+# /api/stats.
+
+_LATENCY_WINDOW = 500
+_ASK_MODES      = ("stream", "buffered", "cached", "local")
+_ask_latency    = {mode: deque(maxlen=_LATENCY_WINDOW) for mode in _ASK_MODES}
+_latency_lock   = threading.Lock()
+
+
+def _record_ask_latency(mode: str, ttft_ms: float, total_ms: float) -> None:
+    with _latency_lock:
+        _ask_latency[mode].append((ttft_ms, total_ms))
+
+
+def _percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))])
+
+
+def _ask_latency_stats() -> dict:
+    with _latency_lock:
+        samples = {mode: list(d) for mode, d in _ask_latency.items()}
+    return {mode: {"count":        len(rows),
+                   "ttft_ms_p50":  _percentile([r[0] for r in rows], 0.50),
+                   "ttft_ms_p95":  _percentile([r[0] for r in rows], 0.95),
+                   "total_ms_p50": _percentile([r[1] for r in rows], 0.50)}
+            for mode, rows in samples.items()}
+
+
+# -- Stats ---------------------------------------------------------------------
+
+@app.route("/api/stats")
+def api_stats():
+    """Return in-process cache counters and /api/ask latencies for this Lambda container."""
+    return jsonify({"ask_latency": _ask_latency_stats(),
+                    "answer_cache": answer_cache.stats(), "fast_answers": fast_answers.stats(),
+                    "route_cache": route_cache.stats(), "streets": streets_stats(),
+                    "geocoding": geocoding.stats(), "travel_times": sched_mod.travel_time_stats()})
 
 
 # -- Events (van fleet API) ---------------------------------------------------
@@ -312,16 +802,13 @@ def _haversine_m(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
-@app.route("/api/events", methods=["POST"])
-def api_events_create():
-    """Van reports a new event for its current block."""
-    data = request.json or {}
+def _new_event_from_request(data: dict) -> tuple[dict | None, str | None]:
+    """Validate a van's event report; return (event, None) or (None, error)."""
     required = ("type", "lat", "lon", "street", "city", "active_at", "inactive_at")
     for field in required:
         if not data.get(field):
-            return jsonify({"error": f"{field} is required"}), 400
+            return None, f"{field} is required"
 
-    now_iso = datetime.now(timezone.utc).isoformat()
     active_at   = data["active_at"]
     inactive_at = data["inactive_at"]
 
@@ -331,33 +818,88 @@ def api_events_create():
         t_inactive = datetime.fromisoformat(inactive_at.replace("Z", "+00:00"))
         t_now      = datetime.now(timezone.utc)
         if t_active < t_now.replace(second=0, microsecond=0) - timedelta(seconds=60):
-            return jsonify({"error": "active_at cannot be in the past"}), 400
+            return None, "active_at cannot be in the past"
         if t_inactive <= t_active:
-            return jsonify({"error": "inactive_at must be after active_at"}), 400
+            return None, "inactive_at must be after active_at"
     except ValueError:
-        return jsonify({"error": "invalid ISO timestamp"}), 400
+        return None, "invalid ISO timestamp"
+
+    try:
+        lat, lon = float(data["lat"]), float(data["lon"])
+    except (TypeError, ValueError):
+        return None, "lat and lon must be numeric"
 
-    ev = {
+    return {
         "event_id":   str(uuid.uuid4()),
         "type":       data["type"],
-        "lat":        float(data["lat"]),
-        "lon":        float(data["lon"]),
+        "lat":        lat,
+        "lon":        lon,
         "street":     data["street"],
         "city":       data["city"],
         "van_id":     data.get("van_id", ""),
         "active_at":  active_at,
         "inactive_at": inactive_at,
-    }
+    }, None
+
+
+@app.route("/api/events", methods=["POST"])
+def api_events_create():
+    """Van reports a new event for its current block."""
+    ev, error = _new_event_from_request(request.json or {})
+    if error:
+        return jsonify({"error": error}), 400
+
     try:
         put_event(ev)
-        # Invalidate city cache so next /api/ask sees the new event
-        _events_cache.pop(data["city"], None)
+        # Apply in place so the next /api/ask sees the new event without a reload
+        _cache_apply_local([ev])
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
     return jsonify({"event_id": ev["event_id"]})
 
 
+_EVENTS_BATCH_MAX = int(os.environ.get("EVENTS_BATCH_MAX", "500"))
+
+
+@app.route("/api/events/batch", methods=["POST"])
+def api_events_create_batch():
+    """
+    Van reports several events at once: {"events": [{...}, ...]}.
+
+    Every event is validated like POST /api/events; if any is invalid nothing
+    is written and the per-index errors are returned.  Valid batches are
+    written with BatchWriteItem and applied to the affected city caches only.
+    Returns 207 when some events could not be written.
+    """
+    data  = request.json or {}
+    items = data.get("events")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "events must be a non-empty list"}), 400
+    if len(items) > _EVENTS_BATCH_MAX:
+        return jsonify({"error": f"at most {_EVENTS_BATCH_MAX} events per batch"}), 400
+
+    evs, errors = [], []
+    for i, item in enumerate(items):
+        ev, error = _new_event_from_request(item if isinstance(item, dict) else {})
+        if error:
+            errors.append({"index": i, "error": error})
+        else:
+            evs.append(ev)
+    if errors:
+        return jsonify({"error": "invalid events", "errors": errors}), 400
+
+    try:
+        result = put_events(evs, max_workers=4)
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
+
+    failed = set(result["failed"])
+    _cache_apply_local([ev for ev in evs if ev["event_id"] not in failed])
+    return jsonify({"event_ids": [ev["event_id"] for ev in evs if ev["event_id"] not in failed],
+                    "failed":    result["failed"]}), (207 if failed else 200)
+
+
 @app.route("/api/events/block")
 def api_events_block():
     """Return active events near a specific street block."""
@@ -397,8 +939,7 @@ def api_events_clear(event_id):
     now_iso = datetime.now(timezone.utc).isoformat()
     try:
         clear_event(street, event_id, now_iso)
-        # Invalidate all city caches (we don't know which city this event belongs to)
-        _events_cache.clear()
+        _cache_remove_local(event_id)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -585,14 +1126,12 @@ def api_fleet_schedule_get():
         if not schedules:
             pool = _load_address_pool()
             if pool:
-                for i in sched_mod.get_active_vans():
-                    v_id = sched_mod.van_id(i)
-                    try:
-                        s = sched_mod.generate_van_schedule(v_id, date_str, pool)
-                        sched_mod.save_schedule(s)
-                    except Exception:
-                        pass
-                schedules = sched_mod.get_all_schedules(date_str)
+                v_ids = [sched_mod.van_id(i) for i in sched_mod.get_active_vans()]
+                try:
+                    sched_mod.generate_and_save_fleet(v_ids, date_str, pool, use_osrm=False)
+                except Exception:
+                    pass
+                schedules = sched_mod.get_schedules(v_ids, date_str)
         return jsonify({"date": date_str, "schedules": schedules})
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
@@ -651,18 +1190,22 @@ def api_fleet_schedule_generate():
     if not pool:
         return jsonify({"error": "address pool unavailable"}), 500
 
-    generated, errors = [], []
-    for i in sched_mod.get_active_vans():
-        v_id = sched_mod.van_id(i)
-        try:
-            s = sched_mod.generate_van_schedule(v_id, date_str, pool)
-            sched_mod.save_schedule(s)
-            generated.append(v_id)
-        except Exception as exc:
-            errors.append({"van_id": v_id, "error": str(exc)})
+    # "osrm": true times every leg with OSRM (a few /table requests for the fleet);
+    # "optimize": true assigns rides to minimise dead-head within "time_budget_s"
+    try:
+        time_budget_s = float(body.get("time_budget_s", sched_mod.OPTIMIZER_BUDGET_S))
+    except (TypeError, ValueError):
+        return jsonify({"error": "time_budget_s must be a number"}), 400
+    v_ids = [sched_mod.van_id(i) for i in sched_mod.get_active_vans()]
+    try:
+        result = sched_mod.generate_and_save_fleet(v_ids, date_str, pool,
+                                                   use_osrm=bool(body.get("osrm", False)),
+                                                   optimize=bool(body.get("optimize", False)),
+                                                   time_budget_s=min(max(time_budget_s, 0.0), 10.0))
+    except Exception as exc:
+        result = {"generated": [], "errors": [{"van_id": v, "error": str(exc)} for v in v_ids]}
 
-    return jsonify({"ok": True, "date": date_str,
-                    "generated": generated, "errors": errors})
+    return jsonify({"ok": True, "date": date_str, **result})
 
 
 @app.route("/api/fleet/van", methods=["POST"])
@@ -228,6 +228,83 @@ def _build_context(location: dict, nearby: list[dict]) -> str:
     return "\n".join(lines)
 
 
+_QA_MODEL = "claude-haiku-4-5-20251001"
+
+# Prompt caching: the system prompt and the session history are the same on
+# every turn of a drive, so both can end in a cache breakpoint; the next turn
+# then reads that prefix from the cache (about a tenth of the input price)
+# and only pays full price for the new exchange and the current conditions.
+# The model only caches prefixes of at least _CACHE_MIN_TOKENS, and a
+# breakpoint on a shorter one buys nothing, so breakpoints are only sent
+# once the prefix is that long.  With the ~570-token system prompt and the
+# history capped at sessions.HISTORY_TOKEN_BUDGET (2000) that never happens
+# on claude-haiku-4-5 (minimum 4096): caching is inert for this model, and
+# padding the prefix to reach the minimum would cost more than it saves.
+_CACHE = {"type": "ephemeral"}
+_CACHE_MIN_TOKENS = int(os.environ.get("QA_CACHE_MIN_TOKENS", "4096"))   # claude-haiku-4-5 minimum
+
+
+def _approx_tokens(content) -> int:
+    """Rough token count of message content (~4 characters per token)."""
+    if isinstance(content, str):
+        return len(content) // 4
+    return sum(len(b.get("text", "")) // 4 for b in content)
+
+
+def _cached_history(history: list[dict]) -> list[dict]:
+    """History with a cache breakpoint on its last message (copies; the input is not modified)."""
+    messages = [dict(m) for m in history]
+    if messages:
+        last    = messages[-1]
+        content = last["content"]
+        blocks  = ([{"type": "text", "text": content}] if isinstance(content, str)
+                   else [dict(b) for b in content])
+        if blocks:
+            blocks[-1]["cache_control"] = _CACHE
+            last["content"] = blocks
+    return messages
+
+
+def _qa_request(question: str, location: dict, nearby_objects: list[dict],
+                history: list[dict]) -> dict:
+    """Keyword arguments for the Q&A messages call (shared by the plain and streaming paths)."""
+    context = _build_context(location, nearby_objects)
+
+    # Inject location context as the first user turn if history is empty,
+    # otherwise prepend it to the current question so it stays fresh.
+    context_note = f"[Current conditions]\n{context}\n\n[Question]\n{question}"
+
+    system_tokens = _approx_tokens(_QA_SYSTEM)
+    prefix_tokens = system_tokens + sum(_approx_tokens(m["content"]) for m in history)
+    system = {"type": "text", "text": _QA_SYSTEM}
+    if system_tokens >= _CACHE_MIN_TOKENS:
+        system["cache_control"] = _CACHE
+    prior    = _cached_history(history) if prefix_tokens >= _CACHE_MIN_TOKENS else [dict(m) for m in history]
+    messages = prior + [{"role": "user", "content": context_note}]
+
+    # Pass address as user_id so calls are labelled in the Anthropic Console
+    address_tag = location.get("address", "unknown")[:512]
+    return {
+        "model":      _QA_MODEL,
+        "max_tokens": 512,
+        "system":     [system],
+        "messages":   messages,
+        "metadata":   {"user_id": address_tag},
+        "timeout":    25.0,
+    }
+
+
+def _usage(msg) -> dict:
+    """Token usage for the client; input_tokens counts only the uncached part of the prompt."""
+    return {
+        "input_tokens":                msg.usage.input_tokens,
+        "output_tokens":               msg.usage.output_tokens,
+        "cache_read_input_tokens":     getattr(msg.usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(msg.usage, "cache_creation_input_tokens", None) or 0,
+        "model":                       _QA_MODEL,
+    }
+
+
 def answer_question(question: str,
                     location: dict,
                     nearby_objects: list[dict],
@@ -244,27 +321,23 @@ def answer_question(question: str,
     Returns:
         (answer_text, usage_dict) where usage_dict has input_tokens / output_tokens.
     """
-    context = _build_context(location, nearby_objects)
+    msg = client.messages.create(**_qa_request(question, location, nearby_objects, history))
+    return msg.content[0].text.strip(), _usage(msg)
 
-    # Inject location context as the first user turn if history is empty,
-    # otherwise prepend it to the current question so it stays fresh.
-    context_note = f"[Current conditions]\n{context}\n\n[Question]\n{question}"
-
-    messages = list(history) + [{"role": "user", "content": context_note}]
 
-    # Pass address as user_id so calls are labelled in the Anthropic Console
-    address_tag = location.get("address", "unknown")[:512]
-    msg = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=512,
-        system=_QA_SYSTEM,
-        messages=messages,
-        metadata={"user_id": address_tag},
-        timeout=25.0,
-    )
-    usage = {
-        "input_tokens":  msg.usage.input_tokens,
-        "output_tokens": msg.usage.output_tokens,
-        "model":         "claude-haiku-4-5-20251001",
-    }
-    return msg.content[0].text.strip(), usage
+def stream_answer(question: str,
+                  location: dict,
+                  nearby_objects: list[dict],
+                  history: list[dict]):
+    """
+    Streaming answer_question: yields ("text", delta) for each piece of the
+    answer as Claude generates it, then a final ("done", (answer_text,
+    usage_dict)).  Errors from the API propagate out of the generator.
+    """
+    with client.messages.stream(**_qa_request(question, location, nearby_objects, history)) as stream:
+        for delta in stream.text_stream:
+            if delta:
+                yield "text", delta
+        msg = stream.get_final_message()
+    text = "".join(block.text for block in msg.content if getattr(block, "type", "") == "text")
+    yield "done", (text.strip(), _usage(msg))
@@ -60,6 +60,15 @@ echo "    Using SAM: $SAM"
 # shellcheck disable=SC2206
 SAM_CMD=($SAM)
 
+echo "==> Precomputing compact streets file and parking block table..."
+PYTHON=$(command -v python || command -v python3 || command -v py || true)
+if [[ -n "$PYTHON" ]] && "$PYTHON" street_binary.py city_streets.json \
+                      && "$PYTHON" parking_blocks.py city_streets.json; then
+  :
+else
+  echo "    (skipped — the app falls back to city_streets.json and builds the table on first use)"
+fi
+
 echo "==> Building Lambda package..."
 "${SAM_CMD[@]}" build
 
@@ -99,9 +108,11 @@ echo "    Web bucket : $WEB_BUCKET_V2"
 echo "==> Syncing source files into SAM build directory and rebuilding lambda.zip..."
 SAM_BUILD_API=".aws-sam/build/ApiFunction"
 SAM_BUILD_SIM=".aws-sam/build/SimulationFunction"
-for f in app.py assistant.py detections_adapter.py events.py fetch_streets.py \
-          lambda_function.py location.py objects.py parking.py schedule.py \
-          sessions.py simulator.py; do
+for f in answer_cache.py app.py assistant.py detections_adapter.py disk_cache.py dynamo_batch.py \
+          event_store.py events.py fast_answers.py fetch_streets.py geocoding.py lambda_function.py \
+          local_geocoder.py location.py objects.py parking.py parking_blocks.py ride_optimizer.py \
+          route_cache.py schedule.py sessions.py simulator.py street_binary.py street_index.py \
+          street_matcher.py street_registry.py; do
   [[ -f "$f" ]] && cp "$f" "$SAM_BUILD_API/$f"
   [[ -f "$f" ]] && cp "$f" "$SAM_BUILD_SIM/$f"
 done
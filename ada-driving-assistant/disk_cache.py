@@ -0,0 +1,152 @@
+"""
+Small persistent key → JSON value cache on SQLite, with per-entry expiry.
+
+Used for results of slow external lookups (Nominatim geocodes) that are
+worth keeping across warm Lambda invocations and local restarts.
+Each cache is a table in one SQLite file — CACHE_DB, default ada_cache.sqlite
+in the system temp directory (/tmp on Lambda, the only writable path there).
+
+Every operation is best effort: if the database cannot be opened or written
+(read-only file system, locked file, corrupt file) the cache logs a warning
+once and behaves as empty, so callers never fail because of it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get("CACHE_DB") or os.path.join(tempfile.gettempdir(), "ada_cache.sqlite")
+
+_TABLE_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class DiskCache:
+    """One SQLite table of {key: (JSON value, expires_at)}; safe to share across threads."""
+
+    def __init__(self, table: str, path: str = DEFAULT_PATH):
+        if not _TABLE_NAME.fullmatch(table):
+            raise ValueError(f"invalid cache table name: {table!r}")
+        self.table = table
+        self.path  = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False
+
+    def _db(self) -> sqlite3.Connection | None:
+        """Open the database on first use (caller holds _lock); None once it has failed."""
+        if self._conn is None and not self._broken:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False,
+                                       isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                             "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+                self._conn = conn
+            except sqlite3.Error as exc:
+                self._fail(exc)
+        return self._conn
+
+    def _fail(self, exc: Exception) -> None:
+        log.warning("disk cache %s:%s disabled: %s", self.path, self.table, exc)
+        self._broken = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get(self, key: str):
+        """Return the stored value, or None when missing or expired."""
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return None
+            try:
+                row = db.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?",
+                                 (key,)).fetchone()
+            except sqlite3.Error as exc:
+                self._fail(exc)
+                return None
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl_s: float) -> None:
+        """Store a JSON-serializable value for ttl_s seconds."""
+        raw = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return
+            try:
+                db.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+                           "VALUES (?, ?, ?)", (key, raw, time.time() + ttl_s))
+            except sqlite3.Error as exc:
+                self._fail(exc)
+
+    def get_many(self, keys) -> dict:
+        """{key: value} for the keys that are stored and not expired."""
+        keys  = list(keys)
+        found = {}
+        now   = time.time()
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return found
+            try:
+                for i in range(0, len(keys), 500):   # stay under SQLite's bound-parameter limit
+                    chunk = keys[i:i + 500]
+                    rows  = db.execute(f"SELECT key, value, expires_at FROM {self.table} "
+                                       f"WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                    found.update((k, v) for k, v, exp in rows if exp >= now)
+            except sqlite3.Error as exc:
+                self._fail(exc)
+                return {}
+        return {k: json.loads(v) for k, v in found.items()}
+
+    def set_many(self, items: dict, ttl_s: float) -> None:
+        """Store several JSON-serializable values in one transaction."""
+        expires = time.time() + ttl_s
+        rows = [(k, json.dumps(v, separators=(",", ":")), expires) for k, v in items.items()]
+        with self._lock:
+            db = self._db()
+            if db is None or not rows:
+                return
+            try:
+                db.execute("BEGIN")
+                db.executemany(f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+                               "VALUES (?, ?, ?)", rows)
+                db.execute("COMMIT")
+            except sqlite3.Error as exc:
+                self._fail(exc)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows; returns how many were removed."""
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return 0
+            try:
+                return db.execute(f"DELETE FROM {self.table} WHERE expires_at < ?",
+                                  (time.time(),)).rowcount
+            except sqlite3.Error as exc:
+                self._fail(exc)
+                return 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return 0
+            try:
+                return db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            except sqlite3.Error as exc:
+                self._fail(exc)
+                return 0
@@ -0,0 +1,91 @@
+"""
+Chunked BatchWriteItem writer shared by events.py and schedule.py.
+
+write_items() splits items into requests of 25 (the BatchWriteItem limit)
+and re-sends UnprocessedItems and throttled requests with exponential
+backoff and jitter.  DynamoDB rejects a whole request for one invalid item
+(e.g. a ValidationException for a missing key), so a rejected chunk is split
+in halves until the bad items are isolated and the rest are written.
+Every item left unwritten is returned with the reason.
+
+Only table.name and table.meta.client (a low-level client, which is
+thread-safe) are used, so one Table can be handed to the writer threads.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+BATCH_WRITE_SIZE = 25     # BatchWriteItem hard limit per request
+BATCH_GET_SIZE   = 100    # BatchGetItem hard limit per request
+BATCH_RETRIES    = 8      # attempts per chunk for unprocessed items / throttling
+_BACKOFF_BASE_S  = 0.05
+_BACKOFF_MAX_S   = 5.0
+
+# Error codes worth backing off and retrying; anything else will not go away.
+_RETRYABLE_ERRORS = frozenset({
+    "ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded",
+    "InternalServerError", "ServiceUnavailable", "TransactionConflictException",
+})
+
+
+def backoff(attempt: int) -> None:
+    """Sleep before retry number attempt: exponential, capped, with jitter."""
+    time.sleep(min(_BACKOFF_MAX_S, _BACKOFF_BASE_S * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+
+def _error_code(exc: ClientError) -> str:
+    return exc.response.get("Error", {}).get("Code", "")
+
+
+def write_chunk(table, items: list[dict]) -> list[tuple[dict, str]]:
+    """BatchWriteItem at most 25 items; returns [(item, reason), ...] for those left unwritten."""
+    client  = table.meta.client
+    pending = [{"PutRequest": {"Item": item}} for item in items]
+    reason  = "unprocessed (throttled)"
+    for attempt in range(BATCH_RETRIES):
+        if attempt:
+            backoff(attempt)
+        try:
+            resp = client.batch_write_item(RequestItems={table.name: pending})
+        except ClientError as exc:
+            if _error_code(exc) in _RETRYABLE_ERRORS:
+                reason = f"{_error_code(exc)}: {exc}"
+                continue
+            rejected = [req["PutRequest"]["Item"] for req in pending]
+            if len(rejected) == 1:
+                logger.error("%s rejected an item: %s", table.name, exc)
+                return [(rejected[0], str(exc))]
+            mid = len(rejected) // 2
+            return write_chunk(table, rejected[:mid]) + write_chunk(table, rejected[mid:])
+        except BotoCoreError as exc:
+            logger.warning("%s batch write failed (attempt %d): %s", table.name, attempt + 1, exc)
+            reason = str(exc)
+            continue   # connection / timeout after botocore's own retries — back off
+        pending = resp.get("UnprocessedItems", {}).get(table.name, [])
+        if not pending:
+            return []
+    logger.warning("%s: %d items still unwritten after %d attempts (%s)",
+                   table.name, len(pending), BATCH_RETRIES, reason)
+    return [(req["PutRequest"]["Item"], reason) for req in pending]
+
+
+def write_items(table, items: list[dict], max_workers: int = 1) -> list[tuple[dict, str]]:
+    """
+    Write items in chunks of 25, concurrently with max_workers > 1.
+    Returns [(item, reason), ...] for the items left unwritten.
+    """
+    chunks = [items[i:i + BATCH_WRITE_SIZE] for i in range(0, len(items), BATCH_WRITE_SIZE)]
+    if max_workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            leftovers = list(pool.map(lambda c: write_chunk(table, c), chunks))
+    else:
+        leftovers = [write_chunk(table, c) for c in chunks]
+    return [failure for rest in leftovers for failure in rest]
@@ -0,0 +1,196 @@
+"""
+Columnar in-memory store of events for the /api/ask search path.
+
+app.py builds one EventStore per city whenever its events cache refreshes
+and concatenates them for route and nearby queries.  Timestamps are parsed
+and object centres computed once per refresh instead of once per event per
+request:
+
+  lat, lon           float64   object_center() of each row (NaN if none)
+  active, inactive   float64   active_at / inactive_at as epoch seconds
+                               (NaN if missing, naive or unparseable)
+  street_id          int32     index into .streets (lower-cased names)
+  type_code          int32     index into .types
+
+Activity, street and distance filters become array masks; the original
+event dicts (.rows) are only touched for the rows that end up in a result.
+Results match the list-of-dicts functions in location.py exactly.
+
+Requires NumPy — build_event_store() returns None without it and callers
+keep using plain lists.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+
+from location import haversine_m, object_center
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_R = 6_371_000.0
+_NEARBY_SLACK_M = 1.0   # vector haversine pre-filter slack before the exact check
+
+
+def _epoch(value) -> float:
+    """Epoch seconds of an ISO timestamp, NaN where the list path would skip the row."""
+    try:
+        dt = datetime.fromisoformat(value)
+    except Exception:
+        return math.nan
+    if dt.tzinfo is None:
+        return math.nan   # comparing with an aware datetime raises → row skipped
+    return dt.timestamp()
+
+
+class EventStore:
+    """Column arrays plus a row → event dict side table."""
+
+    def __init__(self, events: list[dict]):
+        self.rows: list[dict] = list(events)
+        n = len(self.rows)
+
+        self.streets: list[str] = []
+        self.types:   list[str] = []
+        street_ids: dict[str, int] = {}
+        type_ids:   dict[str, int] = {}
+
+        lat      = np.full(n, np.nan)
+        lon      = np.full(n, np.nan)
+        active   = np.full(n, np.nan)
+        inactive = np.full(n, np.nan)
+        street_id = np.empty(n, dtype=np.int32)
+        type_code = np.empty(n, dtype=np.int32)
+
+        for i, obj in enumerate(self.rows):
+            olat, olon = object_center(obj)
+            if olat is not None:
+                lat[i], lon[i] = olat, olon
+            if "active_at" in obj and "inactive_at" in obj:
+                active[i]   = _epoch(obj["active_at"])
+                inactive[i] = _epoch(obj["inactive_at"])
+
+            street = obj.get("street", "")
+            street = street.lower() if isinstance(street, str) else ""
+            sid = street_ids.get(street)
+            if sid is None:
+                sid = street_ids[street] = len(self.streets)
+                self.streets.append(street)
+            street_id[i] = sid
+
+            etype = str(obj.get("type", ""))
+            tid = type_ids.get(etype)
+            if tid is None:
+                tid = type_ids[etype] = len(self.types)
+                self.types.append(etype)
+            type_code[i] = tid
+
+        self.lat, self.lon = lat, lon
+        self.active, self.inactive = active, inactive
+        self.street_id, self.type_code = street_id, type_code
+        self._street_ids = street_ids
+
+    @classmethod
+    def concat(cls, stores: list[EventStore]) -> EventStore:
+        """Join several stores (e.g. one per city) without re-parsing any rows."""
+        out = cls.__new__(cls)
+        out.rows, out.streets, out.types = [], [], []
+        out._street_ids = {}
+        type_ids: dict[str, int] = {}
+        street_parts, type_parts = [], []
+        for s in stores:
+            out.rows.extend(s.rows)
+            remap = np.empty(len(s.streets), dtype=np.int32)
+            for j, name in enumerate(s.streets):
+                sid = out._street_ids.get(name)
+                if sid is None:
+                    sid = out._street_ids[name] = len(out.streets)
+                    out.streets.append(name)
+                remap[j] = sid
+            street_parts.append(remap[s.street_id] if len(s.rows) else s.street_id)
+            remap = np.empty(len(s.types), dtype=np.int32)
+            for j, name in enumerate(s.types):
+                tid = type_ids.get(name)
+                if tid is None:
+                    tid = type_ids[name] = len(out.types)
+                    out.types.append(name)
+                remap[j] = tid
+            type_parts.append(remap[s.type_code] if len(s.rows) else s.type_code)
+
+        def _cat(parts, dtype):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        out.lat       = _cat([s.lat for s in stores], float)
+        out.lon       = _cat([s.lon for s in stores], float)
+        out.active    = _cat([s.active for s in stores], float)
+        out.inactive  = _cat([s.inactive for s in stores], float)
+        out.street_id = _cat(street_parts, np.int32)
+        out.type_code = _cat(type_parts, np.int32)
+        return out
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    # ── Masks ─────────────────────────────────────────────────────────────────
+
+    def active_mask(self, now: datetime | None = None):
+        """Boolean mask of rows whose [active_at, inactive_at] window covers now."""
+        ts = (now or datetime.now(timezone.utc)).timestamp()
+        return (self.active <= ts) & (self.inactive >= ts)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def active_rows(self, now: datetime | None = None) -> list[dict]:
+        """Event dicts whose window covers now, in row order."""
+        return [self.rows[i] for i in np.nonzero(self.active_mask(now))[0].tolist()]
+
+    def active_with_centers(self, now: datetime | None = None
+                            ) -> tuple[list[dict], list[tuple[float, float]]]:
+        """Active rows that have a centre, with their (lat, lon), in row order."""
+        idx = np.nonzero(self.active_mask(now) & ~np.isnan(self.lat))[0]
+        rows = [self.rows[i] for i in idx.tolist()]
+        centers = list(zip(self.lat[idx].tolist(), self.lon[idx].tolist()))
+        return rows, centers
+
+    def on_street(self, street_name: str, now: datetime | None = None) -> list[dict]:
+        """Active rows whose street matches street_name (case-insensitive)."""
+        sid = self._street_ids.get(street_name.lower())
+        if sid is None:
+            return []
+        idx = np.nonzero(self.active_mask(now) & (self.street_id == sid))[0]
+        return [self.rows[i] for i in idx.tolist()]
+
+    def nearby(self, lat: float, lon: float, radius_m: float,
+               now: datetime | None = None) -> list[dict]:
+        """
+        Active rows within radius_m of (lat, lon), sorted by distance, with
+        '_distance_m' added — the same output as location.find_nearby_objects.
+        """
+        phi1 = math.radians(lat)
+        phi2 = np.radians(self.lat)
+        a = (np.sin((phi2 - phi1) / 2) ** 2 +
+             math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(self.lon - lon) / 2) ** 2)
+        approx = _R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        idx = np.nonzero(self.active_mask(now) & (approx <= radius_m + _NEARBY_SLACK_M))[0]
+
+        nearby = []
+        for i in idx.tolist():
+            dist = haversine_m(lat, lon, self.lat[i].item(), self.lon[i].item())
+            if dist <= radius_m:
+                nearby.append({**self.rows[i], "_distance_m": round(dist)})
+        nearby.sort(key=lambda x: x["_distance_m"])
+        return nearby
+
+
+def build_event_store(events: list[dict]) -> EventStore | None:
+    """Return an EventStore for events, or None when NumPy is not installed."""
+    if np is None:
+        return None
+    return EventStore(events)
@@ -6,8 +6,14 @@ Table: ada-events
   Sort key      : event_id (S)
   GSI city-index     : city     (HASH), event_id (RANGE)
   GSI geohash6-index : geohash6 (HASH), event_id (RANGE)
+  GSI city-updated-index : city (HASH), updated_at (RANGE)   — sparse, delta sync
   TTL attribute : ttl (unix epoch seconds)
 
+Every write (put_event, clear_event) stamps updated_at with the current UTC
+time so readers can fetch just the items changed since their last sync
+(get_events_updated_since).  Items written before updated_at existed are
+simply absent from city-updated-index.
+
 Each item retains ttl = unix(inactive_at) + 7*86400 so DynamoDB
 auto-deletes the row one week after it expires, while queries still
 see it during that grace window (filtered by inactive_at in Python).
@@ -15,8 +21,10 @@ see it during that grace window (filtered by inactive_at in Python).
 
 from __future__ import annotations
 
+import logging
 import math
 import os
+import threading
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any
@@ -24,6 +32,10 @@ from typing import Any
 import boto3
 from boto3.dynamodb.conditions import Attr, Key
 
+import dynamo_batch
+
+logger = logging.getLogger(__name__)
+
 # ── Pure-Python geohash (replaces python-geohash C extension) ────────────────
 _GH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
 
@@ -116,18 +128,63 @@ def _gh_decode_bbox(h: str):
             is_lon = not is_lon
     return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2, (lat_hi - lat_lo) / 2, (lon_hi - lon_lo) / 2
 
+
+def event_geohash6(ev: dict) -> str:
+    """The geohash6 cell an event is indexed under (see event_to_dynamo)."""
+    lat, lon = event_lat_lon(ev)
+    return _gh_encode(lat, lon, precision=6)
+
+
+_COVER_STEP_M = 100   # sample spacing along each route segment
+
+
+def geohash6_cover(route_coords: list, buffer_m: float) -> list[str]:
+    """
+    Return the sorted geohash6 cells within buffer_m of an OSRM
+    [[lon, lat], ...] polyline.
+
+    Samples the polyline every _COVER_STEP_M and encodes a 3×3 grid of
+    points over the square of half-size buffer_m + step/2 around each
+    sample.  A geohash6 cell (≈ 610 m × 970 m here) is larger than the grid
+    spacing, so any cell overlapping a square contains one of its points —
+    valid for buffer_m up to ≈ 500 m.
+    """
+    if not route_coords:
+        return []
+    half  = buffer_m + _COVER_STEP_M / 2
+    dlat  = half / (6_371_000 * math.pi / 180)
+    pairs = list(zip(route_coords, route_coords[1:])) or [(route_coords[0], route_coords[0])]
+    cells: set[str] = set()
+    for (lon1, lat1), (lon2, lat2) in pairs:
+        n = max(1, math.ceil(_haversine_m(lat1, lon1, lat2, lon2) / _COVER_STEP_M))
+        for k in range(n + 1):
+            lat  = lat1 + (lat2 - lat1) * k / n
+            lon  = lon1 + (lon2 - lon1) * k / n
+            dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+            for a in (lat - dlat, lat, lat + dlat):
+                for b in (lon - dlon, lon, lon + dlon):
+                    cells.add(_gh_encode(a, b, precision=6))
+    return sorted(cells)
+
+
 EVENTS_TABLE = os.environ.get("EVENTS_TABLE", "ada-events")
 
-_ddb    = None   # lazy singleton
-_table  = None
+# boto3 resources are not thread-safe, so each thread (the app's city / cell
+# load pool, put_events workers) gets its own session, resource and Table.
+_local = threading.local()
 
 
 def _get_table():
-    global _ddb, _table
-    if _table is None:
-        _ddb   = boto3.resource("dynamodb")
-        _table = _ddb.Table(EVENTS_TABLE)
-    return _table
+    table = getattr(_local, "table", None)
+    if table is None:
+        table = boto3.session.Session().resource("dynamodb").Table(EVENTS_TABLE)
+        _local.table = table
+    return table
+
+
+def _now_iso() -> str:
+    """Current UTC time as a fixed-width ISO string (sorts lexicographically)."""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
 
 
 # ── Type conversion ──────────────────────────────────────────────────────────
@@ -182,6 +239,7 @@ def event_to_dynamo(ev: dict) -> dict:
     - Map "id" → "event_id" (sort key)
     - Extract lat/lon from nested coordinates and store at top level
     - Add geohash6, geohash7 (spatial index), ttl (auto-delete after 7 days past expiry)
+    - Stamp updated_at with the write time (city-updated-index sort key)
     Returns a new dict (does not mutate ev).
     """
     item = {}
@@ -210,6 +268,7 @@ def event_to_dynamo(ev: dict) -> dict:
     except Exception:
         item["ttl"] = int(datetime.now(timezone.utc).timestamp()) + 14 * 86400
 
+    item["updated_at"] = _now_iso()
     return item
 
 
@@ -242,6 +301,37 @@ def put_event(ev: dict) -> None:
     _get_table().put_item(Item=item)
 
 
+def put_events(evs: list[dict], max_workers: int = 1) -> dict:
+    """
+    Write many events with BatchWriteItem, 25 per request (dynamo_batch).
+
+    Items are normalised with event_to_dynamo; duplicates of the same
+    (street, event_id) key keep the last copy, as DynamoDB rejects a batch
+    that repeats a key.  Events without a street (the partition key) fail
+    up front.  Unprocessed and throttled items are retried with backoff,
+    rejected ones are isolated and logged, and with max_workers > 1 chunks
+    are written concurrently.
+
+    Returns {"written": n, "failed": [event_id, ...]}.
+    """
+    items: dict[tuple, dict] = {}
+    failed: list[str] = []
+    for ev in evs:
+        item = event_to_dynamo(ev)
+        if not item.get("street"):
+            logger.error("Event %s has no street (table key) — not written", item["event_id"])
+            failed.append(item["event_id"])
+            continue
+        items[(item["street"], item["event_id"])] = item
+    items_list = list(items.values())
+
+    unwritten = dynamo_batch.write_items(_get_table(), items_list, max_workers=max_workers)
+    for item, reason in unwritten:
+        logger.warning("Event %s not written: %s", item["event_id"], reason)
+        failed.append(item["event_id"])
+    return {"written": len(items_list) - len(unwritten), "failed": failed}
+
+
 # ── Read ─────────────────────────────────────────────────────────────────────
 
 def _is_active(item: dict, now: datetime) -> bool:
@@ -254,16 +344,71 @@ def _is_active(item: dict, now: datetime) -> bool:
         return False
 
 
-def get_events_by_city(city: str, now: datetime) -> list[dict]:
-    """Query city-index for all active events in a city."""
+def get_events_by_city(city: str, now: datetime,
+                       include_pending: bool = False) -> list[dict]:
+    """
+    Query city-index for all active events in a city.
+
+    include_pending also returns events whose active_at is still in the future
+    (everything not yet expired) — used by the app's delta-synced cache, which
+    filters on activity at query time.
+    """
     table  = _get_table()
     result = []
     now_iso = now.isoformat()
+    # Push active-window filter to DynamoDB so we don't transfer 30K expired items
+    not_expired = Attr("inactive_at").gt(now_iso)
     kwargs = {
         "IndexName": "city-index",
         "KeyConditionExpression": Key("city").eq(city),
-        # Push active-window filter to DynamoDB so we don't transfer 30K expired items
-        "FilterExpression": Attr("inactive_at").gt(now_iso) & Attr("active_at").lte(now_iso),
+        "FilterExpression": not_expired if include_pending
+                            else not_expired & Attr("active_at").lte(now_iso),
+    }
+    while True:
+        resp = table.query(**kwargs)
+        for item in resp.get("Items", []):
+            result.append(dynamo_to_event(item))
+        lek = resp.get("LastEvaluatedKey")
+        if not lek:
+            break
+        kwargs["ExclusiveStartKey"] = lek
+    return result
+
+
+def get_events_updated_since(city: str, since_iso: str) -> list[dict]:
+    """
+    Query city-updated-index for every item in a city written or updated
+    after since_iso — new, changed and cleared events alike.  The caller
+    decides what is still active.
+    """
+    table  = _get_table()
+    result = []
+    kwargs = {
+        "IndexName": "city-updated-index",
+        "KeyConditionExpression": Key("city").eq(city) & Key("updated_at").gt(since_iso),
+    }
+    while True:
+        resp = table.query(**kwargs)
+        for item in resp.get("Items", []):
+            result.append(dynamo_to_event(item))
+        lek = resp.get("LastEvaluatedKey")
+        if not lek:
+            break
+        kwargs["ExclusiveStartKey"] = lek
+    return result
+
+
+def get_events_in_cell(cell: str, now: datetime) -> list[dict]:
+    """
+    Query geohash6-index for every not-yet-expired event in one geohash6
+    cell (including ones whose active_at is still ahead).
+    """
+    table  = _get_table()
+    result = []
+    kwargs = {
+        "IndexName": "geohash6-index",
+        "KeyConditionExpression": Key("geohash6").eq(cell),
+        "FilterExpression": Attr("inactive_at").gt(now.isoformat()),
     }
     while True:
         resp = table.query(**kwargs)
@@ -344,7 +489,8 @@ def get_events_near(lat: float, lon: float, radius_m: float, now: datetime) -> l
 def clear_event(street: str, event_id: str, now_iso: str) -> None:
     """
     Mark an event as cleared by setting inactive_at to now.
-    Also update ttl so DynamoDB can garbage-collect after 7 days.
+    Also update ttl so DynamoDB can garbage-collect after 7 days, and
+    updated_at so delta-syncing readers pick up the change.
     """
     try:
         ts  = datetime.fromisoformat(now_iso.replace("Z", "+00:00")).timestamp()
@@ -354,9 +500,9 @@ def clear_event(street: str, event_id: str, now_iso: str) -> None:
 
     _get_table().update_item(
         Key={"street": street, "event_id": event_id},
-        UpdateExpression="SET inactive_at = :ia, #t = :ttl",
+        UpdateExpression="SET inactive_at = :ia, #t = :ttl, updated_at = :ua",
         ExpressionAttributeNames={"#t": "ttl"},
-        ExpressionAttributeValues={":ia": now_iso, ":ttl": ttl},
+        ExpressionAttributeValues={":ia": now_iso, ":ttl": ttl, ":ua": _now_iso()},
     )
 
 
@@ -0,0 +1,200 @@
+"""
+Rule-based answers for simple /api/ask questions, without a Claude call.
+
+Four intents are recognised, from the question's normalized words (see
+answer_cache.normalize_intent):
+
+  road_clear   "anything ahead?", "is the road clear?"   — only when no
+               hazard lies along the route
+  hazard_count "how many hazards ahead?"
+  nearest      "what's the nearest hazard?"
+  parking      "where's the best place to park?"         — only when one
+               street clearly beats the others (PARKING_MARGIN points)
+
+An intent matches only when it accounts for every word of the question and
+the question is not negated, so "is Shattuck clear?", "how many lanes are
+blocked?" and "where should I not park?" are not matched.  Confidence is the
+fraction of the question's words the intent accounts for; answers are given
+at MIN_CONFIDENCE (env FAST_ANSWER_MIN_CONFIDENCE, default 0.75; above 1
+disables the fast path).  Questions that name or misspell streets, or need
+off-route events, always go to Claude.
+
+stats() reports how many questions were answered here, overall and per intent.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from answer_cache import normalize_intent
+
+MIN_CONFIDENCE = float(os.environ.get("FAST_ANSWER_MIN_CONFIDENCE", "0.75"))
+PARKING_MARGIN = 10     # percentage points the best street must lead by
+
+_lock  = threading.Lock()
+_stats = {"questions": 0, "served": 0, "by_intent": {}}
+
+# intent → (word groups that must each appear (any word of the group), words the intent accounts for)
+_INTENTS = {
+    "road_clear":   (({"hazard", "route", "clear"},), {"hazard", "route", "clear"}),
+    "hazard_count": (({"many", "count", "number"}, {"hazard", "route"}),
+                     {"hazard", "route", "many", "count", "number"}),
+    "nearest":      (({"nearest", "closest", "next", "first"}, {"hazard", "far"}),
+                     {"hazard", "route", "nearest", "closest", "next", "first", "far", "where", "wheres"}),
+    "parking":      (({"park"},), {"park", "best", "where", "wheres", "place", "chance", "find",
+                                   "likely", "good", "near", "nearby", "should", "go", "easiest"}),
+}
+
+# A negated question ("where should I not park?") asks the opposite of what the rules answer
+_NEGATIONS = frozenset({"not", "no", "never", "dont", "doesnt", "cant", "cannot", "isnt", "arent",
+                        "wont", "shouldnt", "without", "avoid"})
+
+# Spoken (singular, plural) names of event types; others read their type name
+_NAMES = {
+    "police_blocking":   ("police roadblock", "police roadblocks"),
+    "double_parked_car": ("double-parked car", "double-parked cars"),
+}
+
+
+# ── Intent ────────────────────────────────────────────────────────────────────
+
+def match_intent(question: str) -> tuple[str | None, float]:
+    """(intent, confidence) of the best-matching intent, or (None, 0.0)."""
+    words = set(normalize_intent(question).split())
+    if not words or words & _NEGATIONS:
+        return None, 0.0
+    best, best_conf = None, 0.0
+    for intent, (required, vocab) in _INTENTS.items():
+        if words <= vocab and all(words & group for group in required):
+            conf = len(words & vocab) / len(words)
+            if conf > best_conf:
+                best, best_conf = intent, conf
+    return best, round(best_conf, 2)
+
+
+# ── Spoken phrasing ───────────────────────────────────────────────────────────
+
+def _spoken_distance(metres: float) -> str:
+    """Distance as it would be said aloud: tens of feet up close, tenths of a mile further out."""
+    feet = metres * 3.28084
+    if feet < 100:
+        return "just ahead"
+    if feet < 1000:
+        return f"about {int(round(feet, -1))} feet ahead"
+    miles = metres / 1609.34
+    return "about a mile ahead" if round(miles, 1) == 1.0 else f"about {miles:.1f} miles ahead"
+
+
+def _name(obj_type: str, n: int = 1) -> str:
+    singular, plural = _NAMES.get(obj_type) or (obj_type.replace("_", " "), obj_type.replace("_", " ") + "s")
+    return singular if n == 1 else plural
+
+
+def _describe(obj: dict) -> str:
+    """'a single cone on Telegraph Ave, about 350 feet ahead, blocking one lane'."""
+    name  = _name(obj.get("type", "hazard"))
+    parts = [("an " if name[0] in "aeiou" else "a ") + name]
+    if obj.get("street"):
+        parts.append(f"on {obj['street']}")
+    text = " ".join(parts) + ", " + _spoken_distance(obj["_distance_m"])
+    if obj.get("blocking"):
+        text += f", blocking {obj['blocking'].replace('_', ' ')}"
+    return text
+
+
+def _tally(hazards: list[dict]) -> str:
+    counts: dict[str, int] = {}
+    for h in hazards:
+        counts[h.get("type", "hazard")] = counts.get(h.get("type", "hazard"), 0) + 1
+    items = [f"{n} {_name(t, n)}" for t, n in counts.items()]
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+
+# ── Answers ───────────────────────────────────────────────────────────────────
+
+def _no_hazards(location: dict) -> str:
+    where = "along your route" if location.get("destination") else "nearby"
+    return f"The road ahead is clear. There are no hazards reported {where}."
+
+
+def _answer_road_clear(location: dict, hazards: list[dict]) -> str | None:
+    return None if hazards else _no_hazards(location)
+
+
+def _answer_hazard_count(location: dict, hazards: list[dict]) -> str | None:
+    if not hazards:
+        return _no_hazards(location)
+    if len(hazards) == 1:
+        return f"There is one hazard ahead: {_describe(hazards[0])}."
+    return (f"There are {len(hazards)} hazards ahead: {_tally(hazards)}. "
+            f"The nearest is {_describe(hazards[0])}.")
+
+
+def _answer_nearest(location: dict, hazards: list[dict]) -> str | None:
+    if not hazards:
+        return _no_hazards(location)
+    return f"The nearest hazard is {_describe(hazards[0])}."
+
+
+def _answer_parking(location: dict, hazards: list[dict]) -> str | None:
+    parking = location.get("parking") or {}
+    blocks  = parking.get("blocks") or []
+    if not blocks or parking.get("ask_cross_street") or parking.get("blue_curb"):
+        return None
+    best   = parking["best_street"]
+    others = [b["chance"] for b in blocks if b["street"] != best]
+    if others and parking["best_chance"] - max(others) < PARKING_MARGIN:
+        return None
+    return (f"Your best chance of a curb spot near {parking.get('anchor_label', 'there')} "
+            f"is on {best}, about {parking['best_chance']} percent.")
+
+
+_ANSWERS = {
+    "road_clear":   _answer_road_clear,
+    "hazard_count": _answer_hazard_count,
+    "nearest":      _answer_nearest,
+    "parking":      _answer_parking,
+}
+
+
+def answer(question: str, location: dict, nearby: list[dict]) -> dict | None:
+    """
+    Answer from the rules if the question is simple enough, else None.
+    Takes the same location and nearby objects as assistant.answer_question.
+    Returns {"answer", "intent", "confidence"}.
+    """
+    intent, confidence = match_intent(question)
+    result = None
+    if intent and confidence >= MIN_CONFIDENCE and not (
+            location.get("checked_streets") or location.get("street_suggestions")):
+        hazards = [o for o in nearby if not o.get("_off_route")]
+        if all(o.get("_distance_m") is not None for o in hazards):
+            hazards.sort(key=lambda o: o["_distance_m"])
+            text = _ANSWERS[intent](location, hazards)
+            if text:
+                result = {"answer": text, "intent": intent, "confidence": confidence}
+
+    with _lock:
+        _stats["questions"] += 1
+        if result:
+            _stats["served"] += 1
+            _stats["by_intent"][intent] = _stats["by_intent"].get(intent, 0) + 1
+    return result
+
+
+def stats() -> dict:
+    """Questions seen, how many were answered here, and the fraction served locally."""
+    with _lock:
+        q = _stats["questions"]
+        return {"questions":      q,
+                "served":         _stats["served"],
+                "served_rate":    round(_stats["served"] / q, 3) if q else None,
+                "by_intent":      dict(_stats["by_intent"]),
+                "min_confidence": MIN_CONFIDENCE}
+
+
+def clear() -> None:
+    """Reset the counters."""
+    with _lock:
+        _stats.update(questions=0, served=0, by_intent={})
@@ -11,6 +11,9 @@ Other cities:
     python fetch_streets.py --city Richmond --state CA --bbox 37.8836,-122.4415,38.0286,-122.2435
     python fetch_streets.py --city Emeryville --state CA --bbox 37.8271,-122.3302,37.8500,-122.2756
     python fetch_streets.py --city Oakland --state CA --bbox 37.6301,-122.3559,37.8854,-122.1144
+
+Each run also writes the compact memory-mapped copy (city_streets*.bin, see
+street_binary.py) next to the JSON; pass --no-binary to skip it.
 """
 
 import argparse
@@ -187,6 +190,8 @@ def main():
     parser.add_argument("--state", default="CA",       help="State abbreviation (default: CA)")
     parser.add_argument("--bbox",  default=None,
                         help="Bounding box as S,W,N,E (default: Berkeley bbox)")
+    parser.add_argument("--no-binary", action="store_true",
+                        help="Skip writing the compact .bin copy (see street_binary.py)")
     args = parser.parse_args()
 
     if args.bbox:
@@ -219,6 +224,11 @@ def main():
     size_kb = round(len(json.dumps(out)) / 1024)
     print(f"Saved {outfile}  ({size_kb} KB, {len(streets)} streets)")
 
+    if not args.no_binary:
+        from street_binary import bin_path, write_streets_bin
+        write_streets_bin(out, bin_path(outfile))
+        print(f"Saved {bin_path(outfile)}  (compact binary, memory-mapped by the app)")
+
     # Quick lane summary
     from collections import Counter
     hw_counts = Counter(s["highway"] for s in streets)
@@ -20,9 +20,6 @@ from math import atan2, cos, degrees, radians, sin
 
 import requests
 
-NOMINATIM_URL     = "https://nominatim.openstreetmap.org"
-NOMINATIM_HEADERS = {"User-Agent": "ADA-Driving-Assistant/1.0 (ucbtrans)"}
-RATE_LIMIT_S      = 1.1   # Nominatim policy: max 1 req/sec; use 1.1 for safety
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -59,26 +56,23 @@ def is_oneway(street: dict) -> bool:
 # ── Nominatim reverse geocode ─────────────────────────────────────────────────
 
 def reverse_geocode(lat: float, lon: float) -> str | None:
-    """Return a street address string, or None if geocoding fails after retries."""
+    """
+    Return a street address string, or None if geocoding fails after retries.
+    Goes through geocoding.py, so answers are cached across runs and requests
+    are spaced per Nominatim's policy; its offline fallback is disabled, as
+    that fallback is built from this script's own output.
+    """
+    import geocoding
+
     for attempt in range(5):
         try:
-            r = requests.get(
-                f"{NOMINATIM_URL}/reverse",
-                params={"lat": lat, "lon": lon, "format": "json"},
-                headers=NOMINATIM_HEADERS,
-                timeout=15,
-            )
-            if r.status_code == 429:
+            return geocoding.reverse(lat, lon, fallback=False)
+        except Exception as e:
+            if isinstance(e, requests.HTTPError) and getattr(e.response, "status_code", None) == 429:
                 wait = 30 * (attempt + 1)
                 print(f"    [rate limited] waiting {wait}s...")
                 time.sleep(wait)
                 continue
-            r.raise_for_status()
-            data  = r.json()
-            parts = data.get("display_name", "").split(",")
-            addr  = ", ".join(p.strip() for p in parts[:3])
-            return addr if addr else None
-        except Exception as e:
             wait = 10 * (attempt + 1)
             print(f"    [geocode error attempt {attempt+1}] {e} — waiting {wait}s...")
             time.sleep(wait)
@@ -166,7 +160,6 @@ def generate(total: int, out_path: str) -> None:
         while city_done < alloc:
             point = pick_random_point(streets)
 
-            time.sleep(RATE_LIMIT_S)
             address = reverse_geocode(point["lat"], point["lon"])
             if address is None:
                 print(f"    [skipping] geocode failed for {point['lat']:.5f},{point['lon']:.5f} — retrying with different point")
@@ -0,0 +1,270 @@
+"""
+Shared geocoding layer: Nominatim search and reverse lookups behind a cache.
+
+A lookup is answered from, in order:
+
+  1. an in-process LRU (GEOCODE_MEMORY_SIZE entries, default 1024)
+  2. the persistent SQLite cache (disk_cache.py, table "geocode") —
+     found results are kept GEOCODE_TTL_S (30 days), "not found" for a day
+  3. Nominatim, at most one request per NOMINATIM_MIN_INTERVAL_S (1 s,
+     Nominatim's usage policy) across the process
+
+Concurrent lookups of the same key share one Nominatim request.  Forward
+queries are keyed by their normalized text, reverse lookups by coordinates
+rounded to 4 decimals (about 11 m); the rounded point is what is sent to
+Nominatim, so a cached answer is exactly what a fresh request would return.
+
+When Nominatim fails or times out it is treated as unreachable for
+_OFFLINE_RETRY_S seconds (always, with GEOCODER_OFFLINE=1).  Meanwhile
+reverse lookups are answered locally by local_geocoder.py (nearest
+pre-geocoded pool address and street segment), and searches return None.
+Offline answers are never cached.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+
+from disk_cache import DiskCache
+
+log = logging.getLogger(__name__)
+
+NOMINATIM_URL     = "https://nominatim.openstreetmap.org"
+NOMINATIM_HEADERS = {"User-Agent": "ADA-Driving-Assistant/1.0 (ucbtrans)"}
+
+_TIMEOUT_S        = 10
+_MIN_INTERVAL_S   = float(os.environ.get("NOMINATIM_MIN_INTERVAL_S", "1.0"))
+_TTL_S            = int(os.environ.get("GEOCODE_TTL_S", str(30 * 86400)))
+_NEGATIVE_TTL_S   = 86400
+_MEMORY_SIZE      = int(os.environ.get("GEOCODE_MEMORY_SIZE", "1024"))
+_OFFLINE_RETRY_S  = 60
+_FORCE_OFFLINE    = os.environ.get("GEOCODER_OFFLINE", "") not in ("", "0")
+_REVERSE_DECIMALS = 4
+
+_memory: OrderedDict = OrderedDict()   # key → result (None = "not found")
+_inflight: dict[str, Future] = {}
+_lock       = threading.Lock()
+_rate_lock  = threading.Lock()
+_last_request = 0.0
+_offline_until = 0.0
+_disk: DiskCache | None = None
+_stats = {"memory_hits": 0, "disk_hits": 0, "remote": 0, "coalesced": 0,
+          "offline": 0, "errors": 0}
+
+_MISSING = object()
+
+
+def _disk_cache() -> DiskCache:
+    global _disk
+    if _disk is None:
+        _disk = DiskCache("geocode")
+    return _disk
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+def normalize_query(query: str) -> str:
+    """Case-, spacing- and trailing-punctuation-insensitive form of an address query."""
+    return re.sub(r"\s+", " ", query).strip(" ,.").lower()
+
+
+def _search_key(query: str) -> str:
+    return "search:" + normalize_query(query)
+
+
+def _reverse_key(lat: float, lon: float) -> str:
+    return f"reverse:{lat:.{_REVERSE_DECIMALS}f},{lon:.{_REVERSE_DECIMALS}f}"
+
+
+# ── Cache plumbing ────────────────────────────────────────────────────────────
+
+def _remember(key: str, value) -> None:
+    with _lock:
+        _memory[key] = value
+        _memory.move_to_end(key)
+        while len(_memory) > _MEMORY_SIZE:
+            _memory.popitem(last=False)
+
+
+def _cached(key: str, fetch):
+    """
+    Return the cached result for key, or call fetch() once — shared by every
+    concurrent caller — and cache what it returns.  Exceptions from fetch
+    propagate to all waiting callers and nothing is cached.
+    """
+    with _lock:
+        value = _memory.get(key, _MISSING)
+        if value is not _MISSING:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return value
+        future = _inflight.get(key)
+        owner  = future is None
+        if owner:
+            future = _inflight[key] = Future()
+        else:
+            _stats["coalesced"] += 1
+    if not owner:
+        return future.result()
+
+    try:
+        stored = _disk_cache().get(key)
+        if stored is not None:
+            value = stored["value"]
+            with _lock:
+                _stats["disk_hits"] += 1
+        else:
+            value = fetch()
+            _disk_cache().set(key, {"value": value},
+                              _TTL_S if value is not None else _NEGATIVE_TTL_S)
+        _remember(key, value)
+        future.set_result(value)
+        return value
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def _online() -> bool:
+    return not _FORCE_OFFLINE and time.time() >= _offline_until
+
+
+def _nominatim(path: str, params: dict):
+    """GET a Nominatim endpoint, spaced per the usage policy; marks the service offline on failure."""
+    global _last_request, _offline_until
+    with _rate_lock:
+        wait = _last_request + _MIN_INTERVAL_S - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.time()
+    with _lock:
+        _stats["remote"] += 1
+    try:
+        r = requests.get(f"{NOMINATIM_URL}/{path}", params={**params, "format": "json"},
+                         headers=NOMINATIM_HEADERS, timeout=_TIMEOUT_S)
+        r.raise_for_status()
+        return r.json()
+    except Exception:
+        with _lock:
+            _stats["errors"] += 1
+        _offline_until = time.time() + _OFFLINE_RETRY_S
+        raise
+
+
+def short_address(display_name: str) -> str:
+    """First three comma-separated parts of a Nominatim display_name."""
+    return ", ".join(p.strip() for p in display_name.split(",")[:3])
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+
+def search(query: str) -> dict | None:
+    """
+    Geocode an address query.  Returns {lat, lon, display_name} for the best
+    match, or None if nothing matched or Nominatim is unreachable.
+    """
+    if not normalize_query(query):
+        return None
+
+    def fetch():
+        hits = _nominatim("search", {"q": query, "limit": 1})
+        if not hits:
+            return None
+        return {"lat": float(hits[0]["lat"]), "lon": float(hits[0]["lon"]),
+                "display_name": hits[0].get("display_name", "")}
+
+    key = _search_key(query)
+    if not _online():
+        return _peek(key)
+    try:
+        return _cached(key, fetch)
+    except Exception as exc:
+        log.warning("Geocode failed for %r: %s", query, exc)
+        return None
+
+
+def reverse(lat: float, lon: float, fallback: bool = True) -> str | None:
+    """
+    Short address ("number, street, area") for a point, or None.
+
+    With fallback=True (the default) an unreachable Nominatim is answered by
+    offline_reverse; with fallback=False its errors are raised instead, for
+    callers that retry on their own (generate_addresses.py).
+    """
+    lat_r = round(lat, _REVERSE_DECIMALS)
+    lon_r = round(lon, _REVERSE_DECIMALS)
+
+    def fetch():
+        data = _nominatim("reverse", {"lat": lat_r, "lon": lon_r})
+        return short_address(data.get("display_name", "")) or None
+
+    key = _reverse_key(lat, lon)
+    if fallback and not _online():
+        cached = _peek(key)
+        return cached if cached is not None else _offline(lat, lon)
+    try:
+        return _cached(key, fetch)
+    except Exception as exc:
+        if not fallback:
+            raise
+        log.warning("Reverse geocode failed for %.5f,%.5f: %s", lat, lon, exc)
+        return _offline(lat, lon)
+
+
+def _peek(key: str):
+    """Cached result without any network request (offline mode)."""
+    with _lock:
+        value = _memory.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    stored = _disk_cache().get(key)
+    return stored["value"] if stored is not None else None
+
+
+def _offline(lat: float, lon: float) -> str | None:
+    with _lock:
+        _stats["offline"] += 1
+    try:
+        return offline_reverse(lat, lon)
+    except Exception as exc:
+        log.warning("Offline reverse geocode failed: %s", exc)
+        return None
+
+
+# ── Offline reverse geocoding ─────────────────────────────────────────────────
+
+def offline_reverse(lat: float, lon: float) -> str | None:
+    """Local description of a point from the address pool and street data (local_geocoder.py)."""
+    import local_geocoder
+
+    return local_geocoder.describe(lat, lon)
+
+
+# ── Stats ─────────────────────────────────────────────────────────────────────
+
+def stats() -> dict:
+    """Lookup counters plus the in-memory cache size."""
+    with _lock:
+        return {**_stats, "memory_size": len(_memory), "max_memory_size": _MEMORY_SIZE,
+                "online": _online()}
+
+
+def clear() -> None:
+    """Empty the in-memory cache and reset counters and the rate and offline timers (tests)."""
+    global _offline_until, _last_request
+    with _lock:
+        _memory.clear()
+        for k in _stats:
+            _stats[k] = 0
+    _offline_until = _last_request = 0.0
@@ -21,7 +21,7 @@ from datetime import datetime, timezone, timedelta
 
 import boto3
 
-from events import put_event, delete_stale_events
+from events import put_events, delete_stale_events
 from simulator import generate_events
 import schedule as sched_mod
 
@@ -42,15 +42,26 @@ CITIES = [
 
 
 def _load_streets_from_s3(s3, prefix: str) -> list[dict]:
-    """Download city_streets.json for a city and return the streets list."""
-    key      = f"{prefix}/city_streets.json"
-    tmp_path = f"/tmp/streets_{prefix.replace('/', '_')}.json"
-    if not os.path.exists(tmp_path):
-        logger.info("Downloading s3://%s/%s", S3_BUCKET, key)
-        s3.download_file(S3_BUCKET, key, tmp_path)
-    with open(tmp_path) as f:
-        data = json.load(f)
-    return data["streets"]
+    """
+    Download a city's streets file and return the streets list — the compact
+    city_streets.bin when one has been uploaded, else city_streets.json.
+    """
+    from street_binary import read_streets
+
+    stem = f"/tmp/streets_{prefix.replace('/', '_')}"
+    for ext in (".bin", ".json"):
+        key, tmp_path = f"{prefix}/city_streets{ext}", stem + ext
+        if os.path.exists(tmp_path):
+            break
+        try:
+            logger.info("Downloading s3://%s/%s", S3_BUCKET, key)
+            s3.download_file(S3_BUCKET, key, tmp_path)
+            break
+        except Exception:
+            if ext == ".json":
+                raise
+            logger.info("No %s for %s — using JSON", key, prefix)
+    return read_streets(tmp_path)["streets"]
 
 
 def _process_city(s3, city: str, prefix: str, now: datetime) -> dict:
@@ -64,17 +75,20 @@ def _process_city(s3, city: str, prefix: str, now: datetime) -> dict:
     new_events = generate_events(n_events, day=now, streets=streets)
     logger.info("%s: generated %d new events", city, len(new_events))
 
-    # 3. Write each event to DynamoDB (each has a unique event_id sort key — no read needed)
+    # 3. Batch-write the events to DynamoDB (each has a unique event_id sort key — no read needed)
     for ev in new_events:
         # Ensure city field is set for the city-index GSI
         ev["city"] = city
-        put_event(ev)
+    written = put_events(new_events, max_workers=4)
+    if written["failed"]:
+        logger.warning("%s: %d events could not be written", city, len(written["failed"]))
 
     return {
         "city":      city,
         "streets":   len(streets),
         "n_events":  n_events,
         "generated": len(new_events),
+        "written":   written["written"],
     }
 
 
@@ -146,16 +160,16 @@ def _generate_fleet_schedules(s3, now: datetime) -> dict:
         logger.error("Could not load address pool: %s", exc)
         return {"error": str(exc)}
 
-    generated, errors = [], []
-    for i in range(1, sched_mod.NUM_VANS + 1):
-        v_id = sched_mod.van_id(i)
-        try:
-            s = sched_mod.generate_van_schedule(v_id, pt_date, pool)
-            sched_mod.save_schedule(s)
-            generated.append(v_id)
-            logger.info("Generated schedule for %s on %s", v_id, pt_date)
-        except Exception as exc:
-            logger.error("Schedule generation failed for %s: %s", v_id, exc)
-            errors.append({"van_id": v_id, "error": str(exc)})
-
-    return {"date": pt_date, "generated": generated, "errors": errors}
+    # One OSRM duration matrix (a few concurrent /table requests) times every
+    # van's legs; the schedules are written with BatchWriteItem
+    v_ids = [sched_mod.van_id(i) for i in range(1, sched_mod.NUM_VANS + 1)]
+    try:
+        result = sched_mod.generate_and_save_fleet(
+            v_ids, pt_date, pool, use_osrm=True,
+            optimize=os.environ.get("FLEET_SCHEDULER", "random") == "optimized")
+    except Exception as exc:
+        logger.error("Fleet schedule generation failed: %s", exc)
+        result = {"generated": [], "errors": [{"van_id": v, "error": str(exc)} for v in v_ids]}
+    logger.info("Generated %d schedules on %s (%d errors)",
+                len(result["generated"]), pt_date, len(result["errors"]))
+    return {"date": pt_date, **result}
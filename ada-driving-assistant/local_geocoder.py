@@ -0,0 +1,162 @@
+"""
+Offline reverse geocoder built from addresses_pool.json and the street data.
+
+addresses_pool.json holds ~1000 points reverse-geocoded ahead of time by
+generate_addresses.py; deployed, it is read from S3 (the Lambda bundle
+leaves it out), locally from the file.  The points go into a 2-d tree over
+locally projected coordinates (metres east/north of the pool's centre), so
+the nearest pool address is found in a few dozen distance checks; the
+street under the point comes from StreetIndex.nearest_segment.  describe() combines the two:
+
+  near 2180 Shattuck Avenue, Downtown Berkeley    pool address on the same street
+  Center Street, near 2180 Shattuck Avenue, ...   pool address on another street
+  Center Street, Berkeley                         no pool address within reach
+
+A lookup takes tens of microseconds once the city's streets are loaded, so
+this is the default for random locations (location.random_location) and
+simulated events; Nominatim (geocoding.py) is an opt-in enrichment.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+
+_POOL_FILE      = os.path.join(os.path.dirname(os.path.abspath(__file__)), "addresses_pool.json")
+_M_PER_DEG      = 6_371_000 * math.pi / 180
+POOL_MATCH_M    = 150    # pool address close enough to describe the point by
+STREET_MATCH_M  = 60     # street segment close enough to name
+
+
+class AddressTree:
+    """2-d tree over pool entries ({"lat", "lon", ...}) for nearest-neighbour queries."""
+
+    def __init__(self, entries: list[dict]):
+        self.entries = entries
+        if entries:
+            self._lat0 = sum(e["lat"] for e in entries) / len(entries)
+            self._lon0 = sum(e["lon"] for e in entries) / len(entries)
+        else:
+            self._lat0 = self._lon0 = 0.0
+        self._kx = _M_PER_DEG * math.cos(math.radians(self._lat0))
+        self._xy = [self._project(e["lat"], e["lon"]) for e in entries]
+        # Implicit tree: _order[lo:hi] is a subtree whose median element is the node
+        self._order = list(range(len(entries)))
+        self._build(0, len(entries), 0)
+
+    def _project(self, lat: float, lon: float) -> tuple[float, float]:
+        return (lon - self._lon0) * self._kx, (lat - self._lat0) * _M_PER_DEG
+
+    def _build(self, lo: int, hi: int, axis: int) -> None:
+        if hi - lo <= 1:
+            return
+        self._order[lo:hi] = sorted(self._order[lo:hi], key=lambda i: self._xy[i][axis])
+        mid = (lo + hi) // 2
+        self._build(lo, mid, 1 - axis)
+        self._build(mid + 1, hi, 1 - axis)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def nearest(self, lat: float, lon: float) -> tuple[dict, float] | None:
+        """(entry, distance_m) of the closest entry, or None for an empty tree."""
+        if not self.entries:
+            return None
+        qx, qy = self._project(lat, lon)
+        best = [-1, float("inf")]   # index, squared distance
+
+        def visit(lo: int, hi: int, axis: int) -> None:
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            i   = self._order[mid]
+            x, y = self._xy[i]
+            d2 = (x - qx) ** 2 + (y - qy) ** 2
+            if d2 < best[1] or (d2 == best[1] and i < best[0]):
+                best[0], best[1] = i, d2
+            diff = (qx - x) if axis == 0 else (qy - y)
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(*near, 1 - axis)
+            if diff * diff <= best[1]:
+                visit(*far, 1 - axis)
+
+        visit(0, len(self._order), 0)
+        return self.entries[best[0]], math.sqrt(best[1])
+
+
+_tree: AddressTree | None = None
+
+
+def _load_pool() -> list[dict]:
+    """addresses_pool.json from S3 first (as app._load_address_pool does), then the local file."""
+    bucket = os.environ.get("S3_BUCKET", "")
+    if bucket:
+        try:
+            import boto3
+            obj = boto3.client("s3").get_object(Bucket=bucket, Key="addresses_pool.json")
+            return json.loads(obj["Body"].read())
+        except Exception:
+            pass
+    try:
+        with open(_POOL_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def address_tree() -> AddressTree:
+    """The tree over the address pool, built on first use (empty if it cannot be loaded)."""
+    global _tree
+    if _tree is None:
+        pool = _load_pool()
+        # Entries whose "address" is a raw coordinate fallback describe nothing
+        _tree = AddressTree([e for e in pool
+                             if not re.fullmatch(r"-?\d+\.\d+,\s*-?\d+\.\d+", e.get("address", ""))])
+    return _tree
+
+
+def format_address(address: str) -> str:
+    """'2180, Shattuck Avenue, Downtown' → '2180 Shattuck Avenue, Downtown'."""
+    number, sep, rest = address.partition(", ")
+    return f"{number} {rest}" if sep and number.isdigit() else address
+
+
+def nearest_street(lat: float, lon: float) -> tuple[str, str] | None:
+    """(street name, city) of the closest named segment within STREET_MATCH_M."""
+    from location import _street_index, street_cities
+
+    for city in street_cities(lat, lon):
+        try:
+            hit = _street_index(city).nearest_segment(lat, lon, max_m=STREET_MATCH_M)
+        except Exception:
+            continue
+        if hit and not hit[0].get("name", "").startswith("Unnamed_"):
+            return hit[0]["name"], city
+    return None
+
+
+def describe(lat: float, lon: float, street: str | None = None) -> str | None:
+    """
+    Short human-readable description of a point, or None when neither a pool
+    address nor a named street is nearby.  Pass street when it is already
+    known (the simulator's events) to skip the segment lookup.
+    """
+    from street_registry import CITIES
+
+    pooled = address_tree().nearest(lat, lon)
+    near   = pooled[0] if pooled and pooled[1] <= POOL_MATCH_M else None
+    city   = None
+    if street is None:
+        hit = nearest_street(lat, lon)
+        if hit:
+            street, city = hit
+
+    if near and (street is None or near.get("street") == street):
+        return f"near {format_address(near['address'])}"
+    if street and near:
+        return f"{street}, near {format_address(near['address'])}"
+    if street and city:
+        return f"{street}, {CITIES[city].label}"
+    return street
@@ -1,56 +1,212 @@
 """
 Location utilities: geocoding, reverse geocoding, nearby object search,
-and random Berkeley location generation.
+and random street location generation for the supported cities.
 """
 
 from __future__ import annotations
 
-import json
 import math
 import os
 import random
 from datetime import datetime, timezone
 from math import atan2, cos, degrees, radians, sin
+from typing import TYPE_CHECKING
 
-import requests
+from street_registry import (CITIES, DEFAULT_CITY, StreetRegistry, cities_in_bbox,
+                             resident_bytes)
 
-NOMINATIM_URL     = "https://nominatim.openstreetmap.org"
-NOMINATIM_HEADERS = {"User-Agent": "ADA-Driving-Assistant/1.0 (ucbtrans)"}
+if TYPE_CHECKING:
+    from event_store import EventStore
 
-_STREETS_FILE   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "city_streets.json")
-_STREETS_TMP    = "/tmp/city_streets.json"
-_S3_BUCKET      = os.environ.get("S3_BUCKET")
-_STREETS_KEY    = os.environ.get("STREETS_KEY", "CA/Berkeley/city_streets.json")
+try:
+    import numpy as np
+except ImportError:   # find_objects_along_route falls back to pure Python
+    np = None
 
+_STREETS_DIR     = os.path.dirname(os.path.abspath(__file__))
+_STREETS_TMP_DIR = "/tmp"
+_S3_BUCKET       = os.environ.get("S3_BUCKET")
+_STREETS_KEY     = os.environ.get("STREETS_KEY", "CA/Berkeley/city_streets.json")   # default city's
 
-def _streets_path() -> str:
-    """Return path to city_streets.json, downloading from S3 to /tmp if needed."""
-    if os.path.exists(_STREETS_FILE):
-        return _STREETS_FILE
-    if os.path.exists(_STREETS_TMP):
-        return _STREETS_TMP
+
+def _city_files(city: str) -> tuple[str, str, str]:
+    """(bundled file, /tmp copy, S3 key) of a city's streets JSON."""
+    info = CITIES[city]
+    key  = _STREETS_KEY if city == DEFAULT_CITY else f"{info.prefix}/city_streets.json"
+    return (os.path.join(_STREETS_DIR, info.filename),
+            os.path.join(_STREETS_TMP_DIR, info.filename), key)
+
+
+def _download_streets(key: str, dest: str) -> None:
+    """
+    Download an S3 streets object to dest and record its key and ETag in
+    dest + ".etag", so later revalidation can use a conditional HeadObject.
+    """
+    import json
+
+    import boto3
+    # One GetObject, so the recorded ETag is the one of the bytes written;
+    # os.replace keeps a mapping of the previous copy valid while it is in use.
+    obj = boto3.client("s3").get_object(Bucket=_S3_BUCKET, Key=key)
+    tmp = dest + ".part"
+    with open(tmp, "wb") as f:
+        for chunk in obj["Body"].iter_chunks(1 << 20):
+            f.write(chunk)
+    os.replace(tmp, dest)
+    with open(dest + ".etag", "w") as f:
+        json.dump({"key": key, "etag": obj["ETag"]}, f)
+
+
+def _streets_path(city: str | None = None) -> str:
+    """
+    Return path to a city's streets file (default: Berkeley), downloading
+    from S3 to /tmp if needed.  The compact .bin (see street_binary.py) is
+    used instead of the JSON whenever one is available and up to date.
+    """
+    from street_binary import bin_path, preferred_path
+
+    local, tmp, key = _city_files(city or DEFAULT_CITY)
+    for path in (local, tmp):
+        path = preferred_path(path)
+        if os.path.exists(path):
+            return path
     if _S3_BUCKET:
-        import boto3
-        boto3.client("s3").download_file(_S3_BUCKET, _STREETS_KEY, _STREETS_TMP)
-        return _STREETS_TMP
+        try:
+            _download_streets(bin_path(key), bin_path(tmp))
+            return bin_path(tmp)
+        except Exception:
+            pass   # no binary uploaded for this city — fall back to the JSON
+        _download_streets(key, tmp)
+        return tmp
     raise FileNotFoundError(
-        f"city_streets.json not found locally or in S3 bucket '{_S3_BUCKET}'"
+        f"{os.path.basename(local)} not found locally or in S3 bucket '{_S3_BUCKET}'"
     )
 
 
-import time as _time
-_streets_cache: dict = {"data": None, "loaded_at": 0.0}
-_STREETS_CACHE_TTL = 300   # seconds — same TTL as the objects cache in app.py
+def _s3_copy_changed(path: str) -> bool:
+    """
+    For a /tmp copy downloaded from S3, ask S3 whether the object changed
+    (HeadObject with IfNoneMatch) and re-download it if so.  False for files
+    that did not come from S3.
+    """
+    import json
+
+    try:
+        with open(path + ".etag") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    import boto3
+    from botocore.exceptions import ClientError
+    try:
+        boto3.client("s3").head_object(Bucket=_S3_BUCKET, Key=meta["key"],
+                                       IfNoneMatch=meta["etag"])
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            return False
+        raise
+    _download_streets(meta["key"], path)
+    return True
+
+
+# ── Streets cache ─────────────────────────────────────────────────────────────
+#
+# Each city's parsed streets file and everything derived from it live in one
+# snapshot dict that is swapped in wholesale (only its lazily built matcher
+# and parking table are filled in later), so a request always sees data,
+# index and matcher from one file.  street_registry.StreetRegistry loads
+# cities on first use, keeps the recently used ones under
+# STREETS_MEMORY_MB, and every STREETS_REVALIDATE_S seconds checks a
+# city's file fingerprint (mtime and size, or the S3 ETag for a /tmp
+# download) on a background thread, rebuilding only when it changed.
+
+_STREETS_REVALIDATE_S = int(os.environ.get("STREETS_REVALIDATE_S", "300"))
+_STREETS_MEMORY_MB    = int(os.environ.get("STREETS_MEMORY_MB", "160"))
+
+
+def _file_fingerprint(path: str) -> tuple:
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def _build_streets_snapshot(city: str, warm: bool = False) -> dict:
+    """Parse a city's streets file and build its StreetIndex (and, if warm, its matcher)."""
+    from street_binary import read_streets
+    from street_index import StreetIndex
+
+    path        = _streets_path(city)
+    fingerprint = _file_fingerprint(path)
+    data        = read_streets(path)
+    snapshot    = {"city": city, "data": data, "index": StreetIndex(data), "matcher": None,
+                   "fingerprint": fingerprint, "cost": resident_bytes(path)}
+    if warm:
+        from street_matcher import StreetMatcher
+        snapshot["matcher"] = StreetMatcher(snapshot["index"].named)
+    return snapshot
+
+
+def _streets_changed(city: str, snapshot: dict) -> bool:
+    """True if the file behind snapshot was replaced, edited or superseded by a .bin."""
+    path = snapshot["fingerprint"][0]
+    if _S3_BUCKET and path.startswith(_STREETS_TMP_DIR + "/") and _s3_copy_changed(path):
+        return True
+    return _file_fingerprint(_streets_path(city)) != snapshot["fingerprint"]
+
+
+_streets = StreetRegistry(_build_streets_snapshot, _streets_changed,
+                          budget_bytes=_STREETS_MEMORY_MB << 20,
+                          revalidate_s=_STREETS_REVALIDATE_S)
+
 
-def _load_streets() -> dict:
-    """Return city_streets.json as a dict, cached in memory for 5 minutes."""
-    now = _time.time()
-    if (_streets_cache["data"] is None
-            or now - _streets_cache["loaded_at"] > _STREETS_CACHE_TTL):
-        with open(_streets_path()) as f:
-            _streets_cache["data"] = json.load(f)
-        _streets_cache["loaded_at"] = now
-    return _streets_cache["data"]
+def _streets_snapshot(city: str | None = None) -> dict:
+    """Return the current snapshot of a city's streets (default: Berkeley)."""
+    return _streets.snapshot(city or DEFAULT_CITY)
+
+
+def _load_streets(city: str | None = None) -> dict:
+    """
+    Return a city's city_streets.json as a dict.  The spatial index over its
+    segments belongs to the same snapshot so the two never drift apart —
+    fetch it with _street_index().
+    """
+    return _streets_snapshot(city)["data"]
+
+
+def _street_index(city: str | None = None):
+    """Return the StreetIndex built for a city's currently cached streets file."""
+    return _streets_snapshot(city)["index"]
+
+
+def _street_matcher(city: str | None = None):
+    """Return the StreetMatcher for a city's currently cached streets file, built on first use."""
+    snapshot = _streets_snapshot(city)
+    if snapshot["matcher"] is None:
+        from street_matcher import StreetMatcher
+        snapshot["matcher"] = StreetMatcher(snapshot["index"].named)
+    return snapshot["matcher"]
+
+
+def street_cities(lat: float | None = None, lon: float | None = None,
+                  radius_m: float = 0.0, bbox: tuple | None = None) -> list[str]:
+    """
+    Supported cities whose street data covers (lat, lon) ± radius_m and/or a
+    (south, west, north, east) box, smallest first — the default city when
+    nothing is given or nothing falls inside any city.
+    """
+    found: list[str] = []
+    if lat is not None and lon is not None:
+        dlat = radius_m / _M_PER_DEG
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        found += cities_in_bbox(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+    if bbox is not None:
+        found += [c for c in cities_in_bbox(*bbox) if c not in found]
+    return found or [DEFAULT_CITY]
+
+
+def streets_stats() -> dict:
+    """Resident cities and memory use of the streets cache."""
+    return _streets.stats()
 
 
 # ── Math helpers ─────────────────────────────────────────────────────────────
@@ -92,74 +248,57 @@ _SUPPORTED_CITIES = {
 
 def geocode_address(address: str) -> dict | None:
     """
-    Geocode an address string.
+    Geocode an address string (cached, see geocoding.py).
     Appends ', Berkeley, CA' if no supported city/state is mentioned.
     Returns {lat, lon, address} or None.
     """
+    import geocoding
+
     addr_lower = address.lower()
     has_city = any(city in addr_lower for city in _SUPPORTED_CITIES)
     query = address if has_city else f"{address}, Berkeley, CA"
-    try:
-        r = requests.get(
-            f"{NOMINATIM_URL}/search",
-            params={"q": query, "format": "json", "limit": 1, "addressdetails": 1},
-            headers=NOMINATIM_HEADERS,
-            timeout=10,
-        )
-        r.raise_for_status()
-        results = r.json()
-        if results:
-            res = results[0]
-            parts = res.get("display_name", address).split(",")
-            short  = ", ".join(p.strip() for p in parts[:3])
-            return {
-                "lat":     float(res["lat"]),
-                "lon":     float(res["lon"]),
-                "address": short,
-            }
-    except Exception as exc:
-        print(f"Geocoding error: {exc}")
-    return None
+    res = geocoding.search(query)
+    if res is None:
+        return None
+    return {
+        "lat":     res["lat"],
+        "lon":     res["lon"],
+        "address": geocoding.short_address(res["display_name"] or address),
+    }
 
 
 def reverse_geocode(lat: float, lon: float) -> str:
-    """Return a short human-readable address for lat/lon."""
-    try:
-        r = requests.get(
-            f"{NOMINATIM_URL}/reverse",
-            params={"lat": lat, "lon": lon, "format": "json"},
-            headers=NOMINATIM_HEADERS,
-            timeout=10,
-        )
-        r.raise_for_status()
-        data  = r.json()
-        parts = data.get("display_name", "").split(",")
-        return ", ".join(p.strip() for p in parts[:3])
-    except Exception:
-        return f"{lat:.5f}, {lon:.5f}"
+    """
+    Return a short human-readable address for lat/lon (cached, answered
+    locally when Nominatim is unreachable — see geocoding.py).
+    """
+    import geocoding
+
+    return geocoding.reverse(lat, lon) or f"{lat:.5f}, {lon:.5f}"
 
 
 # ── Random location ──────────────────────────────────────────────────────────
 
-def random_location() -> dict:
+_GEOCODER_ENRICH = os.environ.get("GEOCODER_ENRICH", "") not in ("", "0")
+
+
+def random_location(city: str | None = None, enrich: bool | None = None) -> dict:
     """
-    Pick a random drivable point on a named Berkeley street.
+    Pick a random drivable point on a named street of city (default: Berkeley).
     Returns {lat, lon, bearing, bearing_direction, heading_auto,
              heading_options (two-way only), address, street}.
-    """
-    data = _load_streets()
 
-    named = [s for s in data["streets"] if not s["name"].startswith("Unnamed_")]
+    The address comes from the offline geocoder (local_geocoder.py); with
+    enrich=True (default: env GEOCODER_ENRICH) it is looked up on Nominatim.
+    """
+    index = _street_index(city)
 
-    # Keep picking until we find a street with at least one usable segment (≥2 points).
-    for _ in range(200):
-        street    = random.choice(named)
-        segments  = street.get("segments") or [street.get("waypoints", [])]
-        usable    = [seg for seg in segments if len(seg) >= 2]
-        if usable:
-            break
-    else:
+    # Only named streets with at least one usable segment (≥2 points) are candidates.
+    if not index.usable_named:
         raise RuntimeError("No usable street segments found in city_streets.json")
+    street   = index.streets[random.choice(index.usable_named)]
+    segments = street.get("segments") or [street.get("waypoints", [])]
+    usable   = [seg for seg in segments if len(seg) >= 2]
 
     seg = random.choice(usable)
     i   = random.randint(0, len(seg) - 2)
@@ -169,7 +308,13 @@ def random_location() -> dict:
     lon = p1["lon"] + t * (p2["lon"] - p1["lon"])
 
     fwd_bearing = compute_bearing_from_segment(p1, p2)
-    address     = reverse_geocode(lat, lon)
+    if enrich is None:
+        enrich = _GEOCODER_ENRICH
+    if enrich:
+        address = reverse_geocode(lat, lon)
+    else:
+        import local_geocoder
+        address = local_geocoder.describe(lat, lon, street["name"]) or f"{lat:.5f}, {lon:.5f}"
 
     result = {
         "lat":               round(lat, 6),
@@ -195,6 +340,12 @@ def random_location() -> dict:
 
 # ── Object geometry ───────────────────────────────────────────────────────────
 
+def _is_event_store(objects) -> bool:
+    """True for an event_store.EventStore (columnar events built by app.py)."""
+    from event_store import EventStore
+    return isinstance(objects, EventStore)
+
+
 def object_center(obj: dict) -> tuple[float | None, float | None]:
     """Return (lat, lon) centroid of any object type."""
     if "coordinates" in obj:
@@ -224,8 +375,200 @@ def _point_to_segment_dist_m(plat: float, plon: float,
     return haversine_m(plat, plon, lat1 + t * dy, lon1 + t * dx)
 
 
-def find_objects_along_route(route_coords: list,
-                              objects: list[dict],
+_ROUTE_CELL_DEG = 0.005   # coarse segment grid cell (≈ 550 m N-S, ≈ 440 m E-W)
+_M_PER_DEG      = 6_371_000 * math.pi / 180
+
+
+class CompiledRoute:
+    """
+    A route polyline with everything find_objects_along_route derives from it:
+    cumulative along-route distances, per-segment vectors and lengths, the
+    bounding box and a coarse grid of segments.  One instance serves every
+    question on the same route (route_cache), from concurrent threads: the
+    geometry is never changed after compile_route, and the two fields filled
+    in later are derived from it and set once — np_arrays() builds the same
+    arrays whichever thread gets there, and app._route_cells sets
+    geohash6_cells under its lock.
+    """
+
+    def __init__(self, route_coords: list, cell_deg: float = _ROUTE_CELL_DEG):
+        self.coords   = list(route_coords)   # [[lon, lat], ...]
+        self.cell_deg = cell_deg
+        self.cum_dist: list[float] = [0.0]
+        self.seg_len:  list[float] = []
+        self.seg_dx:   list[float] = []
+        self.seg_dy:   list[float] = []
+        self.grid: dict[tuple[int, int], list[int]] = {}   # cell → [segment index, ...]
+        self.geohash6_cells: list[str] | None = None        # set once by app._route_cells
+        self._np_arrays = None
+
+        for i in range(len(self.coords) - 1):
+            lon1, lat1 = self.coords[i]
+            lon2, lat2 = self.coords[i + 1]
+            self.seg_len.append(haversine_m(lat1, lon1, lat2, lon2))
+            self.cum_dist.append(self.cum_dist[-1] + self.seg_len[-1])
+            self.seg_dx.append(lon2 - lon1)
+            self.seg_dy.append(lat2 - lat1)
+            r0, c0 = self._cell(min(lat1, lat2), min(lon1, lon2))
+            r1, c1 = self._cell(max(lat1, lat2), max(lon1, lon2))
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    self.grid.setdefault((r, c), []).append(i)
+
+        if self.coords:
+            lats = [lat for _, lat in self.coords]
+            lons = [lon for lon, _ in self.coords]
+            self.bbox = (min(lats), min(lons), max(lats), max(lons))   # (s, w, n, e)
+        else:
+            self.bbox = None
+
+    def __len__(self) -> int:
+        return len(self.seg_len)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def segments_near(self, lat: float, lon: float, radius_m: float) -> list[int]:
+        """
+        Indices of segments in grid cells within radius_m of (lat, lon), in
+        route order.  A superset of the segments actually within radius_m.
+        """
+        dlat = radius_m / _M_PER_DEG * 1.01
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        r0, c0 = self._cell(lat - dlat, lon - dlon)
+        r1, c1 = self._cell(lat + dlat, lon + dlon)
+        found: set[int] = set()
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                found.update(self.grid.get((r, c), ()))
+        return sorted(found)
+
+    def np_arrays(self) -> dict:
+        """Per-segment NumPy arrays for the batched engine (built once, on demand)."""
+        if self._np_arrays is None:
+            coords = np.asarray(self.coords, dtype=float)
+            dx     = np.asarray(self.seg_dx, dtype=float)
+            dy     = np.asarray(self.seg_dy, dtype=float)
+            denom  = dx * dx + dy * dy
+            degen  = denom == 0
+            self._np_arrays = {
+                "lon1": coords[:-1, 0], "lat1": coords[:-1, 1],
+                "dx": dx, "dy": dy, "degen": degen,
+                "denom": np.where(degen, 1.0, denom),
+                "max_abs_lat": float(np.abs(coords[:, 1]).max()),
+            }
+        return self._np_arrays
+
+
+def compile_route(route_coords: list) -> CompiledRoute:
+    """Precompute the corridor-search geometry for an OSRM [[lon, lat], ...] polyline."""
+    return CompiledRoute(route_coords)
+
+
+def _closest_on_route(olat: float, olon: float,
+                      route: CompiledRoute, seg_ids) -> tuple[float, float]:
+    """
+    Project (olat, olon) onto the given route segments and return
+    (perpendicular distance, along-route distance) for the closest one.
+    Ties go to the earliest segment, as segments are visited in order.
+    """
+    min_perp     = float("inf")
+    along_at_min = 0.0
+    coords, seg_dx, seg_dy = route.coords, route.seg_dx, route.seg_dy
+
+    for i in seg_ids:
+        lon1, lat1 = coords[i]
+        dx = seg_dx[i]
+        dy = seg_dy[i]
+        if dx == 0 and dy == 0:
+            t = 0.0
+        else:
+            t = ((olon - lon1) * dx + (olat - lat1) * dy) / (dx * dx + dy * dy)
+            t = max(0.0, min(1.0, t))
+
+        perp = haversine_m(olat, olon, lat1 + t * dy, lon1 + t * dx)
+        if perp < min_perp:
+            min_perp     = perp
+            along_at_min = route.cum_dist[i] + t * route.seg_len[i]
+
+    return min_perp, along_at_min
+
+
+# Candidate slack for the NumPy pre-pass: the equirectangular distance is
+# within ~1e-6 of haversine at corridor scales, so this is very generous.
+_NP_REL_TOL    = 1e-3
+_NP_ABS_TOL_M  = 0.5
+_NP_BLOCK_ELEM = 2_000_000   # max events × segments evaluated per NumPy block
+
+
+def _route_hits_py(route: CompiledRoute, centers, max_dist):
+    """
+    Pure-Python engine: each object against the route segments in the grid
+    cells around it.  Any segment within max_dist is always a candidate, so
+    the result matches a scan of every segment for all qualifying objects.
+    """
+    return [
+        (k, *_closest_on_route(olat, olon, route, route.segments_near(olat, olon, max_dist)))
+        for k, (olat, olon) in enumerate(centers)
+    ]
+
+
+def _route_hits_np(route: CompiledRoute, centers, max_dist):
+    """
+    NumPy engine: project all object centres onto all route segments in one
+    batched pass using an equirectangular local projection, keep only the
+    segments that could be the closest one, then run the exact haversine
+    projection (_closest_on_route) on just those.  Returns the same values as
+    _route_hits_py for every object within max_dist of the route.
+    """
+    R   = 6_371_000.0
+    arr = route.np_arrays()
+    lon1, lat1 = arr["lon1"], arr["lat1"]
+    dx, dy     = arr["dx"], arr["dy"]
+
+    pts  = np.asarray(centers, dtype=float)
+    olat, olon = pts[:, 0], pts[:, 1]
+
+    # Objects outside the route's bounding box (padded by max_dist) can't qualify
+    s, w, n, e = route.bbox
+    pad_lat = (max_dist * (1 + _NP_REL_TOL) + _NP_ABS_TOL_M) / (R * math.pi / 180)
+    pad_lon = pad_lat / max(math.cos(math.radians(arr["max_abs_lat"])), 1e-6)
+    keep = np.nonzero(
+        (olat >= s - pad_lat) & (olat <= n + pad_lat) &
+        (olon >= w - pad_lon) & (olon <= e + pad_lon)
+    )[0]
+
+    hits = []
+    block = max(1, _NP_BLOCK_ELEM // len(lon1))
+    for b0 in range(0, len(keep), block):
+        rows = keep[b0:b0 + block]
+        plat = olat[rows][:, None]
+        plon = olon[rows][:, None]
+
+        t = ((plon - lon1) * dx + (plat - lat1) * dy) / arr["denom"]
+        t = np.where(arr["degen"], 0.0, np.clip(t, 0.0, 1.0))
+        foot_lat = lat1 + t * dy
+        foot_lon = lon1 + t * dx
+
+        # Equirectangular distance, scaled at each pair's mid-latitude
+        ex = np.radians(foot_lon - plon) * np.cos(np.radians((foot_lat + plat) / 2))
+        ey = np.radians(foot_lat - plat)
+        approx = R * np.hypot(ex, ey)
+
+        best  = approx.min(axis=1)
+        slack = best * (1 + _NP_REL_TOL) + _NP_ABS_TOL_M
+        near  = best <= max_dist * (1 + _NP_REL_TOL) + _NP_ABS_TOL_M
+        cand  = approx <= slack[:, None]
+
+        for r in np.nonzero(near)[0]:
+            k = int(rows[r])
+            seg_ids = np.nonzero(cand[r])[0].tolist()
+            hits.append((k, *_closest_on_route(centers[k][0], centers[k][1], route, seg_ids)))
+    return hits
+
+
+def find_objects_along_route(route_coords: list | CompiledRoute,
+                              objects: list[dict] | EventStore,
                               corridor_m: float = 40,
                               route_streets: list | None = None) -> list[dict]:
     """
@@ -240,63 +583,54 @@ def find_objects_along_route(route_coords: list,
          street field and is within corridor_m of the polyline.
       2. Closest point on polyline is within max(corridor_m, 200) m of object.
 
+    Uses the batched NumPy engine when NumPy is installed and the pure-Python
+    grid engine otherwise; both return identical results.
+
     Args:
-        route_coords:   [[lon, lat], ...] as returned by OSRM.
-        objects:        Full city objects list.
+        route_coords:   [[lon, lat], ...] as returned by OSRM, or a
+                        CompiledRoute from compile_route / route_cache.
+        objects:        Full city objects list, or an EventStore.
         corridor_m:     Tight corridor for unnamed objects (default 40 m).
         route_streets:  Street names from OSRM steps.
     """
     now        = datetime.now(timezone.utc)
     street_set = {s.lower() for s in route_streets} if route_streets else None
     max_dist   = max(corridor_m, 200)
+    route      = route_coords if isinstance(route_coords, CompiledRoute) \
+                 else compile_route(route_coords)
 
-    # Precompute cumulative along-route distances for each vertex
-    cum_dist = [0.0]
-    for i in range(len(route_coords) - 1):
-        lon1, lat1 = route_coords[i]
-        lon2, lat2 = route_coords[i + 1]
-        cum_dist.append(cum_dist[-1] + haversine_m(lat1, lon1, lat2, lon2))
-
-    result = []
-
-    for obj in objects:
-        try:
-            if datetime.fromisoformat(obj["active_at"])   > now:
-                continue
-            if datetime.fromisoformat(obj["inactive_at"]) < now:
+    active:  list[dict] = []
+    centers: list[tuple[float, float]] = []
+    if _is_event_store(objects):
+        active, centers = objects.active_with_centers(now)
+    else:
+        for obj in objects:
+            try:
+                if datetime.fromisoformat(obj["active_at"])   > now:
+                    continue
+                if datetime.fromisoformat(obj["inactive_at"]) < now:
+                    continue
+            except Exception:
                 continue
-        except Exception:
-            continue
-
-        olat, olon = object_center(obj)
-        if olat is None:
-            continue
-
-        # Find the closest segment; track both perpendicular and along-route distances
-        min_perp  = float("inf")
-        along_at_min = 0.0
 
-        for i in range(len(route_coords) - 1):
-            lon1, lat1 = route_coords[i]
-            lon2, lat2 = route_coords[i + 1]
+            olat, olon = object_center(obj)
+            if olat is None:
+                continue
+            active.append(obj)
+            centers.append((olat, olon))
 
-            dx = lon2 - lon1
-            dy = lat2 - lat1
-            if dx == 0 and dy == 0:
-                t = 0.0
-            else:
-                t = ((olon - lon1) * dx + (olat - lat1) * dy) / (dx * dx + dy * dy)
-                t = max(0.0, min(1.0, t))
+    if np is not None and len(route) and centers:
+        hits = _route_hits_np(route, centers, max_dist)
+    else:
+        hits = _route_hits_py(route, centers, max_dist)
 
-            perp = haversine_m(olat, olon, lat1 + t * dy, lon1 + t * dx)
-            if perp < min_perp:
-                min_perp = perp
-                seg_len  = haversine_m(lat1, lon1, lat2, lon2)
-                along_at_min = cum_dist[i] + t * seg_len
+    result = []
 
+    for k, min_perp, along_at_min in hits:
         if min_perp > max_dist:
             continue
 
+        obj        = active[k]
         obj_street = obj.get("street", "").lower()
 
         if street_set:
@@ -314,38 +648,36 @@ def find_objects_along_route(route_coords: list,
 
 # ── Street search ─────────────────────────────────────────────────────────────
 
+def _city_matchers(cities: list[str] | None) -> list:
+    """StreetMatchers of the given cities (default: Berkeley), skipping any that fail to load."""
+    import logging
+
+    matchers = []
+    for city in cities or [DEFAULT_CITY]:
+        try:
+            matchers.append(_street_matcher(city))
+        except Exception as exc:
+            logging.getLogger(__name__).warning("could not load streets for %s: %s", city, exc)
+    return matchers
+
+
 def find_streets_mentioned(question: str,
-                            route_streets: list | None = None) -> list[str]:
+                            route_streets: list | None = None,
+                            cities: list[str] | None = None) -> list[str]:
     """
-    Return canonical street names (from city_streets.json) that appear in the
-    question.  Includes streets that are on the route so that explicit user
-    questions always trigger a fresh lookup (deduplication happens upstream).
+    Return canonical street names (from the cities' streets files, default
+    Berkeley — see street_cities) that appear in the question.  Includes
+    streets that are on the route so that explicit user questions always
+    trigger a fresh lookup (deduplication happens upstream).
     Uses substring matching so "Ashby Avenue" matches stored name "Ashby Ave".
     """
-    try:
-        data = _load_streets()
-    except Exception as exc:
-        import logging
-        logging.getLogger(__name__).warning("find_streets_mentioned: could not load streets: %s", exc)
-        return []
-
-    q_lower = question.lower()
-    seen: dict[str, str] = {}   # lower-name → canonical name
-
-    for street in data.get("streets", []):
-        name = street.get("name", "").strip()
-        if not name or name.startswith("Unnamed_"):
-            continue
-        nl = name.lower()
-        if nl in seen:
-            continue
-        if nl in q_lower:
-            seen[nl] = name
-
-    return list(seen.values())
+    found: list[str] = []
+    for matcher in _city_matchers(cities):
+        found += [n for n in matcher.names_in(question) if n not in found]
+    return found
 
 
-def find_street_suggestions(question: str) -> dict[str, str]:
+def find_street_suggestions(question: str, cities: list[str] | None = None) -> dict[str, str]:
     """
     For street-like phrases in the question that don't match any known street,
     return {typed_phrase: closest_known_street} using fuzzy matching.
@@ -361,18 +693,16 @@ def find_street_suggestions(question: str) -> dict[str, str]:
         'terrace', 'ter', 'circle', 'cir', 'run', 'loop', 'path', 'trail', 'row',
     }
 
-    try:
-        data = _load_streets()
-    except Exception:
+    matchers = _city_matchers(cities)
+    if not matchers:
         return {}
 
-    known       = [s["name"] for s in data.get("streets", [])
-                   if not s["name"].startswith("Unnamed_")]
+    known = list(dict.fromkeys(n for m in matchers for n in m.names))
     known_lower = [k.lower() for k in known]
     q_lower     = question.lower()
 
     # Streets already matched exactly — no suggestion needed
-    exact_matched = {k.lower() for k in known if k.lower() in q_lower}
+    exact_matched = {k.lower() for m in matchers for k in m.names_in(question)}
 
     # Tokenise the question; for each suffix token, build 1-word and 2-word candidates
     words = re.findall(r"[\w']+", q_lower)
@@ -407,9 +737,11 @@ def find_street_suggestions(question: str) -> dict[str, str]:
     return {phrase: canonical for canonical, phrase in best.items()}
 
 
-def find_objects_on_street(street_name: str, objects: list[dict]) -> list[dict]:
+def find_objects_on_street(street_name: str, objects: list[dict] | EventStore) -> list[dict]:
     """Return currently-active objects whose street field matches street_name (case-insensitive)."""
     now = datetime.now(timezone.utc)
+    if _is_event_store(objects):
+        return objects.on_street(street_name, now)
     name_lower = street_name.lower()
     result = []
     for obj in objects:
@@ -428,13 +760,15 @@ def find_objects_on_street(street_name: str, objects: list[dict]) -> list[dict]:
 # ── Nearby search ────────────────────────────────────────────────────────────
 
 def find_nearby_objects(lat: float, lon: float,
-                        objects: list[dict],
+                        objects: list[dict] | EventStore,
                         radius_m: float = 500) -> list[dict]:
     """
     Return currently-active objects within radius_m metres, sorted by distance.
     Adds a '_distance_m' field to each result.
     """
     now    = datetime.now(timezone.utc)
+    if _is_event_store(objects):
+        return objects.nearby(lat, lon, radius_m, now)
     nearby = []
 
     for obj in objects:
@@ -18,7 +18,7 @@ import os
 
 import boto3
 
-from events import put_event
+from events import event_to_dynamo, put_events
 
 CITIES = [
     ("Berkeley",   "CA/Berkeley"),
@@ -48,24 +48,34 @@ def migrate(bucket: str, region: str, dry_run: bool):
             continue
 
         print(f"    {len(events)} events found")
-        written = 0
-        skipped = 0
-
+        valid, skipped = [], 0
         for ev in events:
-            # Ensure city field is present for the city-index GSI
-            if "city" not in ev:
-                ev["city"] = city
-
-            if dry_run:
-                written += 1
+            try:
+                # Ensure city field is present for the city-index GSI
+                if "city" not in ev:
+                    ev["city"] = city
+                if not event_to_dynamo(ev).get("street"):
+                    raise ValueError("no street")
+            except Exception as exc:
+                event_id = ev.get("id", ev.get("event_id", "?")) if isinstance(ev, dict) else "?"
+                print(f"    [warn] skipping event {event_id}: {exc}")
+                skipped += 1
                 continue
+            valid.append(ev)
 
+        if dry_run:
+            written = len(valid)
+        else:
             try:
-                put_event(ev)
-                written += 1
+                result   = put_events(valid, max_workers=8)
+                written  = result["written"]
+                skipped += len(result["failed"])
+                for event_id in result["failed"]:
+                    print(f"    [warn] could not write event {event_id}")
             except Exception as exc:
-                print(f"    [warn] could not write event {ev.get('event_id','?')}: {exc}")
-                skipped += 1
+                print(f"    [error] batch write failed: {exc}")
+                written  = 0
+                skipped += len(valid)
 
         total_written += written
         action = "would write" if dry_run else "wrote"
@@ -15,10 +15,13 @@ Berkeley center: Office of Undergraduate Admission, 103 Sproul Hall #5800.
 from __future__ import annotations
 
 import json
+import os
 import re
 from datetime import datetime, timezone
 
-from location import haversine_m, _streets_path, _load_streets
+from location import (haversine_m, street_cities, _city_matchers, _streets_snapshot,
+                      _street_index, _street_matcher)
+from street_matcher import street_stem
 
 # ── Berkeley center ───────────────────────────────────────────────────────────
 _CENTER_LAT = 37.8718   # Sproul Hall, UC Berkeley
@@ -49,29 +52,6 @@ _NUM_WORDS = {
     '1':   1, '2':   2, '3':   3,   '4':   4,  '5':   5,
 }
 
-# Abbreviation → full form (for normalising user input before street matching)
-_ABBREVS = {
-    r'\bave\.?\b':  'avenue',
-    r'\bst\.?\b':   'street',
-    r'\bblvd\.?\b': 'boulevard',
-    r'\bdr\.?\b':   'drive',
-    r'\brd\.?\b':   'road',
-    r'\bln\.?\b':   'lane',
-    r'\bct\.?\b':   'court',
-    r'\bpl\.?\b':   'place',
-    r'\bter\.?\b':  'terrace',
-    r'\bcir\.?\b':  'circle',
-    r'\bhwy\.?\b':  'highway',
-}
-
-def _expand_abbrevs(text: str) -> str:
-    """Expand common street abbreviations so they match stored street names."""
-    t = text.lower()
-    for pattern, full in _ABBREVS.items():
-        t = re.sub(pattern, full, t)
-    return t
-
-
 # ── Time of day ───────────────────────────────────────────────────────────────
 
 def _is_daytime() -> bool:
@@ -134,74 +114,48 @@ def _block_occupancy(p1: dict, p2: dict,
 
 # ── Intersection finder ───────────────────────────────────────────────────────
 
-def _find_intersection(name1: str, name2: str) -> tuple[float, float] | None:
+def _find_intersection(name1: str, name2: str,
+                       city: str | None = None) -> tuple[float, float] | None:
     """
-    Find where two named streets cross using city_streets.json.
-    Returns (lat, lon) midpoint of the closest point pair, or None if > 80 m apart.
+    Find where two named streets cross using the city's streets file.
+    Returns (lat, lon) of their shared node, else the midpoint of the closest
+    point pair, or None if > 80 m apart.
     """
     try:
-        data = _load_streets()
+        index = _street_index(city)
     except Exception:
         return None
 
-    def get_points(name: str) -> list[dict]:
-        pts: list[dict] = []
-        for s in data.get("streets", []):
-            if s.get("name", "").lower() == name.lower():
-                for seg in s.get("segments", []):
-                    pts.extend(seg)
-        return pts
-
-    pts1 = get_points(name1)
-    pts2 = get_points(name2)
-    if not pts1 or not pts2:
-        return None
+    node = index.intersection(name1, name2)
+    if node is not None:
+        return node
 
-    best_dist = float("inf")
-    best: tuple[float, float] | None = None
-    for p1 in pts1:
-        for p2 in pts2:
-            d = haversine_m(p1["lat"], p1["lon"], p2["lat"], p2["lon"])
-            if d < best_dist:
-                best_dist = d
-                best = ((p1["lat"] + p2["lat"]) / 2,
-                        (p1["lon"] + p2["lon"]) / 2)
-
-    return best if best_dist <= 80 else None
+    pair = index.closest_point_pair(name1, name2, max_m=80)
+    if pair is None:
+        return None
+    _, p1, p2 = pair
+    return ((p1["lat"] + p2["lat"]) / 2,
+            (p1["lon"] + p2["lon"]) / 2)
 
 
 # ── Question parsing ──────────────────────────────────────────────────────────
 
-_STREET_SUFFIXES = {
-    "avenue", "street", "boulevard", "drive", "road", "lane", "court",
-    "place", "terrace", "circle", "highway", "way", "trail", "alley",
-}
+_AND_GAP = re.compile(r"[\s,]+and[\s,]+")
 
+# Mention kinds that name the street in full — "abbrev" is the full name
+# written with abbreviated type words ("Shattuck Ave" for "Shattuck Avenue")
+_FULL_KINDS = ("full", "abbrev")
 
-def _street_stem(name: str) -> str:
-    """Return the street name lower-cased, with the trailing type word removed.
 
-    "Shattuck Avenue" → "shattuck"
-    "Telegraph Avenue" → "telegraph"
-    "University Avenue" → "university"
-    Names without a recognised suffix are returned lower-cased unchanged.
-    """
-    words = name.lower().split()
-    if len(words) > 1 and words[-1] in _STREET_SUFFIXES:
-        return " ".join(words[:-1])
-    return name.lower()
-
-
-def _name_matches_question(name: str, q_lower: str, q_expanded: str) -> bool:
-    """True if the full name OR its stem appears as a word in the question."""
-    full = name.lower()
-    if full in q_expanded or full in q_lower:
-        return True
-    stem = _street_stem(name)
-    if stem != full:
-        return bool(re.search(r"\b" + re.escape(stem) + r"\b", q_lower))
-    return False
+def _pair_forms(mentions: list, stems: bool) -> list:
+    """Full-name mentions of one street, or its stem mentions when stems=True.
 
+    A name without a type word ("Broadway") is its own stem.
+    """
+    name = mentions[0].name
+    if stems and street_stem(name) != name.lower():
+        return [m for m in mentions if m.kind == "stem"]
+    return [m for m in mentions if m.kind in _FULL_KINDS]
 
 def _parse_blocks(question: str) -> int:
     """Return the number of blocks mentioned in the question (default 2)."""
@@ -212,9 +166,11 @@ def _parse_blocks(question: str) -> int:
     return 2
 
 
-def extract_intersection_anchor(question: str) -> tuple[float, float, float] | None:
+def extract_intersection_anchor(question: str,
+                                cities: list[str] | None = None) -> tuple[float, float, float] | None:
     """
-    Detect a street intersection in the question.
+    Detect a street intersection in the question, trying each of cities
+    (default: Berkeley) in turn.
 
     Returns (lat, lon, radius_m) or None.
     Handles patterns like:
@@ -224,44 +180,64 @@ def extract_intersection_anchor(question: str) -> tuple[float, float, float] | N
     Bare names (e.g. "Shattuck") are matched against stored names that start
     with that stem (e.g. "Shattuck Avenue").
     """
+    for city in cities or [None]:
+        anchor = _city_intersection_anchor(question, city)
+        if anchor:
+            return anchor
+    return None
+
+
+def _city_intersection_anchor(question: str, city: str | None) -> tuple[float, float, float] | None:
+    """extract_intersection_anchor for one city's streets."""
     try:
-        data = _load_streets()
+        matcher = _street_matcher(city)
     except Exception:
         return None
 
-    known = [s["name"] for s in data.get("streets", [])
-             if not s["name"].startswith("Unnamed_")]
-
-    q_lower    = question.lower()
-    q_expanded = _expand_abbrevs(question)
-
-    mentioned = [name for name in known
-                 if _name_matches_question(name, q_lower, q_expanded)]
+    q_lower = question.lower()
+    found   = matcher.mentions(question)
+    by_name: dict[str, list] = {}
+    for m in found:
+        by_name.setdefault(m.name, []).append(m)
+    mentioned = matcher.names_in(question, kinds=_FULL_KINDS + ("stem",), mentions=found)
     if len(mentioned) < 2:
         return None
 
     radius_m = max(_parse_blocks(question) * _BLOCK_M, _DEFAULT_RADIUS_M)
 
     for i, s1 in enumerate(mentioned):
-        stem1 = _street_stem(s1)
         for s2 in mentioned[i + 1:]:
-            stem2 = _street_stem(s2)
-            for q_check in (q_lower, q_expanded):
-                # Try full names and stems for the "X and Y" pattern
-                candidates = [
-                    (re.escape(s1.lower()), re.escape(s2.lower())),
-                    (re.escape(stem1),      re.escape(stem2)),
-                ]
-                for a, b in candidates:
-                    if (re.search(a + r"[\s,]+and[\s,]+" + b, q_check) or
-                            re.search(b + r"[\s,]+and[\s,]+" + a, q_check)):
-                        coords = _find_intersection(s1, s2)
-                        if coords:
-                            return coords[0], coords[1], radius_m
+            # "X and Y" with both full names or both stems, in either order
+            for stems in (False, True):
+                m1s = _pair_forms(by_name[s1], stems)
+                m2s = _pair_forms(by_name[s2], stems)
+                if any(_AND_GAP.fullmatch(q_lower, a.end, b.start)
+                       for x, y in ((m1s, m2s), (m2s, m1s))
+                       for a in x for b in y if a.end < b.start):
+                    coords = _find_intersection(s1, s2, city)
+                    if coords:
+                        return coords[0], coords[1], radius_m
 
     return None
 
 
+# ── Block table ───────────────────────────────────────────────────────────────
+
+def _block_table(city: str | None = None):
+    """
+    Return the ParkingBlocks table for a city's currently cached streets
+    file.  It is kept on the streets snapshot, so it is rebuilt and evicted
+    together with the city's streets.
+    """
+    snapshot = _streets_snapshot(city)
+    if snapshot.get("parking") is None:
+        from parking_blocks import load_parking_blocks
+        path = snapshot["fingerprint"][0]
+        snapshot["parking"] = load_parking_blocks(snapshot["index"].streets,
+                                                  path if os.path.exists(path) else None)
+    return snapshot["parking"]
+
+
 # ── Parking search ────────────────────────────────────────────────────────────
 
 def parking_near(lat: float, lon: float,
@@ -279,38 +255,34 @@ def parking_near(lat: float, lon: float,
         }
         or None if no blocks found within radius.
     """
-    try:
-        data = _load_streets()
-    except Exception:
-        return None
-
     daytime = _is_daytime()
     seen: set[tuple] = set()
     blocks: list[dict] = []
 
-    for street in data.get("streets", []):
-        name    = street.get("name", "")
-        highway = street.get("highway", "")
-        if name.startswith("Unnamed_"):
+    # Rows come back in file order, so first-seen de-duplication and the
+    # stable sort below give the same result as a scan over every street.
+    # Near a city line the circle spans several cities' files; blocks that
+    # appear in more than one are kept once.
+    for city in street_cities(lat, lon, radius_m):
+        try:
+            table = _block_table(city)
+        except Exception:
             continue
-        for seg in street.get("segments", []):
-            if len(seg) < 2:
+        for row in table.rows_near(lat, lon, radius_m):
+            street = table.streets[table.street[row]]
+            name   = street.get("name", "")
+            if name.startswith("Unnamed_"):
                 continue
-            p1, p2 = seg[0], seg[-1]
-            mid_lat = (p1["lat"] + p2["lat"]) / 2
-            mid_lon = (p1["lon"] + p2["lon"]) / 2
-            if haversine_m(mid_lat, mid_lon, lat, lon) > radius_m:
-                continue
-            key = (name, round(p1["lat"], 5), round(p1["lon"], 5))
+            key = (name, table.key_lat[row], table.key_lon[row])
             if key in seen:
                 continue
             seen.add(key)
-            occ   = _block_occupancy(p1, p2, highway=highway, daytime=daytime)
-            stype = _street_type(highway)
+            highway = street.get("highway", "")
+            occ     = table.occupancy(row, daytime)
             blocks.append({
                 "street":      name,
                 "highway":     highway,
-                "street_type": stype,
+                "street_type": _street_type(highway),
                 "occupancy":   occ,
                 "chance":      100 - occ,
             })
@@ -334,27 +306,31 @@ def parking_near(lat: float, lon: float,
 
 # ── Single-street parking search ─────────────────────────────────────────────
 
-def parking_on_street(street_name: str) -> dict | None:
+def parking_on_street(street_name: str, cities: list[str] | None = None) -> dict | None:
     """
-    Find parking availability for every block on a single named street.
+    Find parking availability for every block on a single named street, in
+    the first of cities (default: Berkeley) that has it.
 
     Returns the same dict shape as parking_near() — with an extra
     'ask_cross_street': True flag so the AI knows to prompt the user
     for a cross street.  Returns None if the street is not found or is
     a motorway.
     """
+    for city in cities or [None]:
+        try:
+            index = _street_index(city)
+        except Exception:
+            continue
+        matches = index.by_name.get(street_name.strip().lower())
+        if matches:
+            break
+    else:
+        return None
     try:
-        data = _load_streets()
+        table = _block_table(city)
     except Exception:
         return None
-
-    target = next(
-        (s for s in data.get("streets", [])
-         if s.get("name", "").lower() == street_name.lower()),
-        None,
-    )
-    if not target:
-        return None
+    target = index.streets[matches[0]]
 
     daytime = _is_daytime()
     name    = target["name"]
@@ -366,15 +342,12 @@ def parking_on_street(street_name: str) -> dict | None:
 
     blocks: list[dict] = []
     seen: set = set()
-    for seg in target.get("segments", []):
-        if len(seg) < 2:
-            continue
-        p1, p2 = seg[0], seg[-1]
-        key = (round(p1["lat"], 5), round(p1["lon"], 5))
+    for row in table.rows_of_street(matches[0]):
+        key = (table.key_lat[row], table.key_lon[row])
         if key in seen:
             continue
         seen.add(key)
-        occ = _block_occupancy(p1, p2, highway=highway, daytime=daytime)
+        occ = table.occupancy(row, daytime)
         blocks.append({
             "street":      name,
             "highway":     highway,
@@ -413,10 +386,18 @@ def get_parking_context(question: str,
       3. Session destination
       4. Driver's current location
 
+    Street names are looked up in the cities around the destination and the
+    driver (see location.street_cities).
+
     If the question explicitly asks about blue curb / disabled parking,
     the result includes a "blue_curb" key with occupancy and chance.
     """
-    anchor = extract_intersection_anchor(question)
+    cities: list[str] = []
+    for lat, lon in ((dest_lat, dest_lon), (fallback_lat, fallback_lon)):
+        if lat is not None and lon is not None:
+            cities += [c for c in street_cities(float(lat), float(lon)) if c not in cities]
+
+    anchor = extract_intersection_anchor(question, cities or None)
     if anchor:
         lat, lon, radius_m = anchor
         result = parking_near(lat, lon, radius_m)
@@ -430,17 +411,13 @@ def get_parking_context(question: str,
 
     # Single named street without a cross street
     try:
-        streets_data = _load_streets()
-        known = [s["name"] for s in streets_data.get("streets", [])
-                 if not s["name"].startswith("Unnamed_")]
-        q_lower    = question.lower()
-        q_expanded = _expand_abbrevs(question)
         # Full-name match only — avoids stem over-matching
         # (e.g. "Shattuck Place" would otherwise match "shattuck avenue" via stem)
-        single = [n for n in known
-                  if n.lower() in q_lower or n.lower() in q_expanded]
+        single: list[str] = []
+        for matcher in _city_matchers(cities or None):
+            single += [n for n in matcher.names_in(question, kinds=_FULL_KINDS) if n not in single]
         if len(single) == 1:
-            result = parking_on_street(single[0])
+            result = parking_on_street(single[0], cities or None)
             if result:
                 _maybe_add_blue_curb(question, result)
                 return result
@@ -0,0 +1,208 @@
+"""
+Precomputed curb parking block table for parking.py.
+
+Occupancy depends only on a block's end points, its highway class and the
+day/night flag, so it is computed once per streets-file load instead of on
+every parking question.  One row per block (a city_streets.json segment with
+at least two points), in file order:
+
+  street      int32    index into StreetIndex.streets
+  mid_lat/lon float64  midpoint of the block's first and last point
+  key_lat/lon float64  first point rounded to 5 decimals (de-duplication key)
+  occ_day     int8     _block_occupancy(daytime=True)
+  occ_night   int8     _block_occupancy(daytime=False)
+
+Midpoints are bucketed in a uniform grid, so parking_near is a radius query
+over a few cells plus a sort, and parking_on_street reads one contiguous row
+range.
+
+The table can be saved next to city_streets.json (city_streets.parking.npz,
+keyed by a hash of the streets file) so cold starts load it instead of
+rebuilding; `python parking_blocks.py` writes it before a deploy.  Saving and
+loading need NumPy — without it the table is just rebuilt in memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:   # table is rebuilt on every load instead of persisted
+    np = None
+
+log = logging.getLogger(__name__)
+
+_FORMAT     = 1
+_CELL_DEG   = 0.002                          # same grid size as street_index
+_M_PER_DEG  = 6_371_000 * math.pi / 180
+_QUERY_PAD  = 1.01                           # pad query boxes so no midpoint is missed
+_COLUMNS    = ("street", "mid_lat", "mid_lon", "key_lat", "key_lon", "occ_day", "occ_night")
+_TYPECODES  = {"street": "i", "occ_day": "b", "occ_night": "b"}   # others are "d"
+
+
+def table_path(streets_path: str) -> str:
+    """Path of the persisted table for a streets file."""
+    return os.path.splitext(streets_path)[0] + ".parking.npz"
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ParkingBlocks:
+    """Column arrays of every block, with a midpoint grid and per-street row ranges."""
+
+    def __init__(self, streets: list[dict], columns: dict[str, array] | None = None):
+        self.streets = streets
+        if columns is None:
+            columns = self._build(streets)
+        for name in _COLUMNS:
+            setattr(self, name, columns[name])
+
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        self._rows_of: dict[int, range] = {}
+        for row in range(len(self.street)):
+            self._grid.setdefault(self._cell(self.mid_lat[row], self.mid_lon[row]), []).append(row)
+            si = self.street[row]
+            first = self._rows_of.get(si)
+            self._rows_of[si] = range(first.start if first else row, row + 1)
+
+    @staticmethod
+    def _build(streets: list[dict]) -> dict[str, array]:
+        from parking import _block_occupancy
+
+        cols = {name: array(_TYPECODES.get(name, "d")) for name in _COLUMNS}
+        for si, street in enumerate(streets):
+            highway = street.get("highway", "")
+            for seg in street.get("segments", []):
+                if len(seg) < 2:
+                    continue
+                p1, p2 = seg[0], seg[-1]
+                cols["street"].append(si)
+                cols["mid_lat"].append((p1["lat"] + p2["lat"]) / 2)
+                cols["mid_lon"].append((p1["lon"] + p2["lon"]) / 2)
+                cols["key_lat"].append(round(p1["lat"], 5))
+                cols["key_lon"].append(round(p1["lon"], 5))
+                cols["occ_day"].append(_block_occupancy(p1, p2, highway=highway, daytime=True))
+                cols["occ_night"].append(_block_occupancy(p1, p2, highway=highway, daytime=False))
+        return cols
+
+    def __len__(self) -> int:
+        return len(self.street)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / _CELL_DEG), math.floor(lon / _CELL_DEG)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def rows_near(self, lat: float, lon: float, radius_m: float) -> list[int]:
+        """Rows whose midpoint lies within radius_m of (lat, lon), in file order."""
+        from location import haversine_m
+
+        dlat = radius_m / _M_PER_DEG * _QUERY_PAD
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        r0, c0 = self._cell(lat - dlat, lon - dlon)
+        r1, c1 = self._cell(lat + dlat, lon + dlon)
+
+        cand: list[int] = []
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                cand.extend(self._grid.get((r, c), ()))
+        cand.sort()
+        return [row for row in cand
+                if haversine_m(self.mid_lat[row], self.mid_lon[row], lat, lon) <= radius_m]
+
+    def rows_of_street(self, street_idx: int) -> range:
+        """Rows of one street record, in segment order."""
+        return self._rows_of.get(street_idx, range(0))
+
+    def occupancy(self, row: int, daytime: bool) -> int:
+        return self.occ_day[row] if daytime else self.occ_night[row]
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path: str, source_hash: str) -> None:
+        """Write the columns to an .npz file tagged with the streets-file hash."""
+        if np is None:
+            raise RuntimeError("NumPy is required to save the parking block table")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, format=np.int32(_FORMAT), source=np.str_(source_hash),
+                     **{name: np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+                        for name in _COLUMNS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, streets: list[dict], source_hash: str) -> ParkingBlocks | None:
+        """Load a saved table, or None if it is missing, stale or unreadable."""
+        if np is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["format"]) != _FORMAT or str(z["source"]) != source_hash:
+                    return None
+                columns = {name: array(_TYPECODES.get(name, "d"), z[name].tobytes())
+                           for name in _COLUMNS}
+        except Exception as exc:
+            log.warning("parking table %s unreadable: %s", path, exc)
+            return None
+        if columns["street"] and max(columns["street"]) >= len(streets):
+            return None
+        return cls(streets, columns)
+
+
+def load_parking_blocks(streets: list[dict], streets_path: str | None = None) -> ParkingBlocks:
+    """
+    Return the block table for a streets file: the saved copy when its hash
+    matches, otherwise a fresh build (saved next to the streets file, or in
+    /tmp when that directory is read-only, e.g. the Lambda package).
+    """
+    if streets_path is None or np is None:
+        return ParkingBlocks(streets)
+
+    source = _file_hash(streets_path)
+    tmp_path = os.path.join("/tmp", os.path.basename(table_path(streets_path)))
+    for path in (table_path(streets_path), tmp_path):
+        table = ParkingBlocks.load(path, streets, source)
+        if table is not None:
+            return table
+
+    table = ParkingBlocks(streets)
+    for path in (table_path(streets_path), tmp_path):
+        try:
+            table.save(path, source)
+            break
+        except OSError:
+            continue
+    return table
+
+
+def main():
+    import argparse
+
+    from street_binary import preferred_path, read_streets
+
+    parser = argparse.ArgumentParser(description="Precompute the parking block table for a streets file.")
+    parser.add_argument("streets", nargs="?", default="city_streets.json",
+                        help="Streets file (default: city_streets.json, or its .bin when present)")
+    args = parser.parse_args()
+
+    # Key the table on the file the app will actually load
+    path  = preferred_path(args.streets)
+    table = ParkingBlocks(read_streets(path).get("streets", []))
+    out   = table_path(path)
+    table.save(out, _file_hash(path))
+    print(f"Saved {out}  ({len(table)} blocks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Ride-assignment optimizer for fleet schedules.
+
+Given a day's rides (pickup → dropoff) and a number of vans that all start
+and end at the base, choose which van does which rides, and in what order,
+to minimise total dead-head time: base → first pickup, each dropoff → the
+next pickup, and last dropoff → base.  Ride legs themselves are fixed.
+
+  1. Cheapest insertion builds a plan: repeatedly insert the unassigned ride
+     whose best (van, position) adds the least dead-head.
+  2. Local search improves it until no move helps or the time budget runs
+     out: relocate one ride to its best position in any van with room, or
+     swap two rides between positions (same or different vans).
+
+Durations come from a callable (schedule.DurationMatrix.duration_sec), read
+once into a dense table; the rest is pure Python, so it runs in the
+simulation Lambda.  100 rides × 10 vans converge in well under a second.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+BASE = -1          # route position before the first / after the last ride
+_EPS = 1e-6        # ignore improvements smaller than this (float noise)
+
+
+class _Costs:
+    """Dead-head seconds between rides and the base, indexed by ride number."""
+
+    def __init__(self, rides, duration, base):
+        n = len(rides)
+        self.start = [duration(base[0], base[1], p[0], p[1]) for p, _ in rides]
+        self.end   = [duration(d[0], d[1], base[0], base[1]) for _, d in rides]
+        self.link  = [[0.0 if i == j else duration(rides[i][1][0], rides[i][1][1],
+                                                   rides[j][0][0], rides[j][0][1])
+                       for j in range(n)] for i in range(n)]
+
+    def __call__(self, a: int, b: int) -> float:
+        """Dead-head from after ride a (or the base) to the pickup of ride b (or the base)."""
+        if a == BASE:
+            return 0.0 if b == BASE else self.start[b]
+        return self.end[a] if b == BASE else self.link[a][b]
+
+    def route(self, route: list) -> float:
+        total, prev = 0.0, BASE
+        for r in route:
+            total += self(prev, r)
+            prev = r
+        return total + self(prev, BASE)
+
+    def best_insertion(self, route: list, r: int) -> tuple[float, int]:
+        """(added dead-head, position) of the cheapest place for ride r in route."""
+        best, best_pos, prev = math.inf, 0, BASE
+        for pos in range(len(route) + 1):
+            nxt   = route[pos] if pos < len(route) else BASE
+            delta = self(prev, r) + self(r, nxt) - self(prev, nxt)
+            if delta < best - _EPS:
+                best, best_pos = delta, pos
+            prev = nxt
+        return best, best_pos
+
+
+def _neighbours(route: list, i: int) -> tuple[int, int]:
+    return (route[i - 1] if i > 0 else BASE,
+            route[i + 1] if i + 1 < len(route) else BASE)
+
+
+def _cheapest_insertion(c: _Costs, n: int, n_vans: int, cap: int) -> list[list[int]]:
+    routes = [[] for _ in range(n_vans)]
+    unassigned = set(range(n))
+    # best[v][r] = (added dead-head, position) of ride r in van v's current route
+    best = [{r: c.best_insertion([], r) for r in range(n)} for _ in range(n_vans)]
+    while unassigned:
+        cost, v, r = min((best[v][r][0], v, r) for v in range(n_vans) if len(routes[v]) < cap
+                         for r in unassigned)
+        routes[v].insert(best[v][r][1], r)
+        unassigned.discard(r)
+        best[v] = {u: c.best_insertion(routes[v], u) for u in unassigned}
+    return routes
+
+
+def _relocate(c: _Costs, routes: list, cap: int) -> bool:
+    """Apply the first relocation that lowers dead-head; False if there is none."""
+    for a, src in enumerate(routes):
+        for i, r in enumerate(src):
+            prev, nxt = _neighbours(src, i)
+            gain = c(prev, r) + c(r, nxt) - c(prev, nxt)
+            for b, dst in enumerate(routes):
+                if b != a and len(dst) >= cap:
+                    continue
+                target = src[:i] + src[i + 1:] if b == a else dst
+                added, pos = c.best_insertion(target, r)
+                if added - gain < -_EPS:
+                    del src[i]
+                    routes[b].insert(pos, r)
+                    return True
+    return False
+
+
+def _swap(c: _Costs, routes: list) -> bool:
+    """Apply the first exchange of two rides that lowers dead-head; False if there is none."""
+    for a, ra in enumerate(routes):
+        for i, x in enumerate(ra):
+            pa, na = _neighbours(ra, i)
+            for b in range(a, len(routes)):
+                rb = routes[b]
+                for j in range(i + 1 if b == a else 0, len(rb)):
+                    y = rb[j]
+                    if b == a:
+                        swapped = ra[:]
+                        swapped[i], swapped[j] = y, x
+                        delta = c.route(swapped) - c.route(ra)
+                    else:
+                        pb, nb = _neighbours(rb, j)
+                        delta = (c(pa, y) + c(y, na) - c(pa, x) - c(x, na)
+                                 + c(pb, x) + c(x, nb) - c(pb, y) - c(y, nb))
+                    if delta < -_EPS:
+                        ra[i], rb[j] = y, x
+                        return True
+    return False
+
+
+def optimize_rides(rides: list, n_vans: int, duration, base: tuple,
+                   max_rides: int | None = None, time_budget_s: float = 1.0,
+                   baseline: list | None = None) -> dict:
+    """
+    Assign rides [((pickup lat, lon), (dropoff lat, lon)), ...] to n_vans vans
+    of at most max_rides rides each (default: an even share), minimising
+    dead-head time.  duration(lat1, lon1, lat2, lon2) returns seconds.
+
+    Returns {"routes": [[ride index, ...] per van], "dead_head_min",
+    "moves", "elapsed_s", "converged"}, plus "baseline_dead_head_min" and
+    "saved_min" when baseline routes (the unoptimized plan) are given.
+    """
+    t0  = time.perf_counter()
+    n   = len(rides)
+    cap = max_rides or max(1, math.ceil(n / max(1, n_vans)))
+    if cap * n_vans < n:
+        raise ValueError(f"{n} rides do not fit {n_vans} vans of {cap}")
+
+    c      = _Costs(rides, duration, base)
+    routes = _cheapest_insertion(c, n, n_vans, cap)
+
+    deadline  = t0 + time_budget_s
+    moves     = 0
+    converged = False
+    while time.perf_counter() < deadline:
+        if _relocate(c, routes, cap) or _swap(c, routes):
+            moves += 1
+        else:
+            converged = True
+            break
+
+    result = {
+        "routes":        routes,
+        "dead_head_min": round(sum(c.route(r) for r in routes) / 60, 1),
+        "moves":         moves,
+        "elapsed_s":     round(time.perf_counter() - t0, 3),
+        "converged":     converged,
+    }
+    if baseline is not None:
+        result["baseline_dead_head_min"] = round(sum(c.route(r) for r in baseline) / 60, 1)
+        result["saved_min"] = round(result["baseline_dead_head_min"] - result["dead_head_min"], 1)
+    return result
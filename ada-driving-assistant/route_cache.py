@@ -0,0 +1,85 @@
+"""
+In-process LRU cache of compiled route polylines.
+
+A session stores its OSRM polyline once (route_coords_json), but every
+/api/ask on that session needs the same cumulative distances, segment
+vectors and segment grid.  get_compiled_route() parses and compiles the
+polyline on the first question and hands back the cached CompiledRoute for
+every follow-up, keyed by (session_id, route hash) so a changed route is
+never served stale.
+
+Size is capped by ROUTE_CACHE_SIZE (default 128 routes); least recently used
+entries are evicted first.  Hit/miss counters are exposed via stats() and
+/api/stats.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+_MAX_ENTRIES = int(os.environ.get("ROUTE_CACHE_SIZE", "128"))
+
+_cache: OrderedDict = OrderedDict()   # (session_id, route_hash) → CompiledRoute
+_lock  = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def route_hash(route_json: str) -> str:
+    """Stable short hash of a stored route_coords_json string."""
+    return hashlib.sha1(route_json.encode()).hexdigest()[:16]
+
+
+def get_compiled_route(session_id: str, route_json: str):
+    """Return the CompiledRoute for a session's route, compiling it on a miss."""
+    from location import compile_route
+
+    key = (session_id, route_hash(route_json))
+    with _lock:
+        route = _cache.get(key)
+        if route is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return route
+        _stats["misses"] += 1
+
+    route = compile_route(json.loads(route_json))
+
+    with _lock:
+        # A session drives one route at a time — drop any older compilation
+        for stale in [k for k in _cache if k[0] == session_id and k != key]:
+            del _cache[stale]
+        _cache[key] = route
+        _cache.move_to_end(key)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+    return route
+
+
+def invalidate(session_id: str) -> None:
+    """Forget every cached route for a session."""
+    with _lock:
+        for key in [k for k in _cache if k[0] == session_id]:
+            del _cache[key]
+
+
+def stats() -> dict:
+    """Return hit/miss/eviction counters plus current and maximum size."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {**_stats,
+                "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+                "size":     len(_cache),
+                "max_size": _MAX_ENTRIES}
+
+
+def clear() -> None:
+    """Empty the cache and reset the counters."""
+    with _lock:
+        _cache.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -6,12 +6,15 @@ Each item stores 10 rides with pre-computed OSRM durations so the browser can
 interpolate van positions from wall-clock time without hitting routing APIs.
 """
 
-import json, math, os, random, time, logging
+import json, math, os, random, threading, time, logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from decimal import Decimal
 import boto3
 import requests
 
+import dynamo_batch
+
 logger = logging.getLogger(__name__)
 
 # ── Constants ─────────────────────────────────────────────────────────────────
@@ -22,8 +25,14 @@ NUM_VANS      = 10
 RIDES_PER_VAN = 10
 DAY_START_MIN = 5 * 60          # 5:00 AM local (PT) in minutes since midnight
 MAX_JITTER_MIN = 60             # max window between rides
-OSRM_URL      = "http://router.project-osrm.org/route/v1/driving"
-OSRM_SLEEP    = 0.12            # seconds between OSRM calls (rate-limit)
+OSRM_HOST     = os.environ.get("OSRM_HOST", "http://router.project-osrm.org").rstrip("/")
+OSRM_URL      = f"{OSRM_HOST}/route/v1/driving"
+OSRM_TABLE_URL = f"{OSRM_HOST}/table/v1/driving"
+OSRM_TABLE_MAX = int(os.environ.get("OSRM_TABLE_MAX", "100"))   # coordinates per /table request
+OSRM_TABLE_WORKERS = int(os.environ.get("OSRM_TABLE_WORKERS", "4"))   # concurrent /table requests
+OPTIMIZER_BUDGET_S = float(os.environ.get("OPTIMIZER_BUDGET_S", "2.0"))   # ride optimizer local search
+OSRM_PROFILE  = "driving"
+TRAVEL_TIME_TTL_S = int(os.environ.get("TRAVEL_TIME_TTL_S", str(14 * 86400)))
 
 # ── DynamoDB helpers ──────────────────────────────────────────────────────────
 _tbl = None
@@ -54,51 +63,287 @@ def _fallback_sec(lat1, lon1, lat2, lon2):
     return km / 32.0 * 3600   # ~20 mph / 32 km/h urban estimate
 
 def osrm_duration_sec(from_lat, from_lon, to_lat, to_lon) -> float:
-    """Return OSRM driving duration in seconds, with straight-line fallback."""
+    """Return OSRM driving duration in seconds (travel-time cache first), with straight-line fallback."""
+    p, q = _point(from_lat, from_lon), _point(to_lat, to_lon)
+    cached = _cached_durations([(p, q)])
+    if cached:
+        return cached[(p, q)]
     try:
         url = (f"{OSRM_URL}/{from_lon:.6f},{from_lat:.6f};"
                f"{to_lon:.6f},{to_lat:.6f}?overview=false")
         r = requests.get(url, timeout=8)
         data = r.json()
         if data.get("code") == "Ok":
-            return float(data["routes"][0]["duration"])
+            sec = float(data["routes"][0]["duration"])
+            _cache_durations({(p, q): sec})
+            return sec
     except Exception as exc:
         logger.warning("OSRM error: %s — using straight-line fallback", exc)
     return _fallback_sec(from_lat, from_lon, to_lat, to_lon)
 
-# ── Geocoding ──────────────────────────────────────────────────────────────────
-def geocode(address: str):
-    """Return (lat, lon) via Nominatim, or (None, None) on failure."""
+# ── Travel-time cache ─────────────────────────────────────────────────────────
+# OSRM durations of schedule legs (the consecutive stops a van drives, and
+# single osrm_duration_sec lookups) are kept in the fleet table, one item
+# per leg keyed by profile and origin/destination as rounded by _point(),
+# for TRAVEL_TIME_TTL_S ("expires_at", the table's TTL attribute).  Only
+# legs are stored, never the pairwise matrices behind them, so a day's fleet
+# costs a few hundred items.  Straight-line fallbacks are never stored.
+# Cache reads and writes are best effort: a DynamoDB error only costs OSRM
+# requests.
+_COORD_DECIMALS = 6     # ~0.1 m
+_travel_lock  = threading.Lock()
+_travel_stats = {"hits": 0, "misses": 0, "stored": 0}
+
+def _point(lat, lon):
+    return (round(float(lat), _COORD_DECIMALS), round(float(lon), _COORD_DECIMALS))
+
+def _travel_key(p, q, profile=OSRM_PROFILE) -> str:
+    d = _COORD_DECIMALS
+    return f"travel#{profile}#{p[0]:.{d}f},{p[1]:.{d}f};{q[0]:.{d}f},{q[1]:.{d}f}"
+
+def _cached_durations(pairs) -> dict:
+    """{(p, q): seconds} for the point pairs found in the travel-time cache."""
+    keys = {_travel_key(p, q): (p, q) for p, q in pairs}
     try:
-        r = requests.get(
-            "https://nominatim.openstreetmap.org/search",
-            params={"q": address, "format": "json", "limit": 1},
-            headers={"User-Agent": "ADA-Driving-Assistant/3.0"},
-            timeout=8,
-        )
-        hits = r.json()
-        if hits:
-            return float(hits[0]["lat"]), float(hits[0]["lon"])
+        items = _batch_get(list(keys))
     except Exception as exc:
-        logger.warning("Geocode failed for %r: %s", address, exc)
+        logger.warning("Travel-time cache read failed: %s", exc)
+        items = {}
+    now   = time.time()
+    found = {k: item["sec"] for k, item in items.items() if int(item.get("expires_at", 0)) > now}
+    with _travel_lock:
+        _travel_stats["hits"]   += len(found)
+        _travel_stats["misses"] += len(keys) - len(found)
+    return {keys[k]: float(sec) for k, sec in found.items()}
+
+def _cache_durations(durations: dict) -> None:
+    expires = int(time.time()) + TRAVEL_TIME_TTL_S
+    items   = [{"config_key": _travel_key(p, q), "sec": Decimal(str(round(sec, 1))), "expires_at": expires}
+               for (p, q), sec in durations.items()]
+    try:
+        failed = len(dynamo_batch.write_items(_table(), items, max_workers=OSRM_TABLE_WORKERS))
+    except Exception as exc:
+        logger.warning("Travel-time cache write failed: %s", exc)
+        failed = len(items)
+    with _travel_lock:
+        _travel_stats["stored"] += len(items) - failed
+
+def travel_time_stats() -> dict:
+    """Travel-time cache counters and hit rate."""
+    with _travel_lock:
+        stats = dict(_travel_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+    stats["ttl_s"]    = TRAVEL_TIME_TTL_S
+    return stats
+
+# ── OSRM duration matrix ──────────────────────────────────────────────────────
+class DurationMatrix:
+    """
+    Driving durations between known points, fetched with OSRM's /table service.
+
+    prefetch() takes groups of points whose pairwise durations are needed (one
+    van's base, pickups and dropoffs) and packs them into /table requests of at
+    most OSRM_TABLE_MAX coordinates, so a whole day's fleet costs a handful of
+    requests instead of one /route call per leg.  When the caller names each
+    group's legs, a group whose every leg is in the travel-time cache is not
+    requested at all, and the newly fetched legs (not the whole matrix) are
+    stored.  Cells OSRM could not provide
+    (request failed, unroutable point) fall back to the straight-line estimate.
+    use_osrm=False skips the network entirely.
+    """
+
+    def __init__(self, use_osrm: bool = True):
+        self.use_osrm = use_osrm
+        self._sec     = {}          # (from point, to point) -> seconds
+        self._lock    = threading.Lock()
+        self.requests = 0
+        self.fallback_cells = 0
+
+    def prefetch(self, groups, legs=None):
+        """
+        Fetch durations between every pair of points within each group (lists
+        of (lat, lon)); up to OSRM_TABLE_WORKERS requests run concurrently.
+        legs, if given, holds each group's legs (see route_legs) for the
+        travel-time cache; without it the cache is not used.
+        """
+        if not self.use_osrm:
+            return
+        wanted = [[leg for leg in ((_point(*a), _point(*b)) for a, b in group_legs) if leg[0] != leg[1]]
+                  for group_legs in legs or []]
+        cached = _cached_durations({leg for group_legs in wanted for leg in group_legs}) if wanted else {}
+        self._sec.update(cached)
+
+        jobs  = []                  # (sources, destinations) per /table request
+        batch = {}                  # insertion-ordered set of points
+        for i, group in enumerate(groups):
+            if wanted and all(leg in cached for leg in wanted[i]):
+                continue
+            points = list(dict.fromkeys(_point(lat, lon) for lat, lon in group))
+            if len(points) > OSRM_TABLE_MAX:
+                jobs.extend(self._blocks(points))
+                continue
+            if len(set(batch) | set(points)) > OSRM_TABLE_MAX:
+                jobs.append((list(batch), list(batch)))
+                batch = {}
+            batch.update(dict.fromkeys(points))
+        if batch:
+            jobs.append((list(batch), list(batch)))
+
+        if len(jobs) > 1 and OSRM_TABLE_WORKERS > 1:
+            with ThreadPoolExecutor(max_workers=min(OSRM_TABLE_WORKERS, len(jobs))) as pool:
+                list(pool.map(lambda job: self._fetch(*job), jobs))
+        else:
+            for job in jobs:
+                self._fetch(*job)
+
+        fetched = {leg: self._sec[leg] for group_legs in wanted for leg in group_legs
+                   if leg not in cached and leg in self._sec}
+        if fetched:
+            _cache_durations(fetched)
+
+    @staticmethod
+    def _blocks(points):
+        """Source × destination blocks covering all pairs of a group too large for one request."""
+        half = max(1, OSRM_TABLE_MAX // 2)
+        blocks = [points[i:i + half] for i in range(0, len(points), half)]
+        return [(src, dst) for src in blocks for dst in blocks]
+
+    def _fetch(self, sources, destinations):
+        points = list(dict.fromkeys(sources + destinations))
+        if len(points) < 2:
+            return
+        index  = {p: i for i, p in enumerate(points)}
+        coords = ";".join(f"{lon:.6f},{lat:.6f}" for lat, lon in points)
+        params = {"annotations": "duration",
+                  "sources":      ";".join(str(index[p]) for p in sources),
+                  "destinations": ";".join(str(index[p]) for p in destinations)}
+        with self._lock:
+            self.requests += 1
+        try:
+            r = requests.get(f"{OSRM_TABLE_URL}/{coords}", params=params, timeout=15)
+            data = r.json()
+            if data.get("code") != "Ok":
+                raise ValueError(data.get("message") or data.get("code"))
+            rows = data["durations"]
+        except Exception as exc:
+            logger.warning("OSRM table error: %s — using straight-line fallback for %d cells",
+                           exc, len(sources) * len(destinations))
+            return
+        fetched = {(p, q): float(sec)
+                   for p, row in zip(sources, rows)
+                   for q, sec in zip(destinations, row) if sec is not None}
+        with self._lock:
+            self._sec.update(fetched)
+
+    def duration_sec(self, from_lat, from_lon, to_lat, to_lon) -> float:
+        """Fetched duration, or the straight-line estimate for a missing cell."""
+        p, q = _point(from_lat, from_lon), _point(to_lat, to_lon)
+        sec  = 0.0 if p == q else self._sec.get((p, q))
+        if sec is None:
+            if self.use_osrm:
+                self.fallback_cells += 1
+            return _fallback_sec(from_lat, from_lon, to_lat, to_lon)
+        return sec
+
+# ── Geocoding ──────────────────────────────────────────────────────────────────
+def geocode(address: str):
+    """Return (lat, lon) via the cached Nominatim layer (geocoding.py), or (None, None) on failure."""
+    import geocoding
+    hit = geocoding.search(address)
+    if hit:
+        return hit["lat"], hit["lon"]
     return None, None
 
 # ── Schedule generation ───────────────────────────────────────────────────────
+def _sample_stops(pool: list) -> list:
+    return random.sample(pool, min(RIDES_PER_VAN * 2, len(pool)))
+
+def _stop_points(sample: list) -> list:
+    return [(BASE_LAT, BASE_LON)] + [(e["lat"], e["lon"]) for e in sample]
+
+def route_legs(points: list) -> list:
+    """Legs a van drives through points (base first) and back to base: [(from, to), ...]."""
+    return list(zip(points, points[1:] + points[:1]))
+
 def generate_van_schedule(v_id: str, date_str: str, pool: list, use_osrm: bool = False) -> dict:
     """
     Build a 10-ride schedule for one van.
     pool: list of dicts with {address, lat, lon}.
-    use_osrm=True calls OSRM for accurate timing (slow, for daily Lambda).
+    use_osrm=True times the legs with OSRM (one /table request).
     use_osrm=False uses straight-line fallback (fast, for on-demand API).
     """
-    def _dur_sec(lat1, lon1, lat2, lon2):
-        if use_osrm:
-            sec = osrm_duration_sec(lat1, lon1, lat2, lon2)
-            time.sleep(OSRM_SLEEP)
-            return sec
-        return _fallback_sec(lat1, lon1, lat2, lon2)
+    sample    = _sample_stops(pool)
+    durations = DurationMatrix(use_osrm)
+    points    = _stop_points(sample)
+    durations.prefetch([points], [route_legs(points)])
+    return _build_van_schedule(v_id, date_str, sample, durations)
 
-    sample = random.sample(pool, min(RIDES_PER_VAN * 2, len(pool)))
+def generate_fleet_schedules(v_ids: list, date_str: str, pool: list, use_osrm: bool = True) -> list:
+    """
+    Build schedules for several vans, timing every leg of the day from one
+    DurationMatrix (a few /table requests for the whole fleet).
+    """
+    samples   = [_sample_stops(pool) for _ in v_ids]
+    durations = DurationMatrix(use_osrm)
+    groups    = [_stop_points(s) for s in samples]
+    durations.prefetch(groups, [route_legs(g) for g in groups])
+    scheds = [_build_van_schedule(v_id, date_str, s, durations) for v_id, s in zip(v_ids, samples)]
+    logger.info("Timed %d vans with %d OSRM table requests (%d fallback legs)",
+                len(v_ids), durations.requests, durations.fallback_cells)
+    return scheds
+
+def optimize_fleet_schedules(v_ids: list, date_str: str, pool: list, use_osrm: bool = True,
+                             time_budget_s: float = OPTIMIZER_BUDGET_S) -> tuple:
+    """
+    Like generate_fleet_schedules, but pools every van's sampled rides and
+    reassigns them across the vans with ride_optimizer to minimise dead-head
+    time, over one duration matrix of all the day's points.
+    Returns (schedules, report) — report has dead_head_min, the random plan's
+    baseline_dead_head_min, saved_min, moves, elapsed_s and converged.
+    """
+    from ride_optimizer import optimize_rides
+
+    samples = [_sample_stops(pool) for _ in v_ids]
+    rides, baseline = [], []
+    for sample in samples:
+        baseline.append(list(range(len(rides), len(rides) + len(sample) // 2)))
+        rides += [(sample[i], sample[i + 1]) for i in range(0, len(sample) - 1, 2)]
+
+    durations = DurationMatrix(use_osrm)
+    durations.prefetch([[(BASE_LAT, BASE_LON)] + [(e["lat"], e["lon"]) for ride in rides for e in ride]])
+    result = optimize_rides([((p["lat"], p["lon"]), (d["lat"], d["lon"])) for p, d in rides],
+                            len(v_ids), durations.duration_sec, (BASE_LAT, BASE_LON),
+                            time_budget_s=time_budget_s, baseline=baseline)
+    scheds = [_build_van_schedule(v_id, date_str, [e for r in route for e in rides[r]], durations)
+              for v_id, route in zip(v_ids, result.pop("routes"))]
+    logger.info("Optimized %d rides over %d vans: dead-head %.1f min (random plan %.1f, %d moves, %.2fs)",
+                len(rides), len(v_ids), result["dead_head_min"], result["baseline_dead_head_min"],
+                result["moves"], result["elapsed_s"])
+    return scheds, result
+
+def generate_and_save_fleet(v_ids: list, date_str: str, pool: list, use_osrm: bool = True,
+                            optimize: bool = False, time_budget_s: float = OPTIMIZER_BUDGET_S) -> dict:
+    """
+    Generate every listed van's schedule (OSRM tables fetched concurrently)
+    and write them all with BatchWriteItem.  optimize=True assigns the rides
+    with optimize_fleet_schedules and adds its report as "optimizer".
+    Returns {"generated": [van_id, ...], "errors": [{"van_id", "error"}, ...]}.
+    """
+    report = None
+    if optimize:
+        scheds, report = optimize_fleet_schedules(v_ids, date_str, pool, use_osrm, time_budget_s)
+    else:
+        scheds = generate_fleet_schedules(v_ids, date_str, pool, use_osrm)
+    failed = save_schedules(scheds)
+    result = {"generated": [v for v in v_ids if v not in failed],
+              "errors":    [{"van_id": v, "error": failed[v]} for v in v_ids if v in failed]}
+    if report is not None:
+        result["optimizer"] = report
+    return result
+
+def _build_van_schedule(v_id: str, date_str: str, sample: list, durations: DurationMatrix) -> dict:
+    _dur_sec = durations.duration_sec
     rides  = []
     cur_lat, cur_lon = BASE_LAT, BASE_LON
     cur_time_min     = float(DAY_START_MIN)   # first pickup at 05:00
@@ -167,8 +412,8 @@ def _fmt(minutes: float) -> str:
 # ── Recompute timing after user edits ─────────────────────────────────────────
 def recompute_schedule_timing(sched: dict) -> dict:
     """
-    Re-run OSRM for each ride in the edited schedule and update
-    depart_min / pickup_min / dropoff_min / dh_sec / ride_sec.
+    Re-time each ride in the edited schedule with OSRM (one /table request)
+    and update depart_min / pickup_min / dropoff_min / dh_sec / ride_sec.
     start_time for ride 1 is fixed at 05:00; subsequent rides keep their
     user-set start_time if it's achievable, otherwise advance to earliest.
     """
@@ -177,12 +422,15 @@ def recompute_schedule_timing(sched: dict) -> dict:
     cur_lon   = BASE_LON
     cur_time  = float(DAY_START_MIN)
 
+    points    = [(BASE_LAT, BASE_LON)] + [(r[k + "_lat"], r[k + "_lon"]) for r in rides for k in ("from", "to")]
+    durations = DurationMatrix()
+    durations.prefetch([points], [route_legs(points)])
+
     for i, r in enumerate(rides):
         from_lat, from_lon = r["from_lat"], r["from_lon"]
         to_lat,   to_lon   = r["to_lat"],   r["to_lon"]
 
-        dh_sec = osrm_duration_sec(cur_lat, cur_lon, from_lat, from_lon)
-        time.sleep(OSRM_SLEEP)
+        dh_sec = durations.duration_sec(cur_lat, cur_lon, from_lat, from_lon)
         dh_min = dh_sec / 60.0
 
         if i == 0:
@@ -196,8 +444,7 @@ def recompute_schedule_timing(sched: dict) -> dict:
             pickup_min  = max(earliest, user_min) if user_min is not None else earliest
             depart_min  = cur_time
 
-        ride_sec = osrm_duration_sec(from_lat, from_lon, to_lat, to_lon)
-        time.sleep(OSRM_SLEEP)
+        ride_sec = durations.duration_sec(from_lat, from_lon, to_lat, to_lon)
         dropoff_min = pickup_min + ride_sec / 60.0
 
         r.update({
@@ -214,8 +461,7 @@ def recompute_schedule_timing(sched: dict) -> dict:
         cur_lat, cur_lon = to_lat, to_lon
         cur_time         = dropoff_min
 
-    rtb_sec = osrm_duration_sec(cur_lat, cur_lon, BASE_LAT, BASE_LON)
-    time.sleep(OSRM_SLEEP)
+    rtb_sec = durations.duration_sec(cur_lat, cur_lon, BASE_LAT, BASE_LON)
 
     sched.update({
         "rtb_from_lat": round(cur_lat, 6),
@@ -232,8 +478,8 @@ def _parse_hhmm(s: str):
         return None
 
 # ── DynamoDB CRUD ──────────────────────────────────────────────────────────────
-def save_schedule(sched: dict):
-    item = _dynamo_encode({
+def _schedule_item(sched: dict) -> dict:
+    return _dynamo_encode({
         "config_key":   _sched_key(sched["van_id"], sched["date"]),
         "van_id":       sched["van_id"],
         "date":         sched["date"],
@@ -243,16 +489,52 @@ def save_schedule(sched: dict):
         "rtb_from_lon": sched["rtb_from_lon"],
         "rtb_sec":      sched["rtb_sec"],
     })
-    _table().put_item(Item=item)
+
+def save_schedule(sched: dict):
+    _table().put_item(Item=_schedule_item(sched))
+
+def save_schedules(scheds: list) -> dict:
+    """
+    Write several schedules with BatchWriteItem (25 per request, see
+    dynamo_batch).  Returns {van_id: error} for the schedules left unwritten.
+    """
+    unwritten = dynamo_batch.write_items(_table(), [_schedule_item(s) for s in scheds])
+    return {item["van_id"]: reason for item, reason in unwritten}
 
 def get_schedule(v_id: str, date_str: str):
     resp = _table().get_item(Key={"config_key": _sched_key(v_id, date_str)})
     item = resp.get("Item")
     return _dynamo_decode(item) if item else None
 
+def _batch_get(keys: list) -> dict:
+    """{config_key: item} for the keys present in the fleet table, via BatchGetItem."""
+    table  = _table()
+    client = table.meta.client
+    found  = {}
+    size   = dynamo_batch.BATCH_GET_SIZE
+    for i in range(0, len(keys), size):
+        pending = {table.name: {"Keys": [{"config_key": k} for k in keys[i:i + size]]}}
+        for attempt in range(dynamo_batch.BATCH_RETRIES):
+            if attempt:
+                dynamo_batch.backoff(attempt)
+            resp = client.batch_get_item(RequestItems=pending)
+            for item in resp.get("Responses", {}).get(table.name, []):
+                found[item["config_key"]] = item
+            pending = resp.get("UnprocessedKeys") or {}
+            if not pending:
+                break
+        else:
+            raise RuntimeError(f"BatchGetItem left {len(pending[table.name]['Keys'])} keys unread")
+    return found
+
+def get_schedules(v_ids: list, date_str: str) -> list:
+    """The given vans' schedules for a day, in v_ids order, via BatchGetItem (missing vans skipped)."""
+    keys  = [_sched_key(v, date_str) for v in v_ids]
+    found = _batch_get(keys)
+    return [_dynamo_decode(found[k]) for k in keys if k in found]
+
 def get_all_schedules(date_str: str) -> list:
-    nums = get_active_vans()
-    return [s for s in (get_schedule(van_id(i), date_str) for i in nums) if s]
+    return get_schedules([van_id(i) for i in get_active_vans()], date_str)
 
 def schedules_exist(date_str: str) -> bool:
     nums = get_active_vans()
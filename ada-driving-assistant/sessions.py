@@ -1,20 +1,36 @@
 """
 Session management for ADA Driving Assistant.
 Backend: DynamoDB when SESSIONS_TABLE env var is set; local JSON file otherwise.
+
+Conversation history is bounded: the session keeps its last turns verbatim,
+and older turns are moved to an archive (S3 object, or a local JSON file)
+and rolled into a short running summary on the session.  See "History window".
 """
 
 from __future__ import annotations
 
 import json
+import logging
 import os
+import re
 import uuid
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 MAX_SESSIONS   = 12
 _TABLE_NAME    = os.environ.get("SESSIONS_TABLE")
 _SESSIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.json")
 _TTL_DAYS      = 30
 
+HISTORY_TURNS        = int(os.environ.get("HISTORY_TURNS", "6"))           # turns a compaction keeps verbatim
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "2000"))  # summary + verbatim turns
+_COMPACT_EVERY       = 4      # archive once this many turns beyond HISTORY_TURNS have piled up
+_SUMMARY_MAX_CHARS   = 1200
+_S3_BUCKET           = os.environ.get("S3_BUCKET")
+_ARCHIVE_PREFIX      = "session-archive"
+_ARCHIVE_DIR         = os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_archive")
+
 
 # ── Backend selector ──────────────────────────────────────────────────────────
 
@@ -128,10 +144,11 @@ def get_session(session_id: str) -> dict | None:
 
 
 def add_message(session_id: str, role: str, content: str) -> bool:
+    """Append a message; after an assistant reply, archive old turns if due."""
     now = datetime.now(timezone.utc).isoformat()
     if _use_dynamo():
         try:
-            _table().update_item(
+            resp = _table().update_item(
                 Key={"id": session_id},
                 UpdateExpression=(
                     "SET messages = list_append(messages, :msg), "
@@ -141,10 +158,13 @@ def add_message(session_id: str, role: str, content: str) -> bool:
                     ":msg": [{"role": role, "content": content, "timestamp": now}],
                     ":ts":  now,
                 },
+                ReturnValues="ALL_NEW",
             )
-            return True
         except Exception:
             return False
+        if role == "assistant":
+            _compact_quietly(_dynamo_to_session(resp.get("Attributes") or {}))
+        return True
     else:
         sessions = _load()
         for s in sessions:
@@ -152,6 +172,8 @@ def add_message(session_id: str, role: str, content: str) -> bool:
                 s["messages"].append({"role": role, "content": content, "timestamp": now})
                 s["last_active_at"] = now
                 _save(sessions)
+                if role == "assistant":
+                    _compact_quietly(s)
                 return True
         return False
 
@@ -221,11 +243,174 @@ def find_session(address: str, bearing: int) -> dict | None:
 
 
 def get_history(session_id: str, session: dict | None = None) -> list[dict]:
+    """Messages to send to Claude: see history_window()."""
+    return history_window(session_id, session)["messages"]
+
+
+# ── History window ────────────────────────────────────────────────────────────
+#
+# A turn is a user message plus the replies that follow it, numbered from 1
+# over the whole session.  Every turn still stored on the session is sent
+# verbatim, from the oldest one not yet archived, so each question's history
+# starts with the previous question's history and the prompt cache holds.
+# The window only moves at a compaction: once _COMPACT_EVERY turns beyond
+# HISTORY_TURNS have built up, or the stored history outgrows
+# HISTORY_TOKEN_BUDGET, the oldest turns are written to the archive and
+# their gist appended to session["summary"].  Compaction keeps at most
+# HISTORY_TURNS turns within half the budget, leaving room to grow.
+
+def _tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _turns(messages: list[dict]) -> list[list[int]]:
+    """Group message indices into turns, each starting at a user message."""
+    turns: list[list[int]] = []
+    for i, m in enumerate(messages):
+        if m.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(i)
+    return turns
+
+
+def _summary_prefix(summary: str) -> str:
+    return f"[Earlier in this drive]\n{summary}\n\n" if summary else ""
+
+
+def history_window(session_id: str, session: dict | None = None) -> dict:
+    """
+    The history to send with the next question: the running summary, then
+    every stored turn verbatim.  The summary is prefixed to the first user
+    message so roles keep alternating.
+
+    Returns {"messages": [{role, content}], "turns": [turn numbers included],
+    "total_turns", "summarized_turns", "summary_included", "tokens",
+    "token_budget"}.
+    """
     s = session if session is not None else get_session(session_id)
+    window = {"messages": [], "turns": [], "total_turns": 0, "summarized_turns": 0,
+              "summary_included": False, "tokens": 0, "token_budget": HISTORY_TOKEN_BUDGET}
     if not s:
-        return []
-    return [{"role": m["role"], "content": m["content"]}
-            for m in s.get("messages", [])]
+        return window
+
+    messages = s.get("messages", [])
+    archived = int(s.get("archived_turns", 0))
+    n_turns  = len(_turns(messages))
+    out      = [{"role": m["role"], "content": m["content"]} for m in messages]
+    prefix   = _summary_prefix(s.get("summary", ""))
+    if prefix and out and out[0]["role"] == "user":
+        out[0] = {"role": "user", "content": prefix + out[0]["content"]}
+        window["summary_included"] = True
+    window.update(messages=out, turns=list(range(archived + 1, archived + n_turns + 1)),
+                  total_turns=archived + n_turns, summarized_turns=archived,
+                  tokens=sum(_tokens(m["content"]) for m in out))
+    return window
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _summarize(summary: str, messages: list[dict]) -> str:
+    """Roll messages into the running summary: one line per turn, oldest lines dropped past the cap."""
+    lines = summary.splitlines() if summary else []
+    for turn in _turns(messages):
+        question = next((messages[i]["content"] for i in turn if messages[i]["role"] == "user"), "")
+        reply    = next((messages[i]["content"] for i in turn if messages[i]["role"] == "assistant"), "")
+        first    = re.split(r"(?<=[.!?])\s", " ".join(reply.split()), maxsplit=1)[0]
+        lines.append(f"- Q: {_clip(question, 100)} A: {_clip(first, 140)}")
+    while len(lines) > 1 and sum(len(l) + 1 for l in lines) > _SUMMARY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _archive_put(session_id: str, first_turn: int, messages: list[dict]) -> str:
+    """Store archived messages; returns the S3 key or local path."""
+    body = json.dumps({"session_id": session_id, "first_turn": first_turn, "messages": messages})
+    key  = f"{_ARCHIVE_PREFIX}/{session_id}/{first_turn:05d}.json"
+    if _use_dynamo() and _S3_BUCKET:
+        import boto3
+        boto3.client("s3").put_object(Bucket=_S3_BUCKET, Key=key, Body=body.encode(),
+                                      ContentType="application/json")
+        return f"s3://{_S3_BUCKET}/{key}"
+    path = os.path.join(_ARCHIVE_DIR, session_id, f"{first_turn:05d}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(body)
+    return path
+
+
+def _turns_to_archive(session: dict) -> int:
+    """How many of the oldest stored turns a compaction should archive (0: not due)."""
+    messages = session.get("messages", [])
+    turns    = _turns(messages)
+    costs    = [sum(_tokens(messages[i]["content"]) for i in t) for t in turns]
+    used     = _tokens(_summary_prefix(session.get("summary", "")))
+    if len(turns) - HISTORY_TURNS < _COMPACT_EVERY and used + sum(costs) <= HISTORY_TOKEN_BUDGET:
+        return 0
+    keep = 0
+    for cost in reversed(costs):
+        if keep >= HISTORY_TURNS or (keep and used + cost > HISTORY_TOKEN_BUDGET // 2):
+            break
+        keep += 1
+        used += cost
+    return len(turns) - keep
+
+
+def compact_history(session: dict) -> bool:
+    """Archive and summarise the oldest turns once the window is over its turn or token limit."""
+    messages = session.get("messages", [])
+    turns    = _turns(messages)
+    excess   = _turns_to_archive(session)
+    if not excess:
+        return False
+
+    n_msgs   = turns[excess - 1][-1] + 1
+    moved    = messages[:n_msgs]
+    archived = int(session.get("archived_turns", 0))
+    location = _archive_put(session["id"], archived + 1, moved)
+    summary  = _summarize(session.get("summary", ""), moved)
+
+    if _use_dynamo():
+        from botocore.exceptions import ClientError
+        # REMOVE by index leaves messages appended meanwhile in place; the
+        # condition makes a concurrent compaction of the same turns a no-op.
+        try:
+            _table().update_item(
+                Key={"id": session["id"]},
+                UpdateExpression=(
+                    "REMOVE " + ", ".join(f"messages[{i}]" for i in range(n_msgs))
+                    + " SET summary = :s, archived_turns = :n, "
+                    "archive_keys = list_append(if_not_exists(archive_keys, :none), :key)"
+                ),
+                ConditionExpression="attribute_not_exists(archived_turns) OR archived_turns = :prev",
+                ExpressionAttributeValues={":s": summary, ":n": archived + excess, ":prev": archived,
+                                           ":none": [], ":key": [location]},
+            )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            return False
+    else:
+        sessions = _load()
+        for s in sessions:
+            if s["id"] == session["id"]:
+                s["messages"]       = s["messages"][n_msgs:]
+                s["summary"]        = summary
+                s["archived_turns"] = archived + excess
+                s["archive_keys"]   = s.get("archive_keys", []) + [location]
+                _save(sessions)
+    return True
+
+
+def _compact_quietly(session: dict) -> None:
+    """compact_history() for the add_message path: a failure only delays archiving."""
+    try:
+        compact_history(session)
+    except Exception as exc:
+        logger.warning("History compaction failed for %s: %s", session.get("id"), exc)
 
 
 # ── DynamoDB housekeeping ─────────────────────────────────────────────────────
@@ -13,6 +13,7 @@ import os
 import random
 from datetime import datetime, timedelta, timezone
 
+import local_geocoder
 from objects import (
     LIFESPANS, OBJECT_TYPES,
     CAR_TYPES, CAR_COLORS, BLOCKING_OPTIONS, POLICE_DIR_OPTIONS,
@@ -147,7 +148,8 @@ def _build_event(obj_type: str, lat: float, lon: float,
 # ── Public API ───────────────────────────────────────────────────────────────
 
 def generate_events(n: int = 300, day: datetime | None = None,
-                    streets: list[dict] | None = None) -> list[dict]:
+                    streets: list[dict] | None = None,
+                    addresses: bool = True) -> list[dict]:
     """
     Generate N random events for a single day.
 
@@ -155,6 +157,7 @@ def generate_events(n: int = 300, day: datetime | None = None,
         n:       Number of events to generate.
         day:     The target day (defaults to today UTC).
         streets: Pre-loaded street list; if None, loads from city_streets.json.
+        addresses: Give each event an offline "address" (local_geocoder.py).
 
     Returns:
         List of event dicts ready for JSON serialisation.
@@ -180,6 +183,8 @@ def generate_events(n: int = 300, day: datetime | None = None,
         event["street"]          = street["name"]
         event["lanes_forward"]   = street.get("lanes_forward", 1)
         event["lanes_backward"]  = street.get("lanes_backward", 1)
+        if addresses:
+            event["address"] = local_geocoder.describe(lat, lon, street["name"]) or street["name"]
 
         events.append(event)
 
@@ -0,0 +1,281 @@
+"""
+Compact binary form of city_streets.json, loaded with mmap.
+
+Layout (little-endian):
+
+  b"ADASTRB1"            magic
+  uint64                 header length
+  header                 UTF-8 JSON: top-level keys other than "streets"
+                         (city, state, bbox, ...), interned name and
+                         highway tables, and an
+                         {array: [dtype, offset, count]} directory
+  arrays                 8-byte aligned, offsets from the start of the file
+
+  lat, lon          <f8  every waypoint, street by street, segment by segment
+  seg_offsets       <i4  segment s covers points seg_offsets[s]:seg_offsets[s+1]
+  street_offsets    <i4  street i covers segments street_offsets[i]:street_offsets[i+1]
+  name_id           <i4  index into header["names"]
+  highway_id        <i4  index into header["highways"]
+  lanes_forward     <i2  -1 where the JSON has no value
+  lanes_backward    <i2
+
+StreetArrays maps the file read-only and exposes each array as a zero-copy
+NumPy view (memoryview without NumPy), so nothing is parsed up front.
+to_dict() returns the city_streets.json structure for code that walks street
+dicts, but each segment is a PointList — a slice of the mapped coordinate
+arrays that builds {"lat", "lon"} dicts only for the points actually read.
+A loaded city costs one small object per segment instead of a dict and two
+floats per waypoint.
+
+Convert existing files with:
+    py street_binary.py city_streets.json [city_streets_Oakland.json ...]
+fetch_streets.py writes the .bin alongside the JSON it produces.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+try:
+    import numpy as np
+except ImportError:   # arrays are exposed as memoryviews instead
+    np = None
+
+MAGIC    = b"ADASTRB1"
+_VERSION = 1
+_ALIGN   = 8
+_DTYPES  = {
+    "lat": "<f8", "lon": "<f8",
+    "seg_offsets": "<i4", "street_offsets": "<i4",
+    "name_id": "<i4", "highway_id": "<i4",
+    "lanes_forward": "<i2", "lanes_backward": "<i2",
+}
+_TYPECODES = {"<f8": "d", "<i4": "i", "<i2": "h"}
+
+
+def bin_path(json_path: str) -> str:
+    """Path of the binary file that goes with a streets JSON file."""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+def write_streets_bin(data: dict, path: str) -> None:
+    """Write a city_streets.json dict to path in the binary format."""
+    cols = {name: array(_TYPECODES[dtype]) for name, dtype in _DTYPES.items()}
+    names:    dict[str, int] = {}
+    highways: dict[str, int] = {}
+    cols["seg_offsets"].append(0)
+    cols["street_offsets"].append(0)
+
+    for street in data.get("streets", []):
+        segments = street.get("segments")
+        if segments is None:   # pre-"segments" files: one flat waypoint list
+            segments = [street["waypoints"]] if "waypoints" in street else []
+        for seg in segments:
+            for p in seg:
+                cols["lat"].append(p["lat"])
+                cols["lon"].append(p["lon"])
+            cols["seg_offsets"].append(len(cols["lat"]))
+        cols["street_offsets"].append(len(cols["seg_offsets"]) - 1)
+        cols["name_id"].append(names.setdefault(street.get("name", ""), len(names)))
+        cols["highway_id"].append(highways.setdefault(street.get("highway", ""), len(highways)))
+        for key in ("lanes_forward", "lanes_backward"):
+            value = street.get(key)
+            cols[key].append(-1 if value is None else int(value))
+
+    if sys.byteorder != "little":
+        for col in cols.values():
+            col.byteswap()
+
+    directory: dict[str, list] = {}
+    header = {"version": _VERSION,
+              "meta":     {k: v for k, v in data.items() if k != "streets"},
+              "names":    list(names),
+              "highways": list(highways),
+              "arrays":   directory}
+
+    # Array offsets depend on the header length and vice versa — repeat the
+    # layout until the header stops growing (two passes in practice).
+    body_start = 0
+    while True:
+        offset = body_start
+        for name, dtype in _DTYPES.items():
+            directory[name] = [dtype, offset, len(cols[name])]
+            offset += -(-len(cols[name]) * cols[name].itemsize // _ALIGN) * _ALIGN
+        raw = json.dumps(header, separators=(",", ":")).encode()
+        start = -(-(len(MAGIC) + 8 + len(raw)) // _ALIGN) * _ALIGN
+        if start == body_start:
+            break
+        body_start = start
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        for name in _DTYPES:
+            _, offset, _ = directory[name]
+            f.write(b"\0" * (offset - f.tell()))
+            cols[name].tofile(f)
+    os.replace(tmp, path)
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+class PointList(Sequence):
+    """One segment's waypoints as {"lat", "lon"} dicts, read from the mapped arrays."""
+
+    __slots__ = ("_lat", "_lon", "_start", "_stop")
+
+    def __init__(self, lat: memoryview, lon: memoryview, start: int, stop: int):
+        self._lat, self._lon = lat, lon
+        self._start, self._stop = start, stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        idx = range(self._start, self._stop)[i]
+        if isinstance(i, slice):
+            return [{"lat": self._lat[k], "lon": self._lon[k]} for k in idx]
+        return {"lat": self._lat[idx], "lon": self._lon[idx]}
+
+    def __iter__(self):
+        for la, lo in self.coords():
+            yield {"lat": la, "lon": lo}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PointList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PointList({list(self)!r})"
+
+    def coords(self) -> list[tuple[float, float]]:
+        """(lat, lon) tuples without building point dicts."""
+        a, b = self._start, self._stop
+        return list(zip(self._lat[a:b].tolist(), self._lon[a:b].tolist()))
+
+    def bbox(self) -> tuple[float, float, float, float]:
+        """(south, west, north, east) of the segment."""
+        lats = self._lat[self._start:self._stop]
+        lons = self._lon[self._start:self._stop]
+        return min(lats), min(lons), max(lats), max(lons)
+
+
+class StreetArrays:
+    """Read-only, memory-mapped view of a binary streets file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a binary streets file")
+        (hlen,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        header = json.loads(self._mm[len(MAGIC) + 8:len(MAGIC) + 8 + hlen])
+        if header.get("version") != _VERSION:
+            raise ValueError(f"{path}: unsupported version {header.get('version')}")
+
+        self.meta: dict = header["meta"]
+        self.names:    list[str] = header["names"]
+        self.highways: list[str] = header["highways"]
+        for name in _DTYPES:
+            setattr(self, name, self._view(*header["arrays"][name]))
+
+        # Scalar reads (PointList) go through memoryviews: indexing one gives
+        # a plain float, where a NumPy array would give a numpy.float64.
+        if sys.byteorder != "little":
+            raise RuntimeError("binary streets files can only be read on little-endian hosts")
+        self._lat_mv = self._memoryview(*header["arrays"]["lat"])
+        self._lon_mv = self._memoryview(*header["arrays"]["lon"])
+
+    def _memoryview(self, dtype: str, offset: int, count: int) -> memoryview:
+        size = array(_TYPECODES[dtype]).itemsize
+        return memoryview(self._mm)[offset:offset + count * size].cast(_TYPECODES[dtype])
+
+    def _view(self, dtype: str, offset: int, count: int):
+        if np is not None:
+            return np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset)
+        return self._memoryview(dtype, offset, count)
+
+    def __len__(self) -> int:
+        return len(self.name_id)
+
+    def to_dict(self) -> dict:
+        """
+        The city_streets.json structure, with each segment a PointList over
+        this mapping.  The mapping stays open for as long as any of them is
+        referenced.
+        """
+        lat, lon   = self._lat_mv, self._lon_mv
+        seg_off    = self.seg_offsets.tolist()
+        street_off = self.street_offsets.tolist()
+        fwd, bwd   = self.lanes_forward.tolist(), self.lanes_backward.tolist()
+        highway_id = self.highway_id.tolist()
+
+        streets = []
+        for i, nid in enumerate(self.name_id.tolist()):
+            segments = []
+            for s in range(street_off[i], street_off[i + 1]):
+                segments.append(PointList(lat, lon, seg_off[s], seg_off[s + 1]))
+            street = {"name": self.names[nid], "highway": self.highways[highway_id[i]]}
+            if fwd[i] >= 0:
+                street["lanes_forward"] = fwd[i]
+            if bwd[i] >= 0:
+                street["lanes_backward"] = bwd[i]
+            street["segments"] = segments
+            streets.append(street)
+        return {**self.meta, "streets": streets}
+
+
+def load_streets_bin(path: str) -> dict:
+    """Map a binary streets file and return its city_streets.json structure."""
+    return StreetArrays(path).to_dict()
+
+
+def read_streets(path: str) -> dict:
+    """Load a streets file in either format, going by its extension."""
+    if path.endswith(".bin"):
+        return load_streets_bin(path)
+    with open(path) as f:
+        return json.load(f)
+
+
+def preferred_path(json_path: str) -> str:
+    """The .bin next to json_path when it exists and is not older, else json_path."""
+    binary = bin_path(json_path)
+    if os.path.exists(binary) and (not os.path.exists(json_path) or
+                                   os.path.getmtime(binary) >= os.path.getmtime(json_path)):
+        return binary
+    return json_path
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert city_streets JSON files to the binary format.")
+    parser.add_argument("files", nargs="*", default=["city_streets.json"],
+                        help="Streets JSON files (default: city_streets.json)")
+    args = parser.parse_args()
+
+    for src in args.files:
+        with open(src) as f:
+            data = json.load(f)
+        out = bin_path(src)
+        write_streets_bin(data, out)
+        kb_in, kb_out = os.path.getsize(src) // 1024, os.path.getsize(out) // 1024
+        print(f"Saved {out}  ({kb_out} KB from {kb_in} KB, {len(data.get('streets', []))} streets)")
+
+
+if __name__ == "__main__":
+    main()
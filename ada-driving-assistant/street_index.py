@@ -0,0 +1,268 @@
+"""
+Uniform-grid spatial index over city_streets.json segments.
+
+Built once per streets-file load (see location._load_streets) and shared by
+every street lookup on the /api/ask path, so radius, nearest-segment and
+street-pair queries only touch the few grid cells around the query point
+instead of walking every segment of every street.
+
+Each OSM way ("segment" in city_streets.json) is stored once with its
+bounding box and registered in every grid cell that box overlaps.  Query
+results are always returned in file order (street, then segment) so callers
+that de-duplicate on first occurrence behave exactly like a linear scan.
+"""
+
+from __future__ import annotations
+
+import math
+
+from location import _point_to_segment_dist_m, haversine_m
+
+_CELL_DEG     = 0.002        # ≈ 222 m N-S, ≈ 175 m E-W at Bay Area latitudes
+_M_PER_DEG    = 6_371_000 * math.pi / 180   # metres per degree of latitude
+_QUERY_MARGIN = 1.01         # pad query boxes so the candidate set is a strict superset
+
+
+class StreetIndex:
+    """Grid index of street segments plus name lookups for one streets file."""
+
+    def __init__(self, data: dict, cell_deg: float = _CELL_DEG):
+        self.cell_deg = cell_deg
+        self.streets: list[dict] = data.get("streets", [])
+
+        self._segments: list[tuple[int, int]] = []                    # sid → (street idx, seg idx)
+        self._bboxes:   list[tuple[float, float, float, float]] = []  # sid → (s, w, n, e)
+        self._grid:     dict[tuple[int, int], list[int]] = {}         # cell → [sid, ...]
+        self._points_cache: dict[str, list[dict]] = {}
+        self._intersections: dict[tuple[str, str], tuple[float, float]] | None = None
+
+        self.by_name: dict[str, list[int]] = {}   # lower-case name → street indices
+        self.named:   list[str] = []              # canonical named streets, file order, unique
+        self.usable_named: list[int] = []         # named streets with ≥ 1 segment of ≥ 2 points
+
+        for si, street in enumerate(self.streets):
+            name = street.get("name", "").strip()
+            nl   = name.lower()
+            self.by_name.setdefault(nl, []).append(si)
+            is_named = bool(name) and not name.startswith("Unnamed_")
+            if is_named and len(self.by_name[nl]) == 1:
+                self.named.append(name)
+
+            segments = street.get("segments") or [street.get("waypoints", [])]
+            if is_named and any(len(seg) >= 2 for seg in segments):
+                self.usable_named.append(si)
+
+            for gi, seg in enumerate(street.get("segments", [])):
+                if not seg:
+                    continue
+                bbox = _seg_bbox(seg)
+                sid  = len(self._segments)
+                self._segments.append((si, gi))
+                self._bboxes.append(bbox)
+                for cell in self._cells_for_box(*bbox):
+                    self._grid.setdefault(cell, []).append(sid)
+
+    # ── Grid helpers ──────────────────────────────────────────────────────────
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _cells_for_box(self, s: float, w: float, n: float, e: float):
+        r0, c0 = self._cell(s, w)
+        r1, c1 = self._cell(n, e)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                yield r, c
+
+    def _cell_m(self, lat: float) -> float:
+        """Shortest side of a grid cell in metres at the given latitude."""
+        return self.cell_deg * _M_PER_DEG * math.cos(math.radians(lat))
+
+    # ── Segment queries ───────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def segment(self, sid: int) -> tuple[dict, list[dict]]:
+        """Return (street, waypoint list) for a segment id."""
+        si, gi = self._segments[sid]
+        street = self.streets[si]
+        return street, street["segments"][gi]
+
+    def segments_in_radius(self, lat: float, lon: float, radius_m: float) -> list[int]:
+        """
+        Return ids of segments whose bounding box comes within radius_m of
+        (lat, lon), in file order.  A superset of the segments that actually
+        have a point within radius_m — callers apply their own exact test.
+        """
+        dlat = radius_m / _M_PER_DEG * _QUERY_MARGIN
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        s, w, n, e = lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+        found: set[int] = set()
+        for cell in self._cells_for_box(s, w, n, e):
+            for sid in self._grid.get(cell, ()):
+                if sid in found:
+                    continue
+                bs, bw, bn, be = self._bboxes[sid]
+                if bn < s or bs > n or be < w or bw > e:
+                    continue
+                found.add(sid)
+        return sorted(found)
+
+    def nearest_segment(self, lat: float, lon: float,
+                        max_m: float = 200) -> tuple[dict, list[dict], float] | None:
+        """
+        Return (street, segment, distance_m) for the segment closest to
+        (lat, lon), or None if nothing lies within max_m.
+
+        Searches outward ring by ring and stops as soon as the best hit is
+        closer than anything an unvisited ring could contain.
+        """
+        r0, c0   = self._cell(lat, lon)
+        cell_m   = self._cell_m(lat)
+        max_ring = max(1, math.ceil(max_m / cell_m) + 1)
+
+        best_sid  = -1
+        best_dist = float("inf")
+        seen: set[int] = set()
+
+        for ring in range(max_ring + 1):
+            for r in range(r0 - ring, r0 + ring + 1):
+                for c in range(c0 - ring, c0 + ring + 1):
+                    if ring and abs(r - r0) != ring and abs(c - c0) != ring:
+                        continue   # interior cells were visited by earlier rings
+                    for sid in self._grid.get((r, c), ()):
+                        if sid in seen:
+                            continue
+                        seen.add(sid)
+                        d = _dist_to_polyline_m(lat, lon, self.segment(sid)[1])
+                        # Ties go to the earlier segment in file order
+                        if d < best_dist or (d == best_dist and sid < best_sid):
+                            best_dist, best_sid = d, sid
+            if best_sid >= 0 and best_dist <= ring * cell_m:
+                break
+
+        if best_sid < 0 or best_dist > max_m:
+            return None
+        street, seg = self.segment(best_sid)
+        return street, seg, best_dist
+
+    # ── Name queries ──────────────────────────────────────────────────────────
+
+    def streets_named(self, name: str) -> list[dict]:
+        """Return every street record whose name matches (case-insensitive)."""
+        return [self.streets[i] for i in self.by_name.get(name.strip().lower(), [])]
+
+    def street_points(self, name: str) -> list[dict]:
+        """All waypoints of the named street(s), in file order (cached)."""
+        key = name.strip().lower()
+        pts = self._points_cache.get(key)
+        if pts is None:
+            pts = []
+            for street in self.streets_named(key):
+                for seg in street.get("segments", []):
+                    pts.extend(seg)
+            self._points_cache[key] = pts
+        return pts
+
+    def closest_point_pair(self, name1: str, name2: str,
+                           max_m: float) -> tuple[float, dict, dict] | None:
+        """
+        Return (distance_m, p1, p2) for the closest waypoint pair between two
+        named streets, or None if no pair lies within max_m.
+
+        Equivalent to the brute-force all-pairs search (same pair wins on
+        ties) but only compares points that share or neighbour a grid cell.
+        """
+        pts1 = self.street_points(name1)
+        pts2 = self.street_points(name2)
+        if not pts1 or not pts2:
+            return None
+
+        buckets: dict[tuple[int, int], list[int]] = {}
+        for j, p in enumerate(pts2):
+            buckets.setdefault(self._cell(p["lat"], p["lon"]), []).append(j)
+
+        best_dist = float("inf")
+        best: tuple[dict, dict] | None = None
+        for p1 in pts1:
+            reach = max(1, math.ceil(max_m / self._cell_m(p1["lat"])))
+            r0, c0 = self._cell(p1["lat"], p1["lon"])
+            cand: list[int] = []
+            for r in range(r0 - reach, r0 + reach + 1):
+                for c in range(c0 - reach, c0 + reach + 1):
+                    cand.extend(buckets.get((r, c), ()))
+            for j in sorted(cand):
+                p2 = pts2[j]
+                d  = haversine_m(p1["lat"], p1["lon"], p2["lat"], p2["lon"])
+                if d < best_dist:
+                    best_dist = d
+                    best = (p1, p2)
+
+        if best is None or best_dist > max_m:
+            return None
+        return best_dist, best[0], best[1]
+
+    def intersection(self, name1: str, name2: str) -> tuple[float, float] | None:
+        """
+        Return (lat, lon) of the node two named streets share, or None.
+
+        Where they share several, this is the first one along name1's points —
+        the zero-distance pair closest_point_pair would pick.  Built on first
+        use from exact shared OSM node coordinates; streets that only come
+        close without sharing a node are left to closest_point_pair.
+        """
+        if self._intersections is None:
+            self._intersections = self._build_intersections()
+        return self._intersections.get((name1.strip().lower(), name2.strip().lower()))
+
+    def _build_intersections(self) -> dict[tuple[str, str], tuple[float, float]]:
+        """Map every ordered (name, other name) pair sharing a node to that node."""
+        names_at: dict[tuple[float, float], set[str]] = {}
+        for street in self.streets:
+            name = street.get("name", "").strip().lower()
+            if not name or name.startswith("unnamed_"):
+                continue
+            for seg in street.get("segments", []):
+                for coord in _seg_coords(seg):
+                    names_at.setdefault(coord, set()).add(name)
+        shared = {coord: names for coord, names in names_at.items() if len(names) > 1}
+
+        found: dict[tuple[str, str], tuple[float, float]] = {}
+        for name, indices in self.by_name.items():
+            if not name or name.startswith("unnamed_"):
+                continue
+            for si in indices:
+                for seg in self.streets[si].get("segments", []):
+                    for coord in _seg_coords(seg):
+                        for other in shared.get(coord, ()):
+                            if other != name:
+                                found.setdefault((name, other), coord)
+        return found
+
+
+def _seg_bbox(seg) -> tuple[float, float, float, float]:
+    """(s, w, n, e) of a waypoint list; street_binary PointLists compute it from their arrays."""
+    if hasattr(seg, "bbox"):
+        return seg.bbox()
+    lats = [p["lat"] for p in seg]
+    lons = [p["lon"] for p in seg]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def _seg_coords(seg) -> list[tuple[float, float]]:
+    """(lat, lon) tuples of a waypoint list, without building point dicts where possible."""
+    if hasattr(seg, "coords"):
+        return seg.coords()
+    return [(p["lat"], p["lon"]) for p in seg]
+
+
+def _dist_to_polyline_m(lat: float, lon: float, seg: list[dict]) -> float:
+    """Minimum distance in metres from a point to a waypoint list."""
+    if len(seg) == 1:
+        return haversine_m(lat, lon, seg[0]["lat"], seg[0]["lon"])
+    return min(
+        _point_to_segment_dist_m(lat, lon, a["lat"], a["lon"], b["lat"], b["lon"])
+        for a, b in zip(seg, seg[1:])
+    )
@@ -0,0 +1,165 @@
+"""
+Multi-pattern street-name matcher for question parsing.
+
+One Aho-Corasick automaton over every named street in city_streets.json is
+built per streets-file load (see location._street_matcher) and shared by
+find_streets_mentioned, find_street_suggestions, extract_intersection_anchor
+and get_parking_context.  A single pass over the lower-cased question
+returns every mention with its span, instead of each caller looping over
+all street names with substring or regex searches.
+
+Three kinds of pattern are registered per street:
+
+  full     the lower-cased name, matched as a plain substring
+           ("ashby ave" matches "Ashby Avenue")
+  abbrev   the name with type words abbreviated ("shattuck ave"), which must
+           end on a word boundary — what matching the full name against the
+           abbreviation-expanded question used to do
+  stem     the name without its trailing type word ("shattuck"), matched
+           as a whole word
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections import deque
+from typing import NamedTuple
+
+# Full type word → abbreviation used in questions ("Shattuck Ave.")
+ABBREVIATIONS = {
+    "avenue":    "ave",
+    "street":    "st",
+    "boulevard": "blvd",
+    "drive":     "dr",
+    "road":      "rd",
+    "lane":      "ln",
+    "court":     "ct",
+    "place":     "pl",
+    "terrace":   "ter",
+    "circle":    "cir",
+    "highway":   "hwy",
+}
+
+STREET_SUFFIXES = {
+    "avenue", "street", "boulevard", "drive", "road", "lane", "court",
+    "place", "terrace", "circle", "highway", "way", "trail", "alley",
+}
+
+
+def street_stem(name: str) -> str:
+    """Return the street name lower-cased, with the trailing type word removed.
+
+    "Shattuck Avenue" → "shattuck"
+    "Telegraph Avenue" → "telegraph"
+    Names without a recognised suffix are returned lower-cased unchanged.
+    """
+    words = name.lower().split()
+    if len(words) > 1 and words[-1] in STREET_SUFFIXES:
+        return " ".join(words[:-1])
+    return name.lower()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _patterns(name: str):
+    """Yield (pattern, kind, bound_start, bound_end) for one street name."""
+    full = name.lower()
+    yield full, "full", False, False
+
+    stem = street_stem(name)
+    if stem != full:
+        yield stem, "stem", True, True
+
+    words = full.split(" ")
+    options = [(w, ABBREVIATIONS[w]) if w in ABBREVIATIONS else (w,) for w in words]
+    for combo in itertools.product(*options):
+        if list(combo) == words:
+            continue
+        yield (" ".join(combo), "abbrev",
+               combo[0] != words[0], combo[-1] != words[-1])
+
+
+class Mention(NamedTuple):
+    """One street mention; start/end index into question.lower()."""
+    name:  str
+    kind:  str
+    start: int
+    end:   int
+
+
+class StreetMatcher:
+    """Aho-Corasick automaton over full names, stems and abbreviated variants."""
+
+    def __init__(self, names: list[str]):
+        self.names: list[str] = list(names)
+        self._order = {name: i for i, name in enumerate(self.names)}
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out:  list[list[tuple]] = [[]]   # state → [(name idx, len, kind, bound_start, bound_end)]
+
+        for ni, name in enumerate(self.names):
+            for pattern, kind, bs, be in _patterns(name):
+                if pattern:
+                    self._add(pattern, (ni, len(pattern), kind, bs, be))
+        self._link()
+
+    def _add(self, pattern: str, output: tuple) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(output)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state inherits its fallback's outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def mentions(self, question: str) -> list[Mention]:
+        """Every street mention in the question, ordered by end then start offset."""
+        text  = question.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        found: list[Mention] = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for ni, length, kind, bs, be in out[state]:
+                start = i + 1 - length
+                if bs and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if be and i + 1 < len(text) and _is_word_char(text[i + 1]):
+                    continue
+                found.append(Mention(self.names[ni], kind, start, i + 1))
+        return found
+
+    def names_in(self, question: str, kinds=("full",),
+                 mentions: list[Mention] | None = None) -> list[str]:
+        """Unique names with a mention of one of the given kinds, in street-file order.
+
+        Pass mentions already returned by mentions(question) to skip the rescan.
+        """
+        if mentions is None:
+            mentions = self.mentions(question)
+        hits = {m.name for m in mentions if m.kind in kinds}
+        return sorted(hits, key=self._order.__getitem__)
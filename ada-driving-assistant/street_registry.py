@@ -0,0 +1,186 @@
+"""
+Street data for every supported city, loaded lazily and kept under a memory budget.
+
+Each city's streets file (CA/<City>/city_streets.json in S3, or the
+city_streets*.json written by fetch_streets.py next to the app) is parsed on
+first use into a snapshot — the data, its StreetIndex and whatever else is
+derived from it (see location._build_streets_snapshot).  A question or
+parking lookup is routed to the right city, or cities, with the static
+bounding boxes the files were fetched with, so picking a city never loads one.
+
+Resident cities are kept in least-recently-used order.  When the estimated
+size of all loaded snapshots exceeds the budget, the least recently used ones
+are dropped; the city just asked for always stays.  Each resident city is also
+revalidated in the background every revalidate_s seconds and rebuilt only if
+its file changed (user-facing requests keep the old snapshot meanwhile).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+log = logging.getLogger(__name__)
+
+
+class City(NamedTuple):
+    name:   str                                  # as in events' city field
+    prefix: str                                  # S3 prefix of the city's files
+    bbox:   tuple[float, float, float, float]    # (south, west, north, east)
+
+    @property
+    def filename(self) -> str:
+        """Local streets file name, as written by fetch_streets.py."""
+        return "city_streets.json" if self.name == DEFAULT_CITY else f"city_streets_{self.name}.json"
+
+    @property
+    def label(self) -> str:
+        """Display name: "ElCerrito" → "El Cerrito"."""
+        return re.sub(r"(?<=[a-z])(?=[A-Z])", " ", self.name)
+
+    @property
+    def area(self) -> float:
+        s, w, n, e = self.bbox
+        return (n - s) * (e - w)
+
+
+DEFAULT_CITY = "Berkeley"
+
+# Bounding boxes from fetch_streets.py — the boxes each city file was fetched with
+CITIES: dict[str, City] = {c.name: c for c in (
+    City("Berkeley",   "CA/Berkeley",   (37.8477, -122.3193, 37.9058, -122.2329)),
+    City("Albany",     "CA/Albany",     (37.8699, -122.3738, 37.8990, -122.2817)),
+    City("ElCerrito",  "CA/ElCerrito",  (37.8975, -122.3233, 37.9383, -122.2811)),
+    City("Richmond",   "CA/Richmond",   (37.8836, -122.4415, 38.0286, -122.2435)),
+    City("Emeryville", "CA/Emeryville", (37.8271, -122.3302, 37.8500, -122.2756)),
+    City("Oakland",    "CA/Oakland",    (37.6301, -122.3559, 37.8854, -122.1144)),
+)}
+
+# Parsed data, StreetIndex and StreetMatcher take about 9.5 times the file's
+# size in memory, for both the JSON and the .bin format (measured on
+# Berkeley); the rest covers the parking block table.
+_RESIDENT_BYTES_PER_FILE_BYTE = 12
+
+
+def resident_bytes(path: str) -> int:
+    """Estimated memory of a loaded snapshot of the streets file at path."""
+    return os.path.getsize(path) * _RESIDENT_BYTES_PER_FILE_BYTE
+
+
+def cities_in_bbox(south: float, west: float, north: float, east: float) -> list[str]:
+    """Cities whose bounding box overlaps the given box, smallest box first."""
+    hits = [c for c in CITIES.values()
+            if c.bbox[0] <= north and south <= c.bbox[2]
+            and c.bbox[1] <= east and west <= c.bbox[3]]
+    return [c.name for c in sorted(hits, key=lambda c: c.area)]
+
+
+def cities_at(lat: float, lon: float) -> list[str]:
+    """Cities whose bounding box contains (lat, lon), smallest box first."""
+    return cities_in_bbox(lat, lon, lat, lon)
+
+
+class StreetRegistry:
+    """
+    Per-city snapshot cache.
+
+    build(city, warm) parses a city's streets file and returns its snapshot
+    dict, with a "cost" key holding its estimated size in bytes; warm=True
+    asks for everything to be built up front (background rebuilds).
+    changed(city, snapshot) says whether the file behind a snapshot changed.
+    """
+
+    def __init__(self, build: Callable[[str, bool], dict],
+                 changed: Callable[[str, dict], bool],
+                 budget_bytes: int, revalidate_s: float):
+        self._build        = build
+        self._changed      = changed
+        self.budget_bytes  = budget_bytes
+        self.revalidate_s  = revalidate_s
+        self._lock         = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        # city → {"snapshot", "checked_at", "refreshing"}, least recently used first
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self.loads     = 0
+        self.evictions = 0
+
+    def snapshot(self, city: str) -> dict:
+        """Return a city's snapshot, loading it on first use and revalidating in the background."""
+        if city not in CITIES:
+            raise KeyError(f"unsupported city: {city}")
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(city)
+            if entry is not None:
+                self._entries.move_to_end(city)
+            load_lock = self._load_locks.setdefault(city, threading.Lock())
+
+        if entry is None:
+            # One loader per city; requests for other cities are not held up
+            with load_lock:
+                with self._lock:
+                    entry = self._entries.get(city)
+                if entry is None:
+                    entry = {"snapshot": self._build(city, False),
+                             "checked_at": now, "refreshing": False}
+                    with self._lock:
+                        self._entries[city] = entry
+                        self.loads += 1
+                        self._evict(keep=city)
+            return entry["snapshot"]
+
+        if now - entry["checked_at"] > self.revalidate_s:
+            with self._lock:
+                start = not entry["refreshing"]
+                if start:
+                    entry["refreshing"] = True
+                    entry["checked_at"] = now
+            if start:
+                threading.Thread(target=self._revalidate, args=(city, entry),
+                                 name=f"streets-revalidate-{city}", daemon=True).start()
+        return entry["snapshot"]
+
+    def _revalidate(self, city: str, entry: dict) -> None:
+        """Rebuild one city's snapshot if its file changed; runs on a background thread."""
+        try:
+            if self._changed(city, entry["snapshot"]):
+                entry["snapshot"] = self._build(city, True)
+                with self._lock:
+                    self._evict(keep=city)
+        except Exception as exc:
+            log.warning("streets revalidation failed for %s: %s", city, exc)
+        finally:
+            entry["refreshing"] = False
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used cities until the rest fit the budget (caller holds _lock)."""
+        total = sum(e["snapshot"].get("cost", 0) for e in self._entries.values())
+        for city in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            if city == keep:
+                continue
+            total -= self._entries.pop(city)["snapshot"].get("cost", 0)
+            self.evictions += 1
+            log.info("streets: evicted %s to stay within %d MB", city, self.budget_bytes >> 20)
+
+    def loaded(self) -> list[str]:
+        """Resident cities, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            resident = sum(e["snapshot"].get("cost", 0) for e in self._entries.values())
+            return {
+                "loaded":         list(self._entries),
+                "resident_bytes": resident,
+                "budget_bytes":   self.budget_bytes,
+                "loads":          self.loads,
+                "evictions":      self.evictions,
+            }
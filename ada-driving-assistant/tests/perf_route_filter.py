@@ -0,0 +1,68 @@
+"""
+perf_route_filter.py — Microbenchmark for find_objects_along_route.
+
+Times the NumPy engine against the pure-Python fallback on a synthetic
+OSRM-sized polyline and a few thousand active events, and checks both
+return identical results.
+
+Usage:
+    py tests/perf_route_filter.py
+    py tests/perf_route_filter.py --vertices 500 --events 3000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import location                                   # noqa: E402
+from test_route_corridor import _events, _route   # noqa: E402
+
+
+def _time(fn, repeat):
+    samples = []
+    result  = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark find_objects_along_route engines")
+    parser.add_argument("--vertices", type=int, default=500,  help="Route vertices (default: 500)")
+    parser.add_argument("--events",   type=int, default=3000, help="Active events (default: 3000)")
+    parser.add_argument("--repeat",   type=int, default=3,    help="Repetitions (default: 3)")
+    args = parser.parse_args()
+
+    if location.np is None:
+        raise SystemExit("NumPy not installed — nothing to compare")
+
+    route   = _route(args.vertices)
+    objects = _events(route, args.events)
+    streets = ["Shattuck Avenue", "Ashby Avenue"]
+    run     = lambda: location.find_objects_along_route(route, objects, route_streets=streets)
+
+    print("ADA route corridor benchmark")
+    print(f"Route  : {len(route)} vertices")
+    print(f"Events : {len(objects)}")
+
+    with patch.object(location, "np", None):
+        t_py, r_py = _time(run, args.repeat)
+    t_np, r_np = _time(run, args.repeat)
+
+    same = ([(o["event_id"], o["_distance_m"]) for o in r_py] ==
+            [(o["event_id"], o["_distance_m"]) for o in r_np])
+    print(f"\n  Pure Python : {t_py * 1000:8.1f} ms")
+    print(f"  NumPy       : {t_np * 1000:8.1f} ms   speed-up ×{t_py / t_np:.0f}")
+    print(f"  Results     : {len(r_np)} on route, {'identical' if same else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    main()
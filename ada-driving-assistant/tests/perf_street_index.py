@@ -0,0 +1,147 @@
+"""
+perf_street_index.py — Per-query latency of street lookups, linear scan vs grid index.
+
+For each streets file:
+  1. Build the StreetIndex and report build time.
+  2. Run N random 300 m radius lookups (the parking_near block filter) as a
+     full linear scan over every segment, then through the index, and check
+     both return the same blocks.
+  3. Do the same for nearest-segment lookups.
+
+Usage:
+    py tests/perf_street_index.py
+    py tests/perf_street_index.py --files city_streets.json city_streets_Oakland.json --queries 500
+
+Files default to the Berkeley city_streets.json next to app.py.  Other cities
+can be fetched with fetch_streets.py or downloaded from S3 (CA/<City>/city_streets.json).
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from location import haversine_m                          # noqa: E402
+from street_index import StreetIndex, _dist_to_polyline_m  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_NEAREST_MAX_M = 500   # search cap for nearest-segment lookups
+
+
+def _linear_radius(streets, lat, lon, radius_m):
+    """The pre-index parking_near filter: every segment midpoint, every query."""
+    hits = []
+    for si, street in enumerate(streets):
+        for gi, seg in enumerate(street.get("segments", [])):
+            if len(seg) < 2:
+                continue
+            p1, p2 = seg[0], seg[-1]
+            mid_lat = (p1["lat"] + p2["lat"]) / 2
+            mid_lon = (p1["lon"] + p2["lon"]) / 2
+            if haversine_m(mid_lat, mid_lon, lat, lon) <= radius_m:
+                hits.append((si, gi))
+    return hits
+
+
+def _indexed_radius(index, lat, lon, radius_m):
+    hits = []
+    for sid in index.segments_in_radius(lat, lon, radius_m):
+        street, seg = index.segment(sid)
+        if len(seg) < 2:
+            continue
+        p1, p2 = seg[0], seg[-1]
+        mid_lat = (p1["lat"] + p2["lat"]) / 2
+        mid_lon = (p1["lon"] + p2["lon"]) / 2
+        if haversine_m(mid_lat, mid_lon, lat, lon) <= radius_m:
+            hits.append(index._segments[sid])
+    return hits
+
+
+def _linear_nearest(streets, lat, lon):
+    best = float("inf")
+    for street in streets:
+        for seg in street.get("segments", []):
+            if seg:
+                best = min(best, _dist_to_polyline_m(lat, lon, seg))
+    return best
+
+
+def _time_us(fn, points):
+    samples = []
+    results = []
+    for lat, lon in points:
+        t0 = time.perf_counter()
+        results.append(fn(lat, lon))
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples, results
+
+
+def _fmt(samples):
+    return (f"median {statistics.median(samples):9.1f} µs   "
+            f"p95 {sorted(samples)[int(len(samples) * 0.95)]:9.1f} µs")
+
+
+def bench_file(path, n_queries, radius_m):
+    with open(path) as f:
+        data = json.load(f)
+    streets = data["streets"]
+    n_segs  = sum(len(s.get("segments", [])) for s in streets)
+    print(f"\n-- {os.path.basename(path)}  ({len(streets)} streets, {n_segs} segments) {'-' * 20}")
+
+    t0 = time.perf_counter()
+    index = StreetIndex(data)
+    print(f"  Index build        : {(time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({len(index._grid)} cells)")
+
+    bb  = data.get("bbox")
+    rng = random.Random(42)
+    if bb:
+        points = [(rng.uniform(bb["south"], bb["north"]), rng.uniform(bb["west"], bb["east"]))
+                  for _ in range(n_queries)]
+    else:
+        # No bbox in the file: sample query points from the waypoints themselves
+        all_pts = [p for s in streets for seg in s.get("segments", []) for p in seg]
+        points  = [(p["lat"], p["lon"]) for p in rng.sample(all_pts, n_queries)]
+
+    lin_t, lin_r = _time_us(lambda a, b: _linear_radius(streets, a, b, radius_m), points)
+    idx_t, idx_r = _time_us(lambda a, b: _indexed_radius(index, a, b, radius_m), points)
+    assert lin_r == idx_r, "index radius results differ from linear scan"
+    print(f"  {radius_m:.0f} m radius  before: {_fmt(lin_t)}")
+    print(f"  {radius_m:.0f} m radius  after : {_fmt(idx_t)}   "
+          f"speed-up ×{statistics.median(lin_t) / statistics.median(idx_t):.0f}")
+
+    sub = points[: max(1, n_queries // 5)]   # the linear nearest scan is slow
+    lin_t, lin_r = _time_us(lambda a, b: _linear_nearest(streets, a, b), sub)
+    idx_t, idx_r = _time_us(lambda a, b: index.nearest_segment(a, b, max_m=_NEAREST_MAX_M), sub)
+    assert all((r is None and d > _NEAREST_MAX_M) or (r is not None and abs(d - r[2]) < 1e-6)
+               for d, r in zip(lin_r, idx_r)), \
+        "index nearest-segment results differ from linear scan"
+    print(f"  nearest segment  before: {_fmt(lin_t)}")
+    print(f"  nearest segment  after : {_fmt(idx_t)}   "
+          f"speed-up ×{statistics.median(lin_t) / statistics.median(idx_t):.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StreetIndex against linear scans")
+    parser.add_argument("--files", nargs="+", default=[os.path.join(ROOT, "city_streets.json")],
+                        help="city_streets JSON files (default: Berkeley)")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per file (default: 300)")
+    parser.add_argument("--radius",  type=float, default=300, help="Radius in metres (default: 300)")
+    args = parser.parse_args()
+
+    print("ADA street index benchmark")
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"\n-- {path}: not found, skipping")
+            continue
+        bench_file(path, args.queries, args.radius)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Tests for answer_cache.py — reuse of /api/ask answers for repeated questions.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import answer_cache
+from answer_cache import fingerprint, normalize_intent
+
+_CONE = {"event_id": "ev-1", "type": "single_cone", "street": "Telegraph Ave", "_distance_m": 320}
+_LOC  = {"destination": "Berkeley Bowl", "checked_streets": [], "lat": 37.8665, "lon": -122.2585, "bearing": 10}
+
+
+class TestNormalizeIntent(unittest.TestCase):
+
+    def test_phrasings_of_the_same_question_match(self):
+        intents = {normalize_intent(q) for q in ("Anything ahead?", "Any obstacles on the way?",
+                                                 "Hey ADA, any hazards on the road ahead?",
+                                                 "is there ANYTHING ahead now")}
+        self.assertEqual(len(intents), 1)
+
+    def test_specifics_are_kept(self):
+        self.assertNotEqual(normalize_intent("Is Shattuck clear?"), normalize_intent("Is the road clear?"))
+        self.assertNotEqual(normalize_intent("Is Shattuck clear?"), normalize_intent("Is Telegraph clear?"))
+        self.assertNotEqual(normalize_intent("Where can I park?"), normalize_intent("Anything ahead?"))
+
+    def test_directions_are_kept(self):
+        self.assertNotEqual(normalize_intent("Is the right lane clear?"), normalize_intent("Is the lane clear?"))
+
+    def test_opposite_words_are_kept_apart(self):
+        intents = {normalize_intent(q) for q in ("Is the road clear?", "Is the road blocked?",
+                                                 "Is anything blocking the road?", "Anything on the road?")}
+        self.assertEqual(len(intents), 4)
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_small_movements_keep_the_fingerprint(self):
+        self.assertEqual(fingerprint([_CONE], _LOC), fingerprint([dict(_CONE, _distance_m=340)], _LOC))
+        self.assertEqual(fingerprint([_CONE, dict(_CONE, event_id="ev-2")], _LOC),
+                         fingerprint([dict(_CONE, event_id="ev-2"), _CONE], _LOC))
+        # A few metres on, a slightly different heading
+        self.assertEqual(fingerprint([_CONE], _LOC),
+                         fingerprint([_CONE], dict(_LOC, lat=37.86665, lon=-122.25845, bearing=20)))
+
+    def test_changed_situation_changes_the_fingerprint(self):
+        base = fingerprint([_CONE], _LOC)
+        self.assertNotEqual(base, fingerprint([dict(_CONE, _distance_m=120)], _LOC))
+        self.assertNotEqual(base, fingerprint([], _LOC))
+        self.assertNotEqual(base, fingerprint([_CONE], dict(_LOC, checked_streets=["Shattuck Ave"])))
+        self.assertNotEqual(base, fingerprint([_CONE], dict(_LOC, parking={"best_chance": 40})))
+
+    def test_driver_movement_changes_the_fingerprint(self):
+        base = fingerprint([_CONE], _LOC)
+        self.assertNotEqual(base, fingerprint([_CONE], dict(_LOC, lat=37.8685)))       # ~220 m north
+        self.assertNotEqual(base, fingerprint([_CONE], dict(_LOC, lon=-122.2605)))
+        self.assertNotEqual(base, fingerprint([_CONE], dict(_LOC, bearing=100)))        # turned east
+        self.assertEqual(fingerprint([_CONE], dict(_LOC, bearing=355)), fingerprint([_CONE], dict(_LOC, bearing=5)))
+
+
+class TestAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        answer_cache.clear()
+        self.key = ("s1", normalize_intent("Anything ahead?"), fingerprint([_CONE], _LOC))
+
+    def test_answer_is_reused_after_itself(self):
+        answer_cache.put(*self.key, None, "A cone on Telegraph, 1000 ft ahead.")
+        self.assertEqual(answer_cache.get(*self.key, None), "A cone on Telegraph, 1000 ft ahead.")
+        # Asked again right after hearing the answer
+        self.assertEqual(answer_cache.get(*self.key, "A cone on Telegraph, 1000 ft ahead."),
+                         "A cone on Telegraph, 1000 ft ahead.")
+        self.assertIsNone(answer_cache.get(*self.key, "Parking is 40% likely on Dwight."))
+        self.assertIsNone(answer_cache.get("s2", *self.key[1:], None))
+        stats = answer_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (2, 2, 1))
+
+    def test_entries_expire(self):
+        answer_cache.put(*self.key, None, "Clear.")
+        later = answer_cache.time.monotonic() + answer_cache.TTL_S + 1
+        with patch.object(answer_cache.time, "monotonic", return_value=later):
+            self.assertIsNone(answer_cache.get(*self.key, None))
+        self.assertEqual(answer_cache.stats()["size"], 1)   # the entry keyed by the answer itself
+
+    def test_zero_ttl_disables(self):
+        with patch.object(answer_cache, "TTL_S", 0):
+            answer_cache.put(*self.key, None, "Clear.")
+            self.assertIsNone(answer_cache.get(*self.key, None))
+        self.assertEqual(answer_cache.stats()["size"], 0)
+
+    def test_invalidate_is_per_session(self):
+        answer_cache.put(*self.key, None, "Clear.")
+        answer_cache.put("s2", *self.key[1:], None, "Clear.")
+        answer_cache.invalidate("s1")
+        self.assertIsNone(answer_cache.get(*self.key, None))
+        self.assertEqual(answer_cache.get("s2", *self.key[1:], None), "Clear.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,17 +11,82 @@ Primary regression targets:
 
 import json
 import sys
+import threading
+import time
+import types
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
 # ---------------------------------------------------------------------------
-# The stubs from test_lambda_handler.py are already in sys.modules (pytest
-# runs files in alphabetical order and _handler imports app first).
-# We just import the already-patched app module.
+# Stubs for app.py's AWS, Anthropic, session, event and street-loading
+# dependencies, so no test here touches S3, DynamoDB or the network.  When
+# test_lambda_handler.py has already imported app with the same stubs, that
+# module is reused as is.
 # ---------------------------------------------------------------------------
 
-import app as _app  # noqa: E402  (stubs already installed)
+def _stub(name, **attrs):
+    mod = types.ModuleType(name)
+    for k, v in attrs.items():
+        setattr(mod, k, v)
+    sys.modules[name] = mod
+    return mod
+
+
+def _install_stubs():
+    dynamo_table = MagicMock()
+    dynamo_table.get_item.return_value = {"Item": None}
+    boto3 = _stub("boto3")
+    boto3.client   = MagicMock(return_value=MagicMock())
+    boto3.resource = MagicMock(return_value=MagicMock(Table=MagicMock(return_value=dynamo_table)))
+
+    _stub("awsgi", response=MagicMock(return_value={"statusCode": 200, "body": "{}", "headers": {}}))
+    _stub("anthropic", Anthropic=MagicMock)
+    _stub("dotenv", load_dotenv=lambda: None)
+    _stub("sessions",
+          list_sessions=lambda: [],
+          find_session=lambda *a, **k: None,
+          get_session=lambda sid: None,
+          create_session=MagicMock(return_value={"id": "s1"}),
+          touch_session=lambda *a: None,
+          get_history=lambda *a, **k: [],
+          history_window=lambda *a, **k: {"messages": [], "turns": []},
+          add_message=lambda *a: None)
+    _stub("assistant",
+          answer_question=MagicMock(return_value=("ok", {})),
+          stream_answer=MagicMock(return_value=iter([("done", ("ok", {}))])))
+    _stub("events",
+          put_event=MagicMock(),
+          put_events=MagicMock(side_effect=lambda evs, **kw: {"written": len(evs), "failed": []}),
+          clear_event=MagicMock(),
+          event_lat_lon=MagicMock(return_value=(37.87, -122.27)),
+          get_events_by_city=MagicMock(return_value=[]),
+          get_events_by_street=MagicMock(return_value=[]),
+          get_events_near=MagicMock(return_value=[]),
+          get_events_updated_since=MagicMock(return_value=[]),
+          get_events_in_cell=MagicMock(return_value=[]),
+          geohash6_cover=MagicMock(return_value=[]),
+          event_geohash6=MagicMock(return_value="9q9p3u"))
+    _stub("location",
+          find_nearby_objects=MagicMock(return_value=[]),
+          find_objects_on_street=MagicMock(return_value=[]),
+          find_street_suggestions=MagicMock(return_value={}),
+          find_streets_mentioned=MagicMock(return_value=[]),
+          geocode_address=MagicMock(return_value=None),
+          object_center=MagicMock(return_value=(37.87, -122.27)),
+          random_location=MagicMock(return_value={"address": "Test St"}),
+          street_cities=MagicMock(return_value=["Berkeley"]),
+          streets_stats=MagicMock(return_value={"loaded": []}),
+          bearing_to_direction=MagicMock(return_value="N"),
+          find_objects_along_route=MagicMock(return_value=[]))
+    _stub("parking", get_parking_context=MagicMock(return_value=None))
+
+
+if "app" not in sys.modules:
+    _install_stubs()
+
+import app as _app  # noqa: E402
 
 _FAKE_SESSION = {
     "id": "sess-1",
@@ -51,10 +116,12 @@ _FAKE_EVENT = {
 }
 
 # Patch session/events stubs to use our fake data for these tests
-import sessions as _sess
+_sess = _app.sess   # the sessions module app is bound to
 _sess.get_session  = lambda sid: _FAKE_SESSION if sid == "sess-1" else None
 _sess.list_sessions = lambda: [_FAKE_SESSION]
 _sess.get_history  = lambda *a, **k: []
+_sess.history_window = lambda *a, **k: {"messages": [], "turns": [], "total_turns": 0,
+                                        "summarized_turns": 0, "tokens": 0, "token_budget": 2000}
 _sess.add_message  = lambda *a: None
 
 import events as _ev
@@ -86,6 +153,13 @@ def _get(path):
 
 class TestAskEndpoint(unittest.TestCase):
 
+    def setUp(self):
+        _app.answer_cache.clear()
+        # These tests exercise the Claude path; TestFastPath covers the rules
+        p = patch.object(_app.fast_answers, "MIN_CONFIDENCE", 2.0)
+        p.start()
+        self.addCleanup(p.stop)
+
     def _ask(self, question="Any hazards ahead?", session_id="sess-1", **extra):
         return _post("/api/ask", {"session_id": session_id, "question": question, **extra})
 
@@ -113,6 +187,47 @@ class TestAskEndpoint(unittest.TestCase):
         r = self._ask()
         self.assertIn("nearby_count", r.get_json())
 
+    def test_history_window_reported(self):
+        history = self._ask().get_json()["history"]
+        self.assertEqual(history["token_budget"], 2000)
+        self.assertEqual(history["turns"], [])
+        self.assertNotIn("messages", history)
+
+    # -- Answer cache ---------------------------------------------------------
+
+    def test_repeated_question_is_served_from_cache(self):
+        with patch.object(_app, "answer_question", wraps=_app.answer_question) as ask:
+            first  = self._ask("Anything ahead?").get_json()
+            second = self._ask("Any hazards on the road ahead?").get_json()
+        self.assertEqual(ask.call_count, 1)
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["answer"], first["answer"])
+        self.assertEqual(second["usage"], {"input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0,
+                                           "cache_creation_input_tokens": 0, "model": None})
+        stats = _get("/api/stats").get_json()
+        self.assertEqual(stats["answer_cache"]["hits"], 1)
+        self.assertGreaterEqual(stats["ask_latency"]["cached"]["count"], 1)
+
+    def test_no_cache_flag_bypasses_the_cache(self):
+        with patch.object(_app, "answer_question", wraps=_app.answer_question) as ask:
+            self._ask()
+            r = self._ask(no_cache=True).get_json()
+        self.assertEqual(ask.call_count, 2)
+        self.assertFalse(r["cached"])
+        self.assertEqual(_app.answer_cache.stats()["bypassed"], 1)
+
+    def test_cache_is_scoped_to_the_situation(self):
+        cone = dict(_FAKE_EVENT, _distance_m=920)
+        with patch.object(_app, "answer_question", wraps=_app.answer_question) as ask, \
+             patch.object(_app, "find_nearby_objects", return_value=[cone]):
+            self._ask(current_lat=37.8705, current_lon=-122.2605)
+            self._ask(current_lat=37.8707, current_lon=-122.2605, current_dist_m=20)
+            self._ask(current_lat=37.8707, current_lon=-122.2605, current_dist_m=400)
+            self._ask(current_lat=37.8741, current_lon=-122.2605)
+        # 20 m on: unchanged; then the cone is closer; then the driver is 400 m further north
+        self.assertEqual(ask.call_count, 3)
+
     # -- Anthropic failure must return JSON, not crash ----------------------
 
     def test_anthropic_exception_returns_json_error(self):
@@ -153,6 +268,133 @@ class TestAskEndpoint(unittest.TestCase):
         self.assertIn("error", r.get_json())
 
 
+class TestFastPath(unittest.TestCase):
+
+    def setUp(self):
+        _app.answer_cache.clear()
+        _app.fast_answers.clear()
+
+    def _ask(self, question, nearby):
+        with patch.object(_app, "answer_question", wraps=_app.answer_question) as ask, \
+             patch.object(_app, "find_nearby_objects", return_value=nearby):
+            r = _post("/api/ask", {"session_id": "sess-1", "question": question})
+        return r.get_json(), ask.call_count
+
+    def test_simple_question_skips_claude(self):
+        data, calls = self._ask("How many hazards ahead?", [dict(_FAKE_EVENT, _distance_m=120)])
+        self.assertEqual(calls, 0)
+        self.assertEqual(data["fast_path"]["intent"], "hazard_count")
+        self.assertIn("single cone on Telegraph Ave", data["answer"])
+        self.assertEqual(set(data["usage"]), {"input_tokens", "output_tokens", "cache_read_input_tokens",
+                                              "cache_creation_input_tokens", "model"})
+        self.assertEqual(data["usage"]["output_tokens"], 0)
+
+    def test_other_questions_go_to_claude(self):
+        data, calls = self._ask("Is anything ahead?", [dict(_FAKE_EVENT, _distance_m=120)])
+        self.assertEqual(calls, 1)          # road_clear is only answered locally when clear
+        self.assertIsNone(data["fast_path"])
+        data, calls = self._ask("Should I take the bridge?", [])
+        self.assertEqual(calls, 1)
+
+    def test_served_rate_in_stats(self):
+        self._ask("Anything ahead?", [])
+        self._ask("Should I take the bridge?", [])
+        stats = _get("/api/stats").get_json()
+        self.assertEqual(stats["fast_answers"]["served_rate"], 0.5)
+        self.assertEqual(stats["fast_answers"]["by_intent"], {"road_clear": 1})
+        self.assertGreaterEqual(stats["ask_latency"]["local"]["count"], 1)
+
+
+# ── /api/ask/stream (server-sent events) ───────────────────────────────────
+
+def _sse_frames(body: str) -> list:
+    frames = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append((fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+class TestAskStreamEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        _app.answer_cache.clear()
+        # The Claude path; test_fast_answer_is_sent_as_one_token turns the rules back on
+        p = patch.object(_app.fast_answers, "MIN_CONFIDENCE", 2.0)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _stream(self, chunks=("Clear ", "ahead."), error=None, question="Any hazards ahead?"):
+        def fake_stream(question, location, nearby, history):
+            for c in chunks:
+                yield "text", c
+            if error:
+                raise error
+            yield "done", ("".join(chunks), {"input_tokens": 10, "output_tokens": 2})
+
+        saved = []
+        with patch.object(_app, "stream_answer", side_effect=fake_stream), \
+             patch.object(_app.sess, "add_message", side_effect=lambda *a: saved.append(a)):
+            r = _post("/api/ask/stream", {"session_id": "sess-1", "question": question})
+            body = r.get_data(as_text=True)
+        return r, _sse_frames(body), saved
+
+    def test_sources_first_then_tokens_then_done(self):
+        r, frames, saved = self._stream()
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.mimetype.startswith("text/event-stream"))
+        self.assertEqual([e for e, _ in frames], ["sources", "token", "token", "done"])
+        self.assertIn("sources", frames[0][1])
+        self.assertIn("nearby_count", frames[0][1])
+        self.assertEqual("".join(d["text"] for e, d in frames if e == "token"), "Clear ahead.")
+        done = frames[-1][1]
+        self.assertEqual(done["answer"], "Clear ahead.")
+        self.assertIn("token_budget", done["history"])
+        self.assertLessEqual(done["ttft_ms"], done["total_ms"])
+        self.assertEqual(saved, [("sess-1", "user", "Any hazards ahead?"),
+                                 ("sess-1", "assistant", "Clear ahead.")])
+
+    def test_failure_mid_stream_sends_error_and_saves_nothing(self):
+        r, frames, saved = self._stream(chunks=("Clear",), error=Exception("overloaded"))
+        self.assertEqual([e for e, _ in frames], ["sources", "token", "error"])
+        self.assertIn("overloaded", frames[-1][1]["error"])
+        self.assertEqual(saved, [])
+
+    def test_streamed_answer_is_cached_for_both_endpoints(self):
+        self._stream()
+        r, frames, saved = self._stream(chunks=("Something ", "else."))
+        self.assertEqual([e for e, _ in frames], ["sources", "token", "done"])
+        done = frames[-1][1]
+        self.assertEqual((done["answer"], done["cached"], done["fast_path"]), ("Clear ahead.", True, None))
+        self.assertEqual(done["usage"]["output_tokens"], 0)
+        self.assertEqual(saved[-1], ("sess-1", "assistant", "Clear ahead."))
+        with patch.object(_app, "answer_question", side_effect=AssertionError("Claude called")):
+            data = _post("/api/ask", {"session_id": "sess-1", "question": "Any hazards ahead?"}).get_json()
+        self.assertEqual((data["answer"], data["cached"]), ("Clear ahead.", True))
+
+    def test_fast_answer_is_sent_as_one_token(self):
+        with patch.object(_app.fast_answers, "MIN_CONFIDENCE", 0.75), \
+             patch.object(_app, "find_nearby_objects", return_value=[dict(_FAKE_EVENT, _distance_m=120)]):
+            r, frames, saved = self._stream(error=AssertionError("Claude called"),
+                                            question="How many hazards ahead?")
+        self.assertEqual([e for e, _ in frames], ["sources", "token", "done"])
+        done = frames[-1][1]
+        self.assertEqual(done["fast_path"]["intent"], "hazard_count")
+        self.assertIn("single cone on Telegraph Ave", frames[1][1]["text"])
+        self.assertEqual(saved[-1], ("sess-1", "assistant", done["answer"]))
+
+    def test_validation_errors_are_json(self):
+        r = _post("/api/ask/stream", {"session_id": "no-such-id", "question": "hi"})
+        self.assertEqual(r.status_code, 404)
+        self.assertIn("error", r.get_json())
+
+    def test_ttft_reported_in_stats(self):
+        self._stream()
+        latency = _get("/api/stats").get_json()["ask_latency"]
+        self.assertGreaterEqual(latency["stream"]["count"], 1)
+        self.assertIsNotNone(latency["stream"]["ttft_ms_p50"])
+
+
 # ── /api/events endpoints ─────────────────────────────────────────────────
 
 class TestEventsEndpoints(unittest.TestCase):
@@ -214,6 +456,47 @@ class TestEventsEndpoints(unittest.TestCase):
         self.assertEqual(r.status_code, 200)
         self.assertIn("event_id", r.get_json())
 
+    def _batch_event(self, **kw):
+        now = datetime.now(timezone.utc)
+        ev = {"type": "single_cone", "lat": 37.866, "lon": -122.259,
+              "street": "Telegraph Ave", "city": "Berkeley",
+              "active_at":   now.isoformat(),
+              "inactive_at": (now + timedelta(hours=2)).isoformat()}
+        ev.update(kw)
+        return ev
+
+    def test_events_batch_valid_returns_event_ids(self):
+        r = _post("/api/events/batch", {"events": [self._batch_event(), self._batch_event()]})
+        self.assertEqual(r.status_code, 200)
+        data = r.get_json()
+        self.assertEqual(len(data["event_ids"]), 2)
+        self.assertEqual(data["failed"], [])
+
+    def test_events_batch_invalid_item_rejects_whole_batch(self):
+        put = MagicMock()
+        with patch.object(_app, "put_events", put):
+            r = _post("/api/events/batch",
+                      {"events": [self._batch_event(), self._batch_event(street="")]})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.get_json()["errors"], [{"index": 1, "error": "street is required"}])
+        put.assert_not_called()
+
+    def test_events_batch_empty_or_oversized_returns_400(self):
+        self.assertEqual(_post("/api/events/batch", {"events": []}).status_code, 400)
+        with patch.object(_app, "_EVENTS_BATCH_MAX", 1):
+            r = _post("/api/events/batch", {"events": [self._batch_event()] * 2})
+        self.assertEqual(r.status_code, 400)
+
+    def test_events_batch_partial_failure_returns_207(self):
+        put = MagicMock(side_effect=lambda evs, **kw: {"written": len(evs) - 1,
+                                                       "failed": [evs[0]["event_id"]]})
+        with patch.object(_app, "put_events", put):
+            r = _post("/api/events/batch", {"events": [self._batch_event(), self._batch_event()]})
+        self.assertEqual(r.status_code, 207)
+        data = r.get_json()
+        self.assertEqual(len(data["event_ids"]), 1)
+        self.assertEqual(len(data["failed"]), 1)
+
     def test_events_clear_missing_street_returns_400(self):
         r = _post("/api/events/ev-1/clear", {})
         self.assertEqual(r.status_code, 400)
@@ -227,6 +510,208 @@ class TestEventsEndpoints(unittest.TestCase):
         self.assertTrue(data["cleared"])
 
 
+# ── Events cache delta sync ───────────────────────────────────────────────
+
+class TestEventsCacheDeltaSync(unittest.TestCase):
+
+    def setUp(self):
+        _app._events_cache.clear()
+        self.addCleanup(_app._events_cache.clear)
+        self.full  = MagicMock(return_value=[_FAKE_EVENT])
+        self.delta = MagicMock(return_value=[])
+        for name, mock in (("get_events_by_city", self.full),
+                           ("get_events_updated_since", self.delta)):
+            patcher = patch.object(_app, name, mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _expire_ttl(self, city="Berkeley"):
+        _app._events_cache[city]["synced_at"] -= _app._CACHE_TTL + 1
+
+    def _ids(self, city="Berkeley"):
+        return [e["event_id"] for e in _app.get_events_for_city(city)]
+
+    def test_first_load_is_full_then_cached(self):
+        self.assertEqual(self._ids(), ["ev-1"])
+        self.assertEqual(self._ids(), ["ev-1"])
+        self.assertEqual(self.full.call_count, 1)
+        self.assertTrue(self.full.call_args[1].get("include_pending"))
+        self.delta.assert_not_called()
+
+    def test_refresh_uses_delta_and_applies_changes(self):
+        self._ids()
+        self._expire_ttl()
+        now = datetime.now(timezone.utc)
+        self.delta.return_value = [
+            {**_FAKE_EVENT, "event_id": "ev-2",
+             "updated_at": now.isoformat(timespec="microseconds")},
+            {**_FAKE_EVENT, "inactive_at": now.isoformat(),      # ev-1 cleared
+             "updated_at": now.isoformat(timespec="microseconds")},
+        ]
+        self.assertEqual(self._ids(), ["ev-2"])
+        self.assertEqual(self.full.call_count, 1)
+        self.assertEqual(_app._events_cache["Berkeley"]["hwm"],
+                         now.isoformat(timespec="microseconds"))
+
+    def test_pending_event_becomes_active_without_reload(self):
+        soon = {**_FAKE_EVENT, "event_id": "ev-soon",
+                "active_at": (datetime.now(timezone.utc) + timedelta(seconds=1)).isoformat()}
+        self.full.return_value = [_FAKE_EVENT, soon]
+        self.assertEqual(self._ids(), ["ev-1"])
+        self.assertIn("ev-soon", _app._events_cache["Berkeley"]["events"])
+
+    def test_delta_failure_falls_back_to_full_reload(self):
+        self._ids()
+        self._expire_ttl()
+        self.delta.side_effect = RuntimeError("index missing")
+        self.assertEqual(self._ids(), ["ev-1"])
+        self.assertEqual(self.full.call_count, 2)
+
+    def test_hourly_full_resync(self):
+        self._ids()
+        self._expire_ttl()
+        _app._events_cache["Berkeley"]["full_at"] -= _app._FULL_RESYNC_SEC
+        self._ids()
+        self.assertEqual(self.full.call_count, 2)
+        self.delta.assert_not_called()
+
+    def test_post_event_applied_in_place(self):
+        self._ids()
+        now = datetime.now(timezone.utc)
+        r = _post("/api/events", {
+            "type": "single_cone", "lat": 37.867, "lon": -122.259,
+            "street": "Telegraph Ave", "city": "Berkeley",
+            "active_at":   now.isoformat(),
+            "inactive_at": (now + timedelta(hours=2)).isoformat(),
+        })
+        new_id = r.get_json()["event_id"]
+        self.assertEqual(self._ids(), ["ev-1", new_id])
+        self.assertEqual(self.full.call_count, 1)
+
+    def test_batch_post_applied_to_affected_city_only(self):
+        self._ids("Berkeley")
+        self._ids("Oakland")
+        now = datetime.now(timezone.utc)
+        r = _post("/api/events/batch", {"events": [{
+            "type": "single_cone", "lat": 37.867, "lon": -122.259,
+            "street": "Telegraph Ave", "city": "Berkeley",
+            "active_at":   now.isoformat(),
+            "inactive_at": (now + timedelta(hours=2)).isoformat(),
+        }]})
+        new_id = r.get_json()["event_ids"][0]
+        self.assertIn(new_id, self._ids("Berkeley"))
+        self.assertNotIn(new_id, self._ids("Oakland"))
+        self.assertEqual(self.full.call_count, 2)
+
+    def test_clear_removes_event_in_place(self):
+        self._ids()
+        _post("/api/events/ev-1/clear", {"street": "Telegraph Ave"})
+        self.assertEqual(self._ids(), [])
+        self.assertEqual(self.full.call_count, 1)
+
+
+class TestParallelCityLoads(unittest.TestCase):
+
+    def setUp(self):
+        _app._events_cache.clear()
+        self.addCleanup(_app._events_cache.clear)
+
+    def _slow_loader(self, delay):
+        def _load(city, now, include_pending=False):
+            time.sleep(delay)
+            return [{**_FAKE_EVENT, "event_id": f"ev-{city}", "city": city}]
+        return MagicMock(side_effect=_load)
+
+    def test_cities_load_concurrently(self):
+        loader = self._slow_loader(0.2)
+        with patch.object(_app, "get_events_by_city", loader):
+            t0 = time.perf_counter()
+            evts = _app.get_all_events()
+            elapsed = time.perf_counter() - t0
+        self.assertEqual(len(evts), len(_app._SUPPORTED_CITIES))
+        self.assertLess(elapsed, 0.2 * len(_app._SUPPORTED_CITIES) / 2)
+
+    def test_timeout_serves_stale_entry(self):
+        with patch.object(_app, "get_events_by_city", self._slow_loader(0)):
+            _app.get_events_for_city("Berkeley")
+        _app._events_cache["Berkeley"]["synced_at"] -= _app._CACHE_TTL + 1
+        with patch.object(_app, "get_events_by_city", self._slow_loader(0.5)), \
+             patch.object(_app, "get_events_updated_since", MagicMock(side_effect=RuntimeError)), \
+             patch.object(_app, "_CITY_LOAD_TIMEOUT", 0.05):
+            t0 = time.perf_counter()
+            evts = _app.get_events_for_city("Berkeley")
+            self.assertLess(time.perf_counter() - t0, 0.4)
+            self.assertEqual([e["event_id"] for e in evts], ["ev-Berkeley"])
+            _app._inflight[("_refresh_city", "Berkeley")].result(timeout=2)   # let it finish
+
+    def test_concurrent_requests_share_one_refresh(self):
+        loader = self._slow_loader(0.2)
+        with patch.object(_app, "get_events_by_city", loader):
+            threads = [threading.Thread(target=_app.get_events_for_city, args=("Berkeley",))
+                       for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(loader.call_count, 1)
+
+
+class TestRouteScopedEvents(unittest.TestCase):
+
+    def setUp(self):
+        _app._cell_cache.clear()
+        self.addCleanup(_app._cell_cache.clear)
+        self.cells = MagicMock(return_value=["9q9p3u", "9q9p3v"])
+        self.query = MagicMock(side_effect=lambda cell, now: [
+            {**_FAKE_EVENT, "event_id": f"ev-{cell}"}])
+        for name, mock in (("geohash6_cover", self.cells), ("get_events_in_cell", self.query)):
+            patcher = patch.object(_app, name, mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _route(self):
+        return types.SimpleNamespace(coords=[[-122.259, 37.866], [-122.258, 37.867]],
+                                     geohash6_cells=None)
+
+    def test_only_cover_cells_are_queried_and_cached(self):
+        route = self._route()
+        objs  = _app.get_route_event_objects(route)
+        self.assertEqual(sorted(e["event_id"] for e in objs), ["ev-9q9p3u", "ev-9q9p3v"])
+        self.assertEqual(sorted(c.args[0] for c in self.query.call_args_list),
+                         ["9q9p3u", "9q9p3v"])
+        _app.get_route_event_objects(route)
+        self.assertEqual(self.query.call_count, 2)   # cells served from cache
+        self.cells.assert_called_once()              # cover cached on the route
+
+    def test_concurrent_questions_share_one_cover(self):
+        route   = self._route()
+        barrier = threading.Barrier(4)
+
+        def cover(coords, buffer_m):
+            barrier.wait(timeout=5)          # every thread computes before any stores
+            return ["9q9p3u", "9q9p3v"]
+
+        self.cells.side_effect = cover
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: _app._route_cells(route), range(4)))
+        self.assertTrue(all(r is route.geohash6_cells for r in results))
+
+    def test_long_route_falls_back_to_city_path(self):
+        self.cells.return_value = [f"c{i:05d}" for i in range(_app._ROUTE_MAX_CELLS + 1)]
+        self.assertIsNone(_app.get_route_event_objects(self._route()))
+        self.query.assert_not_called()
+
+    def test_cold_cell_failure_falls_back_to_city_path(self):
+        self.query.side_effect = RuntimeError("throttled")
+        self.assertIsNone(_app.get_route_event_objects(self._route()))
+
+    def test_local_clear_updates_cell_cache(self):
+        _app.get_route_event_objects(self._route())
+        _post("/api/events/ev-9q9p3u/clear", {"street": "Telegraph Ave"})
+        objs = _app.get_route_event_objects(self._route())
+        self.assertEqual([e["event_id"] for e in objs], ["ev-9q9p3v"])
+
+
 # ── Other routes ──────────────────────────────────────────────────────────
 
 class TestOtherRoutes(unittest.TestCase):
@@ -254,6 +739,18 @@ class TestOtherRoutes(unittest.TestCase):
         r = _post("/api/location/geocode", {"address": "nowhere land xyz"})
         self.assertEqual(r.status_code, 404)
 
+    def test_random_location_unknown_city_returns_400(self):
+        r = _get("/api/location/random?city=Gotham")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(_get("/api/location/random?city=Oakland").status_code, 200)
+
+    def test_stats_reports_route_cache_counters(self):
+        r = _get("/api/stats")
+        self.assertEqual(r.status_code, 200)
+        cache = r.get_json()["route_cache"]
+        for key in ("hits", "misses", "size", "max_size"):
+            self.assertIn(key, cache)
+
 
 if __name__ == "__main__":
     unittest.main()
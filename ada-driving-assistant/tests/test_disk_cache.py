@@ -0,0 +1,64 @@
+"""
+Tests for disk_cache.py — the SQLite key → JSON value cache.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import disk_cache
+from disk_cache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path  = os.path.join(self._tmp.name, "cache.sqlite")
+        self.cache = DiskCache("things", self.path)
+
+    def test_round_trip_and_overwrite(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", {"lat": 37.87, "names": ["x"]}, ttl_s=60)
+        self.assertEqual(self.cache.get("a"), {"lat": 37.87, "names": ["x"]})
+        self.cache.set("a", [1, 2], ttl_s=60)
+        self.assertEqual(self.cache.get("a"), [1, 2])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_persists_across_instances(self):
+        self.cache.set("a", "kept", ttl_s=60)
+        self.assertEqual(DiskCache("things", self.path).get("a"), "kept")
+        self.assertIsNone(DiskCache("others", self.path).get("a"))
+
+    def test_expired_entries(self):
+        self.cache.set("old", 1, ttl_s=60)
+        self.cache.set("new", 2, ttl_s=600)
+        with patch.object(disk_cache.time, "time", return_value=disk_cache.time.time() + 120):
+            self.assertIsNone(self.cache.get("old"))
+            self.assertEqual(self.cache.get("new"), 2)
+            self.assertEqual(self.cache.purge_expired(), 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_bulk_get_and_set(self):
+        self.cache.set_many({f"k{i}": i for i in range(1200)}, ttl_s=60)
+        self.cache.set_many({"stale": 0}, ttl_s=-1)
+        found = self.cache.get_many([f"k{i}" for i in range(0, 1300, 100)] + ["stale"])
+        self.assertEqual(found, {f"k{i}": i for i in range(0, 1200, 100)})
+        self.assertEqual(len(self.cache), 1201)
+
+    def test_unwritable_path_behaves_as_empty(self):
+        cache = DiskCache("things", os.path.join(self._tmp.name, "missing", "cache.sqlite"))
+        with self.assertLogs("disk_cache", level="WARNING"):
+            cache.set("a", 1, ttl_s=60)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_rejects_bad_table_names(self):
+        with self.assertRaises(ValueError):
+            DiskCache("x; DROP TABLE y", self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
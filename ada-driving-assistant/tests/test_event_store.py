@@ -0,0 +1,92 @@
+"""
+Tests for event_store.py — columnar events vs the list-of-dicts search path.
+
+Every location search function must return the same rows, in the same
+order, whether it is given a plain events list or an EventStore.
+"""
+
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Other test files stub location as a plain module — load the real ones.
+for _key in ("location", "event_store"):
+    sys.modules.pop(_key, None)
+
+import location                           # noqa: E402
+from event_store import EventStore, np    # noqa: E402
+from tests.test_route_corridor import _events, _route   # noqa: E402
+
+_NOW   = datetime.now(timezone.utc)
+_PAST  = (_NOW - timedelta(hours=1)).isoformat()
+_LATER = (_NOW + timedelta(hours=1)).isoformat()
+
+
+def _keys(rows):
+    return [(o["event_id"], o.get("_distance_m")) for o in rows]
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class TestEventStoreParity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.route  = _route(200, seed=1)
+        cls.events = _events(cls.route, 1500, seed=2) + [
+            # Naive timestamps raise against an aware now → skipped by the list path
+            {"event_id": "naive", "active_at": "2020-01-01T00:00:00",
+             "inactive_at": "2099-01-01T00:00:00",
+             "coordinates": {"lat": 37.8601, "lon": -122.2899}},
+            {"event_id": "zulu", "street": "Ashby Avenue",
+             "active_at": "2020-01-01T00:00:00Z", "inactive_at": "2099-01-01T00:00:00Z",
+             "coordinates": {"lat": 37.8602, "lon": -122.2898}},
+            # Top-level lat/lon only — object_center() has no centre for it
+            {"event_id": "flat", "street": "Ashby Avenue",
+             "active_at": _PAST, "inactive_at": _LATER, "lat": 37.86, "lon": -122.29},
+        ]
+        half = len(cls.events) // 2
+        cls.store = EventStore.concat([EventStore(cls.events[:half]),
+                                       EventStore(cls.events[half:]),
+                                       EventStore([])])
+
+    def test_concat_keeps_all_rows(self):
+        self.assertEqual(len(self.store), len(self.events))
+        self.assertEqual(list(self.store), self.events)
+
+    def test_nearby_matches_list_path(self):
+        for lat, lon in [(37.86, -122.29), (37.87, -122.28), (37.95, -122.20)]:
+            for radius in (100, 500, 2000):
+                with self.subTest(lat=lat, lon=lon, radius=radius):
+                    self.assertEqual(
+                        _keys(location.find_nearby_objects(lat, lon, self.events, radius)),
+                        _keys(location.find_nearby_objects(lat, lon, self.store, radius)))
+
+    def test_on_street_matches_list_path(self):
+        for name in ("Ashby Avenue", "shattuck avenue", "", "No Such Street"):
+            with self.subTest(name=name):
+                self.assertEqual(_keys(location.find_objects_on_street(name, self.events)),
+                                 _keys(location.find_objects_on_street(name, self.store)))
+
+    def test_along_route_matches_list_path(self):
+        for kw in ({}, {"route_streets": ["Ashby Avenue", "Shattuck Avenue"]}):
+            with self.subTest(**kw):
+                self.assertEqual(
+                    _keys(location.find_objects_along_route(self.route, self.events, **kw)),
+                    _keys(location.find_objects_along_route(self.route, self.store, **kw)))
+
+    def test_inactive_rows_masked(self):
+        mask = self.store.active_mask(_NOW)
+        ids  = {self.store.rows[i]["event_id"] for i in np.nonzero(mask)[0]}
+        self.assertNotIn("future", ids)
+        self.assertNotIn("expired", ids)
+        self.assertNotIn("naive", ids)
+        self.assertIn("zulu", ids)
+
+    def test_street_ids_are_interned(self):
+        names = self.store.streets
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn("ashby avenue", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,7 +28,8 @@ def _make_conditions_stub():
 
     class Key:
         def __init__(self, name): self._n = name
-        def eq(self, v): return f"Key({self._n}).eq({v!r})"
+        def eq(self, v): return _Cond(f"Key({self._n}).eq({v!r})")
+        def gt(self, v): return _Cond(f"Key({self._n}).gt({v!r})")
 
     class Attr:
         def __init__(self, name): self._n = name
@@ -115,6 +116,12 @@ class TestEventToDynamo(unittest.TestCase):
         self.assertIn("event_id", item)
         self.assertGreater(len(item["event_id"]), 0)
 
+    def test_updated_at_stamped_in_utc(self):
+        before = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        item   = ev.event_to_dynamo(self._base())
+        self.assertGreaterEqual(item["updated_at"], before)
+        self.assertTrue(item["updated_at"].endswith("+00:00"))
+
     def test_invalid_inactive_at_gets_fallback_ttl(self):
         item = ev.event_to_dynamo(self._base(inactive_at="not-a-date"))
         self.assertIn("ttl", item)
@@ -267,5 +274,185 @@ class TestGetEventsByCityFilterExpression(unittest.TestCase):
         self.assertEqual(t.query.call_count, 2)
 
 
+    def test_include_pending_drops_active_at_filter(self):
+        t = self._mock_table()
+        with patch.object(ev, "_get_table", return_value=t):
+            ev.get_events_by_city("Berkeley", datetime.now(timezone.utc), include_pending=True)
+        expr = repr(t.query.call_args[1]["FilterExpression"])
+        self.assertIn("inactive_at", expr)
+        self.assertNotIn("active_at).lte", expr)
+
+
+# ── Delta sync support ─────────────────────────────────────────────────────
+
+class TestDeltaSync(unittest.TestCase):
+
+    def test_updated_since_queries_sparse_index(self):
+        t = MagicMock()
+        t.query.return_value = {"Items": [{"event_id": "ev-1", "city": "Berkeley",
+                                           "updated_at": "2026-01-01T00:00:01.000000+00:00"}]}
+        with patch.object(ev, "_get_table", return_value=t):
+            result = ev.get_events_updated_since("Berkeley", "2026-01-01T00:00:00.000000+00:00")
+        kwargs = t.query.call_args[1]
+        self.assertEqual(kwargs["IndexName"], "city-updated-index")
+        self.assertIn("updated_at", repr(kwargs["KeyConditionExpression"]))
+        self.assertEqual([e["event_id"] for e in result], ["ev-1"])
+
+    def test_updated_since_paginates(self):
+        t = MagicMock()
+        t.query.side_effect = [
+            {"Items": [{"event_id": "ev-1"}], "LastEvaluatedKey": {"event_id": "ev-1"}},
+            {"Items": [{"event_id": "ev-2"}]},
+        ]
+        with patch.object(ev, "_get_table", return_value=t):
+            result = ev.get_events_updated_since("Berkeley", "2026-01-01T00:00:00+00:00")
+        self.assertEqual(len(result), 2)
+        self.assertEqual(t.query.call_count, 2)
+
+    def test_cell_query_uses_geohash6_index(self):
+        t = MagicMock()
+        t.query.return_value = {"Items": []}
+        with patch.object(ev, "_get_table", return_value=t):
+            ev.get_events_in_cell("9q9p3u", datetime.now(timezone.utc))
+        kwargs = t.query.call_args[1]
+        self.assertEqual(kwargs["IndexName"], "geohash6-index")
+        self.assertIn("inactive_at", repr(kwargs["FilterExpression"]))
+
+    def test_route_cover_contains_points_near_route(self):
+        route = [[-122.2700, 37.8700], [-122.2600, 37.8750], [-122.2500, 37.8700]]
+        cells = set(ev.geohash6_cover(route, 250))
+        for lon, lat in route:
+            for dlat, dlon in ((0.002, 0), (-0.002, 0), (0, 0.0025), (0, -0.0025)):
+                self.assertIn(ev._gh_encode(lat + dlat, lon + dlon, 6), cells)
+        self.assertNotIn(ev._gh_encode(37.95, -122.35, 6), cells)
+
+    def test_clear_event_stamps_updated_at(self):
+        t = MagicMock()
+        with patch.object(ev, "_get_table", return_value=t):
+            ev.clear_event("Telegraph Ave", "ev-1", datetime.now(timezone.utc).isoformat())
+        kwargs = t.update_item.call_args[1]
+        self.assertIn("updated_at", kwargs["UpdateExpression"])
+        self.assertIn(":ua", kwargs["ExpressionAttributeValues"])
+
+
+# ── Table handle ───────────────────────────────────────────────────────────
+
+class TestTablePerThread(unittest.TestCase):
+
+    def test_each_thread_gets_its_own_table(self):
+        import threading
+        session = MagicMock(side_effect=lambda: MagicMock())
+        with patch.object(ev, "_local", threading.local()), \
+             patch.object(ev.boto3, "session", types.SimpleNamespace(Session=session), create=True):
+            main = [ev._get_table(), ev._get_table()]
+            other = []
+            t = threading.Thread(target=lambda: other.append(ev._get_table()))
+            t.start()
+            t.join()
+        self.assertIs(main[0], main[1])
+        self.assertIsNot(main[0], other[0])
+        self.assertEqual(session.call_count, 2)
+
+
+# ── put_events: BatchWriteItem writer ──────────────────────────────────────
+
+class TestPutEvents(unittest.TestCase):
+
+    def _events(self, n):
+        now = datetime.now(timezone.utc)
+        return [{"event_id": f"ev-{i}", "type": "single_cone", "street": "Telegraph Ave",
+                 "city": "Berkeley", "lat": 37.866, "lon": -122.259,
+                 "active_at": now.isoformat(),
+                 "inactive_at": (now + timedelta(hours=1)).isoformat()} for i in range(n)]
+
+    def _table(self, side_effect=None):
+        t = MagicMock()
+        t.name = "ada-events"
+        t.meta.client.batch_write_item.side_effect = side_effect or (lambda **kw: {})
+        return t
+
+    def _run(self, t, evs, **kw):
+        with patch.object(ev, "_get_table", return_value=t), patch.object(ev.dynamo_batch.time, "sleep"):
+            return ev.put_events(evs, **kw)
+
+    def test_chunks_of_25(self):
+        t = self._table()
+        result = self._run(t, self._events(60))
+        sizes = [len(c[1]["RequestItems"]["ada-events"])
+                 for c in t.meta.client.batch_write_item.call_args_list]
+        self.assertEqual(sizes, [25, 25, 10])
+        self.assertEqual(result, {"written": 60, "failed": []})
+
+    def test_unprocessed_items_are_retried(self):
+        calls = []
+
+        def _write(RequestItems):
+            reqs = RequestItems["ada-events"]
+            calls.append(len(reqs))
+            return {"UnprocessedItems": {"ada-events": reqs[:3]}} if len(calls) == 1 else {}
+
+        result = self._run(self._table(_write), self._events(10))
+        self.assertEqual(calls, [10, 3])
+        self.assertEqual(result["written"], 10)
+
+    def test_gives_up_after_retries(self):
+        t = self._table(lambda RequestItems: {"UnprocessedItems": RequestItems})
+        result = self._run(t, self._events(2))
+        self.assertEqual(sorted(result["failed"]), ["ev-0", "ev-1"])
+        self.assertEqual(result["written"], 0)
+        self.assertEqual(t.meta.client.batch_write_item.call_count, ev.dynamo_batch.BATCH_RETRIES)
+
+    def test_throttling_is_retried(self):
+        from botocore.exceptions import ClientError
+        throttled = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}},
+                                "BatchWriteItem")
+        t = self._table([throttled, {}])
+        result = self._run(t, self._events(5))
+        self.assertEqual(result, {"written": 5, "failed": []})
+        self.assertEqual(t.meta.client.batch_write_item.call_count, 2)
+
+    def test_invalid_item_is_isolated_and_logged(self):
+        from botocore.exceptions import ClientError
+        calls = []
+
+        def _write(RequestItems):
+            reqs = RequestItems["ada-events"]
+            calls.append(len(reqs))
+            if any(r["PutRequest"]["Item"]["event_id"] == "ev-7" for r in reqs):
+                raise ClientError({"Error": {"Code": "ValidationException"}}, "BatchWriteItem")
+            return {}
+
+        with self.assertLogs(level="WARNING") as logs:
+            result = self._run(self._table(_write), self._events(25))
+        self.assertEqual(result, {"written": 24, "failed": ["ev-7"]})
+        self.assertTrue(any("ev-7" in line and "ValidationException" in line for line in logs.output))
+        self.assertLess(len(calls), 15)          # split in halves, not retried with backoff
+
+    def test_event_without_street_fails_up_front(self):
+        evs = self._events(3)
+        del evs[1]["street"]
+        t = self._table()
+        with self.assertLogs("events", level="ERROR"):
+            result = self._run(t, evs)
+        self.assertEqual(result, {"written": 2, "failed": ["ev-1"]})
+        self.assertEqual(len(t.meta.client.batch_write_item.call_args[1]["RequestItems"]["ada-events"]), 2)
+
+    def test_duplicate_keys_keep_last(self):
+        evs = self._events(3)
+        evs.append({**evs[0], "type": "road_barrier"})
+        t = self._table()
+        result = self._run(t, evs)
+        items = t.meta.client.batch_write_item.call_args[1]["RequestItems"]["ada-events"]
+        self.assertEqual(len(items), 3)
+        self.assertEqual(result["written"], 3)
+        self.assertIn("road_barrier", [r["PutRequest"]["Item"]["type"] for r in items])
+
+    def test_concurrent_chunks(self):
+        t = self._table()
+        result = self._run(t, self._events(100), max_workers=4)
+        self.assertEqual(t.meta.client.batch_write_item.call_count, 4)
+        self.assertEqual(result["written"], 100)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for fast_answers.py — rule-based answers to simple questions.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import fast_answers
+from fast_answers import answer, match_intent
+
+_ROUTE = {"destination": "Berkeley Bowl", "checked_streets": []}
+_CONE  = {"type": "single_cone", "street": "Telegraph Ave", "_distance_m": 110}
+_CRASH = {"type": "car_accident", "street": "Dwight Way", "_distance_m": 800, "blocking": "one_lane"}
+
+_PARKING = {"anchor_label": "your destination", "best_street": "Dwight Way", "best_chance": 60,
+            "daytime": True, "blocks": [{"street": "Dwight Way", "chance": 60},
+                                        {"street": "Dwight Way", "chance": 55},
+                                        {"street": "Telegraph Ave", "chance": 35}]}
+
+
+class TestMatchIntent(unittest.TestCase):
+
+    def test_recognised_questions(self):
+        for question, intent in (("Anything ahead?", "road_clear"),
+                                 ("Is the road clear?", "road_clear"),
+                                 ("How many hazards are ahead?", "hazard_count"),
+                                 ("What's the nearest hazard?", "nearest"),
+                                 ("How far is the next obstacle?", "nearest"),
+                                 ("Where's the best place to park?", "parking")):
+            with self.subTest(question=question):
+                self.assertEqual(match_intent(question), (intent, 1.0))
+
+    def test_unexplained_words_are_declined(self):
+        for question in ("Is Shattuck clear?", "Should I take the bridge?",
+                         "How many lanes are blocked ahead?", "What is next?"):
+            with self.subTest(question=question):
+                self.assertEqual(match_intent(question), (None, 0.0))
+
+    def test_negated_questions_are_declined(self):
+        for question in ("Where should I not park?", "Where can't I park?",
+                         "Is there no hazard ahead?", "Don't tell me about parking"):
+            with self.subTest(question=question):
+                self.assertEqual(match_intent(question), (None, 0.0))
+
+
+class TestAnswers(unittest.TestCase):
+
+    def setUp(self):
+        fast_answers.clear()
+
+    def test_clear_road(self):
+        self.assertEqual(answer("Anything ahead?", _ROUTE, [])["answer"],
+                         "The road ahead is clear. There are no hazards reported along your route.")
+        self.assertIsNone(answer("Anything ahead?", _ROUTE, [_CONE]))   # Claude weighs the hazards
+
+    def test_count_and_nearest(self):
+        nearby = [_CRASH, _CONE, dict(_CONE, _distance_m=2000)]
+        self.assertEqual(answer("How many hazards ahead?", _ROUTE, nearby)["answer"],
+                         "There are 3 hazards ahead: 2 single cones and 1 car accident. "
+                         "The nearest is a single cone on Telegraph Ave, about 360 feet ahead.")
+        self.assertEqual(answer("What's the nearest hazard?", _ROUTE, [_CRASH])["answer"],
+                         "The nearest hazard is a car accident on Dwight Way, about 0.5 miles ahead, "
+                         "blocking one lane.")
+
+    def test_clear_best_parking_block(self):
+        loc = dict(_ROUTE, parking=_PARKING)
+        self.assertEqual(answer("Where can I park?", loc, [])["answer"],
+                         "Your best chance of a curb spot near your destination is on Dwight Way, "
+                         "about 60 percent.")
+        close = dict(_PARKING, blocks=_PARKING["blocks"] + [{"street": "Ward St", "chance": 58}])
+        self.assertIsNone(answer("Where can I park?", dict(_ROUTE, parking=close), []))
+        self.assertIsNone(answer("Where can I park?", dict(_ROUTE, parking=dict(_PARKING, ask_cross_street=True)), []))
+
+    def test_declines_street_specific_and_low_confidence(self):
+        self.assertIsNone(answer("Anything ahead?", dict(_ROUTE, checked_streets=["Shattuck Ave"]), []))
+        self.assertIsNone(answer("Anything ahead?", dict(_ROUTE, street_suggestions={"shatuck": "Shattuck Ave"}), []))
+        self.assertIsNone(answer("How many hazards ahead?", _ROUTE, [dict(_CONE, _distance_m=None)]))
+        with patch.object(fast_answers, "MIN_CONFIDENCE", 1.01):
+            self.assertIsNone(answer("Anything ahead?", _ROUTE, []))
+
+    def test_served_rate(self):
+        answer("Anything ahead?", _ROUTE, [])
+        answer("Should I take the bridge?", _ROUTE, [])
+        answer("What's the nearest hazard?", _ROUTE, [_CONE])
+        answer("Anything ahead?", _ROUTE, [_CONE])
+        stats = fast_answers.stats()
+        self.assertEqual((stats["questions"], stats["served"], stats["served_rate"]), (4, 2, 0.5))
+        self.assertEqual(stats["by_intent"], {"road_clear": 1, "nearest": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for geocoding.py — cached, coalesced Nominatim lookups with an
+offline reverse-geocode fallback.
+
+requests.get is replaced by a fake Nominatim; the disk cache lives in a
+temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# Other test files stub location as a MagicMock module — load the real one.
+for _key in ("location", "geocoding"):
+    sys.modules.pop(_key, None)
+
+import geocoding                 # noqa: E402
+import local_geocoder            # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+
+_POOL = [
+    {"address": "2200, Oak Street, Downtown", "lat": 37.8700, "lon": -122.2700, "street": "Oak Street"},
+    {"address": "1500, Pine Avenue, Northside", "lat": 37.8800, "lon": -122.2600, "street": "Pine Avenue"},
+]
+
+
+def _response(payload, status=200):
+    r = MagicMock()
+    r.status_code = status
+    r.json.return_value = payload
+    if status >= 400:
+        r.raise_for_status.side_effect = requests.HTTPError(f"{status}", response=r)
+    return r
+
+
+class _GeocodingTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.disk = DiskCache("geocode", os.path.join(self._tmp.name, "cache.sqlite"))
+        for target, value in (("_disk", self.disk), ("_MIN_INTERVAL_S", 0.0),
+                              ("_FORCE_OFFLINE", False)):
+            p = patch.object(geocoding, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.get = MagicMock(return_value=_response(
+            [{"lat": "37.8716", "lon": "-122.2727", "display_name": "2180, Shattuck Avenue, Downtown, Berkeley"}]))
+        p = patch.object(geocoding.requests, "get", self.get)
+        p.start()
+        self.addCleanup(p.stop)
+        geocoding.clear()
+        self.addCleanup(geocoding.clear)
+
+
+class TestCaching(_GeocodingTest):
+
+    def test_search_is_cached_in_memory_and_on_disk(self):
+        first = geocoding.search("2180 Shattuck Ave, Berkeley")
+        self.assertEqual((first["lat"], first["lon"]), (37.8716, -122.2727))
+        self.assertEqual(geocoding.search("  2180 shattuck ave,  Berkeley. "), first)
+        self.assertEqual(self.get.call_count, 1)
+
+        geocoding.clear()   # a new container: memory empty, disk kept
+        self.assertEqual(geocoding.search("2180 Shattuck Ave, Berkeley"), first)
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(geocoding.stats()["disk_hits"], 1)
+
+    def test_not_found_is_cached(self):
+        self.get.return_value = _response([])
+        self.assertIsNone(geocoding.search("nowhere land"))
+        self.assertIsNone(geocoding.search("nowhere land"))
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_reverse_keys_on_rounded_coordinates(self):
+        self.get.return_value = _response({"display_name": "2200, Oak Street, Downtown, Berkeley"})
+        self.assertEqual(geocoding.reverse(37.870012, -122.270031), "2200, Oak Street, Downtown")
+        self.assertEqual(geocoding.reverse(37.870041, -122.269989), "2200, Oak Street, Downtown")
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(self.get.call_args[1]["params"]["lat"], 37.87)
+
+    def test_concurrent_lookups_share_one_request(self):
+        release = threading.Event()
+
+        def slow_get(*args, **kw):
+            release.wait(5)
+            return _response({"display_name": "2200, Oak Street, Downtown"})
+
+        self.get.side_effect = slow_get
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(geocoding.reverse(37.87, -122.27)))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        while geocoding.stats()["coalesced"] < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(results, ["2200, Oak Street, Downtown"] * 5)
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_requests_are_spaced(self):
+        self.get.return_value = _response([])
+        with patch.object(geocoding, "_MIN_INTERVAL_S", 1.0), \
+             patch.object(geocoding.time, "sleep") as sleep:
+            geocoding.search("first")
+            geocoding.search("second")
+        self.assertEqual(sleep.call_count, 1)
+        self.assertGreater(sleep.call_args[0][0], 0.9)
+
+
+class TestOffline(_GeocodingTest):
+
+    def setUp(self):
+        super().setUp()
+        self.get.side_effect = requests.ConnectionError("no network")
+        p = patch.object(local_geocoder, "_tree", local_geocoder.AddressTree(_POOL))
+        p.start()
+        self.addCleanup(p.stop)
+        p = patch.object(local_geocoder, "nearest_street", return_value=("Oak Street", "Berkeley"))
+        self.street = p.start()
+        self.addCleanup(p.stop)
+
+    def test_reverse_falls_back_to_pool_address(self):
+        self.assertEqual(geocoding.reverse(37.8701, -122.2701), "near 2200 Oak Street, Downtown")
+        self.assertEqual(self.get.call_count, 1)
+        # Nominatim is not retried while marked offline, and offline answers aren't cached
+        self.assertEqual(geocoding.reverse(37.8701, -122.2701), "near 2200 Oak Street, Downtown")
+        self.assertEqual(self.get.call_count, 1)
+        self.assertFalse(geocoding.stats()["online"])
+        self.assertEqual(len(self.disk), 0)
+
+    def test_pool_address_on_another_street(self):
+        self.street.return_value = ("Elm Street", "Berkeley")
+        self.assertEqual(geocoding.reverse(37.8701, -122.2701),
+                         "Elm Street, near 2200 Oak Street, Downtown")
+
+    def test_far_from_pool_uses_street_and_city(self):
+        self.assertEqual(geocoding.reverse(37.8600, -122.2900), "Oak Street, Berkeley")
+
+    def test_cached_answers_still_served_offline(self):
+        self.get.side_effect = None
+        self.get.return_value = _response({"display_name": "1, Remote Road, Somewhere"})
+        geocoding.reverse(37.85, -122.25)
+        with patch.object(geocoding, "_FORCE_OFFLINE", True):
+            self.assertEqual(geocoding.reverse(37.85, -122.25), "1, Remote Road, Somewhere")
+            self.assertIsNone(geocoding.search("2180 Shattuck Ave"))
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_without_fallback_errors_propagate(self):
+        with self.assertRaises(requests.ConnectionError):
+            geocoding.reverse(37.8701, -122.2701, fallback=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -49,16 +49,23 @@ _stub("sessions",
       create_session=MagicMock(return_value={"id": "s1"}),
       touch_session=lambda *a: None,
       get_history=lambda *a, **k: [],
+      history_window=lambda *a, **k: {"messages": [], "turns": []},
       add_message=lambda *a: None)
 _stub("assistant",
-      answer_question=MagicMock(return_value=("ok", {})))
+      answer_question=MagicMock(return_value=("ok", {})),
+      stream_answer=MagicMock(return_value=iter([("done", ("ok", {}))])))
 _stub("events",
       put_event=MagicMock(),
+      put_events=MagicMock(side_effect=lambda evs, **kw: {"written": len(evs), "failed": []}),
       clear_event=MagicMock(),
       event_lat_lon=MagicMock(return_value=(37.87, -122.27)),
       get_events_by_city=MagicMock(return_value=[]),
       get_events_by_street=MagicMock(return_value=[]),
-      get_events_near=MagicMock(return_value=[]))
+      get_events_near=MagicMock(return_value=[]),
+      get_events_updated_since=MagicMock(return_value=[]),
+      get_events_in_cell=MagicMock(return_value=[]),
+      geohash6_cover=MagicMock(return_value=[]),
+      event_geohash6=MagicMock(return_value="9q9p3u"))
 _stub("location",
       find_nearby_objects=MagicMock(return_value=[]),
       find_objects_on_street=MagicMock(return_value=[]),
@@ -67,10 +74,14 @@ _stub("location",
       geocode_address=MagicMock(return_value=None),
       object_center=MagicMock(return_value=(37.87, -122.27)),
       random_location=MagicMock(return_value={"address": "Test St"}),
+      street_cities=MagicMock(return_value=["Berkeley"]),
+      streets_stats=MagicMock(return_value={"loaded": []}),
       bearing_to_direction=MagicMock(return_value="N"),
       find_objects_along_route=MagicMock(return_value=[]))
 _stub("parking", get_parking_context=MagicMock(return_value=None))
 
+# test_api_routes.py may have imported app first, bound to its own stubs
+sys.modules.pop("app", None)
 import app as _app  # noqa: E402
 
 
@@ -0,0 +1,145 @@
+"""
+Tests for local_geocoder.py — the offline nearest-address reverse geocoder —
+and its use as the default for random locations and simulated events.
+"""
+
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Other test files stub location as a MagicMock module — load the real one.
+for _key in ("location", "simulator"):
+    sys.modules.pop(_key, None)
+
+import local_geocoder                        # noqa: E402
+import location                              # noqa: E402
+import simulator                             # noqa: E402
+from local_geocoder import AddressTree       # noqa: E402
+
+_POOL = [
+    {"address": "2200, Oak Street, Downtown", "lat": 37.8700, "lon": -122.2700, "street": "Oak Street"},
+    {"address": "1500, Pine Avenue, Northside", "lat": 37.8800, "lon": -122.2600, "street": "Pine Avenue"},
+    {"address": "Pardee Street, San Pablo Park, Berkeley", "lat": 37.8550, "lon": -122.2900,
+     "street": "Pardee Street"},
+]
+
+
+def _brute_force(entries, lat, lon):
+    coslat = math.cos(math.radians(lat))
+    return min(entries, key=lambda e: (e["lat"] - lat) ** 2 + ((e["lon"] - lon) * coslat) ** 2)
+
+
+class TestAddressTree(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        entries = [{"lat": rng.uniform(37.84, 37.92), "lon": rng.uniform(-122.32, -122.24), "i": i}
+                   for i in range(500)]
+        tree = AddressTree(entries)
+        for _ in range(300):
+            lat, lon = rng.uniform(37.83, 37.93), rng.uniform(-122.33, -122.23)
+            entry, dist = tree.nearest(lat, lon)
+            self.assertIs(entry, _brute_force(entries, lat, lon))
+            self.assertAlmostEqual(dist, location.haversine_m(lat, lon, entry["lat"], entry["lon"]),
+                                   delta=0.5)
+
+    def test_empty_and_single(self):
+        self.assertIsNone(AddressTree([]).nearest(37.87, -122.27))
+        entry, dist = AddressTree(_POOL[:1]).nearest(37.87, -122.27)
+        self.assertIs(entry, _POOL[0])
+        self.assertAlmostEqual(dist, 0.0, places=3)
+
+
+
+class TestPoolLoading(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.pool_file = os.path.join(tmp.name, "addresses_pool.json")
+        with open(self.pool_file, "w") as f:
+            json.dump(_POOL[:2] + [{"address": "37.87, -122.27", "lat": 37.87, "lon": -122.27}], f)
+        for target, value in (("_tree", None), ("_POOL_FILE", self.pool_file)):
+            p = patch.object(local_geocoder, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_local_file_without_bucket(self):
+        with patch.dict(os.environ, {"S3_BUCKET": ""}):
+            tree = local_geocoder.address_tree()
+        self.assertEqual([e["address"] for e in tree.entries], [e["address"] for e in _POOL[:2]])
+        self.assertIs(local_geocoder.address_tree(), tree)
+
+    def test_s3_first_when_deployed(self):
+        s3 = MagicMock()
+        s3.get_object.return_value = {"Body": io.BytesIO(json.dumps(_POOL).encode())}
+        with patch.dict(os.environ, {"S3_BUCKET": "bucket"}), patch("boto3.client", return_value=s3):
+            self.assertEqual(len(local_geocoder.address_tree()), 3)
+        s3.get_object.assert_called_once_with(Bucket="bucket", Key="addresses_pool.json")
+
+    def test_s3_failure_falls_back_to_the_file(self):
+        with patch.dict(os.environ, {"S3_BUCKET": "bucket"}), \
+             patch("boto3.client", side_effect=RuntimeError("no credentials")):
+            self.assertEqual(len(local_geocoder.address_tree()), 2)
+
+
+class TestDescribe(unittest.TestCase):
+
+    def setUp(self):
+        for target, value in (("_tree", AddressTree(_POOL)),
+                              ("nearest_street", lambda lat, lon: ("Oak Street", "ElCerrito"))):
+            p = patch.object(local_geocoder, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_formats(self):
+        self.assertEqual(local_geocoder.describe(37.8701, -122.2701), "near 2200 Oak Street, Downtown")
+        self.assertEqual(local_geocoder.describe(37.8701, -122.2701, "Elm Street"),
+                         "Elm Street, near 2200 Oak Street, Downtown")
+        self.assertEqual(local_geocoder.describe(37.8600, -122.2800), "Oak Street, El Cerrito")
+        # Pool addresses without a house number are kept as they are
+        self.assertEqual(local_geocoder.describe(37.8551, -122.2901, "Pardee Street"),
+                         "near Pardee Street, San Pablo Park, Berkeley")
+
+    def test_known_street_skips_segment_lookup(self):
+        with patch.object(local_geocoder, "nearest_street") as nearest:
+            self.assertEqual(local_geocoder.describe(37.8600, -122.2800, "Elm Street"), "Elm Street")
+        nearest.assert_not_called()
+
+    def test_nothing_nearby(self):
+        with patch.object(local_geocoder, "nearest_street", return_value=None):
+            self.assertIsNone(local_geocoder.describe(37.7749, -122.4194))
+
+
+class TestDefaults(unittest.TestCase):
+
+    def test_random_location_does_not_call_nominatim(self):
+        with patch.object(location, "reverse_geocode") as reverse:
+            loc = location.random_location()
+        reverse.assert_not_called()
+        self.assertTrue(loc["address"])
+        self.assertIn(loc["street"], loc["address"])
+
+    def test_random_location_enrich_uses_nominatim(self):
+        with patch.object(location, "reverse_geocode", return_value="2180, Shattuck Avenue, Downtown") as reverse:
+            loc = location.random_location(enrich=True)
+        reverse.assert_called_once()
+        self.assertEqual(loc["address"], "2180, Shattuck Avenue, Downtown")
+
+    def test_simulated_events_get_addresses(self):
+        streets = [{"name": "Oak Street", "segments": [[{"lat": 37.8700, "lon": -122.2700},
+                                                        {"lat": 37.8700, "lon": -122.2699}]]}]
+        with patch.object(local_geocoder, "_tree", AddressTree(_POOL)):
+            events = simulator.generate_events(5, streets=streets)
+            self.assertEqual({e["address"] for e in events}, {"near 2200 Oak Street, Downtown"})
+            self.assertNotIn("address", simulator.generate_events(1, streets=streets, addresses=False)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for parking_blocks.py — the precomputed parking block table.
+
+Uses a tiny synthetic streets list so rows can be checked against
+_block_occupancy and a brute-force midpoint scan.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Other test files stub location/parking as MagicMock modules — load the real ones.
+for _key in ("location", "parking", "parking_blocks", "street_index"):
+    sys.modules.pop(_key, None)
+
+import parking                                    # noqa: E402
+import parking_blocks                             # noqa: E402
+from location import haversine_m                  # noqa: E402
+from parking_blocks import ParkingBlocks, load_parking_blocks, table_path   # noqa: E402
+from street_index import StreetIndex              # noqa: E402
+
+
+def _seg(*pts):
+    return [{"lat": a, "lon": b} for a, b in pts]
+
+
+_STREETS = [
+    {"name": "Oak Street", "highway": "residential",
+     "segments": [_seg((37.8700, -122.2700), (37.8700, -122.2680)),
+                  _seg((37.8700, -122.2680), (37.8700, -122.2660)),
+                  _seg((37.8700, -122.2680), (37.8705, -122.2660))]},   # duplicate start point
+    {"name": "Pine Avenue", "highway": "tertiary",
+     "segments": [_seg((37.8690, -122.2690), (37.8710, -122.2690))]},
+    {"name": "Unnamed_residential_1", "highway": "residential",
+     "segments": [_seg((37.8701, -122.2701), (37.8702, -122.2702))]},
+    {"name": "Stub Lane", "highway": "residential",
+     "segments": [_seg((37.8800, -122.2800))]},
+    {"name": "I 80", "highway": "motorway",
+     "segments": [_seg((37.8702, -122.2690), (37.8712, -122.2690))]},
+]
+
+
+class TestParkingBlocks(unittest.TestCase):
+
+    def setUp(self):
+        self.table = ParkingBlocks(_STREETS)
+
+    def test_one_row_per_multi_point_segment(self):
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(list(self.table.rows_of_street(0)), [0, 1, 2])
+        self.assertEqual(list(self.table.rows_of_street(3)), [])
+
+    def test_occupancy_matches_formula(self):
+        seg = _STREETS[1]["segments"][0]
+        row = self.table.rows_of_street(1)[0]
+        for daytime in (True, False):
+            self.assertEqual(self.table.occupancy(row, daytime),
+                             parking._block_occupancy(seg[0], seg[-1], "tertiary", daytime))
+
+    def test_rows_near_matches_brute_force(self):
+        lat, lon = 37.8700, -122.2685
+        for radius in (50, 150, 300):
+            brute = [row for row in range(len(self.table))
+                     if haversine_m(self.table.mid_lat[row], self.table.mid_lon[row],
+                                    lat, lon) <= radius]
+            self.assertEqual(self.table.rows_near(lat, lon, radius), brute)
+
+    def test_save_and_load_round_trip(self):
+        if parking_blocks.np is None:
+            self.skipTest("NumPy not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.parking.npz")
+            self.table.save(path, "abc")
+            loaded = ParkingBlocks.load(path, _STREETS, "abc")
+            self.assertIsNotNone(loaded)
+            for name in parking_blocks._COLUMNS:
+                self.assertEqual(list(getattr(loaded, name)), list(getattr(self.table, name)))
+            self.assertIsNone(ParkingBlocks.load(path, _STREETS, "changed"))
+
+    def test_load_parking_blocks_persists_next_to_streets_file(self):
+        if parking_blocks.np is None:
+            self.skipTest("NumPy not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            streets_path = os.path.join(tmp, "city_streets.json")
+            with open(streets_path, "w") as f:
+                json.dump({"streets": _STREETS}, f)
+            load_parking_blocks(_STREETS, streets_path)
+            self.assertTrue(os.path.exists(table_path(streets_path)))
+            with patch.object(ParkingBlocks, "_build", side_effect=AssertionError("rebuilt")):
+                load_parking_blocks(_STREETS, streets_path)
+
+
+class TestParkingUsesTable(unittest.TestCase):
+
+    def setUp(self):
+        index = StreetIndex({"streets": _STREETS})
+        for target, value in (("_street_index", index),
+                              ("_block_table", ParkingBlocks(_STREETS)),
+                              ("_is_daytime", True)):
+            p = patch.object(parking, target, return_value=value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_parking_near_skips_unnamed_and_motorway(self):
+        result = parking.parking_near(37.8700, -122.2690, 300)
+        streets = [b["street"] for b in result["blocks"]]
+        self.assertNotIn("Unnamed_residential_1", streets)
+        self.assertNotIn("I 80", streets)
+        chances = [b["chance"] for b in result["blocks"]]
+        self.assertEqual(chances, sorted(chances, reverse=True))
+
+    def test_parking_on_street_dedupes_start_points(self):
+        result = parking.parking_on_street("oak street")
+        self.assertEqual(len(result["blocks"]), 2)
+        self.assertTrue(result["ask_cross_street"])
+
+    def test_parking_on_motorway_is_none(self):
+        self.assertIsNone(parking.parking_on_street("I 80"))
+
+
+if __name__ == "__main__":
+    unittest.main()
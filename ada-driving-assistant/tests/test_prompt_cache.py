@@ -0,0 +1,220 @@
+"""
+Tests for prompt caching in assistant.py, against a local fake of the
+Messages API that does prompt-cache accounting: it checks where the cache
+breakpoints are and reports cache-read / cache-write tokens like the real
+service (tokens approximated as characters / 4), including the model's
+minimum cacheable prefix.
+"""
+
+import hashlib
+import json
+import sys
+import unittest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# test_lambda_handler.py stubs assistant as a MagicMock module — load the real one.
+sys.modules.pop("assistant", None)
+
+import assistant  # noqa: E402
+
+_LOCATION = {"address": "2020 Telegraph Ave, Berkeley", "lat": 37.866, "lon": -122.259,
+             "bearing": 0, "bearing_direction": "N", "destination": "", "checked_streets": []}
+
+
+class FakeMessages:
+    """
+    Stand-in for client.messages.  The request is flattened into blocks
+    (system, then each message's content blocks); a prefix ending at a block
+    with cache_control is written to the cache, and a later request whose
+    blocks start with a cached prefix reads it instead of paying for it.
+    """
+
+    MAX_BREAKPOINTS = 4
+
+    def __init__(self, answer="Clear ahead.", min_cache_tokens=0):
+        self.answer   = answer
+        self.min_cache_tokens = min_cache_tokens
+        self.requests = []
+        self._cache   = set()
+
+    @staticmethod
+    def _blocks(kw):
+        system = kw.get("system", [])
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        blocks = [("system", b) for b in system]
+        for m in kw["messages"]:
+            content = m["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            blocks += [(m["role"], b) for b in content]
+        return blocks
+
+    def _usage(self, kw):
+        blocks = self._blocks(kw)
+        marks  = [i for i, (_, b) in enumerate(blocks) if "cache_control" in b]
+        if len(marks) > self.MAX_BREAKPOINTS:
+            raise ValueError(f"{len(marks)} cache breakpoints, at most {self.MAX_BREAKPOINTS} allowed")
+
+        keys, tokens, total = [], [], 0
+        for role, b in blocks:
+            plain = {k: v for k, v in b.items() if k != "cache_control"}
+            keys.append(hashlib.sha1(json.dumps(keys[-1:] + [role, plain], sort_keys=True).encode()).hexdigest())
+            total += len(b.get("text", "")) // 4
+            tokens.append(total)
+
+        read = max((tokens[i] for i, k in enumerate(keys) if k in self._cache), default=0)
+        written = 0
+        for i in marks:
+            if tokens[i] >= self.min_cache_tokens and keys[i] not in self._cache:
+                self._cache.add(keys[i])
+                written = max(written, tokens[i] - read)
+        return SimpleNamespace(input_tokens=total - read - written, output_tokens=len(self.answer) // 4,
+                               cache_read_input_tokens=read, cache_creation_input_tokens=written)
+
+    def _message(self, kw):
+        self.requests.append(kw)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=self.answer)],
+                               usage=self._usage(kw))
+
+    def create(self, **kw):
+        return self._message(kw)
+
+    @contextmanager
+    def stream(self, **kw):
+        msg   = self._message(kw)
+        words = self.answer.split(" ")
+        yield SimpleNamespace(text_stream=iter([w + " " for w in words[:-1]] + words[-1:]),
+                              get_final_message=lambda: msg)
+
+
+_HAIKU_MIN_CACHE_TOKENS = 4096   # shortest prefix claude-haiku-4-5 caches
+
+
+class _CacheTest(unittest.TestCase):
+    """Against the real model's minimum cacheable prefix."""
+
+    min_cache_tokens = _HAIKU_MIN_CACHE_TOKENS
+
+    def setUp(self):
+        self.fake = FakeMessages(min_cache_tokens=self.min_cache_tokens)
+        for target, value in (("client", SimpleNamespace(messages=self.fake)),
+                              ("_CACHE_MIN_TOKENS", self.min_cache_tokens)):
+            p = patch.object(assistant, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _drive(self, turns, answer=assistant.answer_question):
+        """Ask `turns` questions in one session, keeping history as sessions.py does."""
+        history, usages = [], []
+        for n in range(turns):
+            question = f"Question {n}: anything blocking Telegraph Avenue ahead?"
+            text, usage = answer(question, _LOCATION, [], list(history))
+            history += [{"role": "user", "content": question}, {"role": "assistant", "content": text}]
+            usages.append(usage)
+        return usages
+
+
+class TestInertForHaiku(_CacheTest):
+
+    def test_model_minimum_is_the_default(self):
+        patch.stopall()   # the real setting, not the patched one
+        self.assertEqual(assistant._CACHE_MIN_TOKENS, _HAIKU_MIN_CACHE_TOKENS)
+
+    def test_budgeted_drive_sends_no_breakpoints(self):
+        # sessions.py keeps the history within HISTORY_TOKEN_BUDGET (2000)
+        usages = self._drive(12)
+        self.assertNotIn("cache_control", json.dumps(self.fake.requests))
+        self.assertEqual({(u["cache_read_input_tokens"], u["cache_creation_input_tokens"]) for u in usages},
+                         {(0, 0)})
+
+    def test_prefix_over_the_minimum_is_cached(self):
+        history = [{"role": "user", "content": "Tell me about the route. " * 400},
+                   {"role": "assistant", "content": "It runs along Telegraph. " * 400}]
+        first  = assistant.answer_question("Anything ahead?", _LOCATION, [], history)[1]
+        second = assistant.answer_question("And after that?", _LOCATION, [], history)[1]
+        self.assertNotIn("cache_control", self.fake.requests[0]["system"][0])
+        self.assertGreaterEqual(first["cache_creation_input_tokens"], _HAIKU_MIN_CACHE_TOKENS)
+        self.assertEqual(second["cache_read_input_tokens"], first["cache_creation_input_tokens"])
+
+
+class _LowMinimumTest(_CacheTest):
+    """Breakpoint placement, for a model that caches prefixes as short as the system prompt."""
+
+    min_cache_tokens = 100
+
+
+class TestBreakpoints(_LowMinimumTest):
+
+    def test_first_turn_caches_only_the_system_prompt(self):
+        assistant.answer_question("Any hazards?", _LOCATION, [], [])
+        kw = self.fake.requests[0]
+        self.assertEqual(kw["system"][-1]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(kw["system"][-1]["text"], assistant._QA_SYSTEM)
+        self.assertEqual(len(kw["messages"]), 1)
+        self.assertIsInstance(kw["messages"][0]["content"], str)   # current conditions: never cached
+
+    def test_history_prefix_ends_in_a_breakpoint(self):
+        history = [{"role": "user", "content": "Is Shattuck clear?"},
+                   {"role": "assistant", "content": "Yes, Shattuck is clear."}]
+        before  = json.dumps(history)
+        assistant.answer_question("And Telegraph?", _LOCATION, [], history)
+        messages = self.fake.requests[0]["messages"]
+
+        self.assertEqual(json.dumps(history), before)                 # caller's history untouched
+        self.assertEqual(messages[1]["content"][-1],
+                         {"type": "text", "text": "Yes, Shattuck is clear.",
+                          "cache_control": {"type": "ephemeral"}})
+        self.assertNotIn("cache_control", json.dumps(messages[0]))
+        self.assertIn("[Current conditions]", messages[-1]["content"])
+        self.assertIsInstance(messages[-1]["content"], str)
+
+    def test_block_content_keeps_one_breakpoint_on_the_last_block(self):
+        history = [{"role": "user", "content": "hi"},
+                   {"role": "assistant", "content": [{"type": "text", "text": "a"},
+                                                     {"type": "text", "text": "b"}]}]
+        assistant.answer_question("next", _LOCATION, [], history)
+        blocks = self.fake.requests[0]["messages"][1]["content"]
+        self.assertEqual(["cache_control" in b for b in blocks], [False, True])
+        self.assertNotIn("cache_control", history[1]["content"][1])
+
+
+class TestCacheUsage(_LowMinimumTest):
+
+    def test_long_drive_reads_the_stable_prefix(self):
+        usages = self._drive(6)
+        system_tokens = len(assistant._QA_SYSTEM) // 4
+
+        self.assertEqual(usages[0]["cache_read_input_tokens"], 0)
+        self.assertEqual(usages[0]["cache_creation_input_tokens"], system_tokens)
+        for prev, cur in zip(usages[1:], usages[2:]):
+            # Everything the previous turn cached is read back; only the new exchange is written
+            self.assertEqual(cur["cache_read_input_tokens"],
+                             prev["cache_read_input_tokens"] + prev["cache_creation_input_tokens"])
+        self.assertGreater(usages[-1]["cache_read_input_tokens"], system_tokens)
+        # Uncached input stays flat (new exchange + current conditions) as the drive grows
+        self.assertEqual(len({u["input_tokens"] for u in usages[2:]}), 1)
+        for u in usages:
+            self.assertEqual(set(u), {"input_tokens", "output_tokens", "cache_read_input_tokens",
+                                      "cache_creation_input_tokens", "model"})
+
+    def test_streaming_uses_the_same_breakpoints(self):
+        def streamed(question, location, nearby, history):
+            events = list(assistant.stream_answer(question, location, nearby, history))
+            self.assertEqual("".join(v for k, v in events if k == "text"), self.fake.answer)
+            return events[-1][1]
+
+        usages = self._drive(3, answer=streamed)
+        self.assertGreater(usages[2]["cache_read_input_tokens"], 0)
+        self.assertEqual(self.fake.requests[2]["system"], self.fake.requests[0]["system"])
+
+    def test_missing_cache_fields_report_zero(self):
+        msg = SimpleNamespace(usage=SimpleNamespace(input_tokens=5, output_tokens=2))
+        usage = assistant._usage(msg)
+        self.assertEqual((usage["cache_read_input_tokens"], usage["cache_creation_input_tokens"]), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for ride_optimizer.py — dead-head-minimising ride assignment — and the
+optimized fleet scheduler mode in schedule.py.
+"""
+
+import itertools
+import random
+import sys
+import unittest
+
+sys.modules.pop("schedule", None)
+
+import schedule as sched_mod                       # noqa: E402
+from ride_optimizer import _Costs, optimize_rides  # noqa: E402
+
+_BASE = (37.8897, -122.3024)
+
+# Synthetic address pool (addresses_pool.json is not checked in)
+_POOL = [{"address": f"{i}, Test Street", "lat": 37.85 + 0.002 * (i % 11), "lon": -122.31 + 0.003 * (i % 9)}
+         for i in range(60)]
+
+
+def _duration(lat1, lon1, lat2, lon2):
+    return sched_mod._fallback_sec(lat1, lon1, lat2, lon2)
+
+
+def _rides(n, seed):
+    rng = random.Random(seed)
+    pt  = lambda: (rng.uniform(37.85, 37.93), rng.uniform(-122.32, -122.25))   # noqa: E731
+    return [(pt(), pt()) for _ in range(n)]
+
+
+def _brute_force_min(rides, n_vans, cap):
+    """Exact optimum by enumerating every ordering split into consecutive vans."""
+    c = _Costs(rides, _duration, _BASE)
+    best = float("inf")
+    for perm in itertools.permutations(range(len(rides))):
+        for cuts in itertools.combinations(range(len(rides) + 1), n_vans - 1):
+            bounds = (0,) + cuts + (len(rides),)
+            routes = [perm[a:b] for a, b in zip(bounds, bounds[1:])]
+            if all(len(r) <= cap for r in routes):
+                best = min(best, sum(c.route(list(r)) for r in routes))
+    return best / 60
+
+
+class TestOptimizeRides(unittest.TestCase):
+
+    def test_small_instances_reach_the_optimum(self):
+        for seed in range(5):
+            rides  = _rides(6, seed)
+            result = optimize_rides(rides, 2, _duration, _BASE, max_rides=3)
+            self.assertTrue(result["converged"])
+            self.assertAlmostEqual(result["dead_head_min"], _brute_force_min(rides, 2, 3), delta=0.1,
+                                   msg=f"seed {seed}")
+
+    def test_assigns_every_ride_once_within_capacity(self):
+        rides    = _rides(100, 7)
+        baseline = [list(range(k * 10, k * 10 + 10)) for k in range(10)]
+        result   = optimize_rides(rides, 10, _duration, _BASE, time_budget_s=5, baseline=baseline)
+        self.assertEqual(sorted(r for route in result["routes"] for r in route), list(range(100)))
+        self.assertEqual([len(route) for route in result["routes"]], [10] * 10)
+        self.assertGreater(result["saved_min"], 0)
+        self.assertAlmostEqual(result["saved_min"],
+                               result["baseline_dead_head_min"] - result["dead_head_min"], delta=0.11)
+
+    def test_time_budget_stops_local_search(self):
+        rides  = _rides(60, 3)
+        greedy = optimize_rides(rides, 6, _duration, _BASE, time_budget_s=0)
+        full   = optimize_rides(rides, 6, _duration, _BASE, time_budget_s=10)
+        self.assertFalse(greedy["converged"])
+        self.assertEqual(greedy["moves"], 0)
+        self.assertTrue(full["converged"])
+        self.assertLessEqual(full["dead_head_min"], greedy["dead_head_min"])
+
+    def test_rides_that_cannot_fit(self):
+        with self.assertRaises(ValueError):
+            optimize_rides(_rides(5, 1), 2, _duration, _BASE, max_rides=2)
+
+
+class TestOptimizedFleet(unittest.TestCase):
+
+    def test_optimized_schedules_reuse_the_sampled_rides(self):
+        v_ids = [sched_mod.van_id(i) for i in range(1, 6)]
+
+        random.seed(11)
+        scheds, report = sched_mod.optimize_fleet_schedules(v_ids, "2026-01-05", _POOL, use_osrm=False)
+        random.seed(11)
+        plain = sched_mod.generate_fleet_schedules(v_ids, "2026-01-05", _POOL, use_osrm=False)
+
+        legs = lambda ss: sorted((r["from_address"], r["to_address"]) for s in ss for r in s["rides"])  # noqa: E731
+        self.assertEqual(legs(scheds), legs(plain))
+        self.assertEqual([s["van_id"] for s in scheds], v_ids)
+        self.assertTrue(all(len(s["rides"]) == sched_mod.RIDES_PER_VAN for s in scheds))
+        dead_head = sum(r["dh_sec"] for s in scheds for r in s["rides"]) + sum(s["rtb_sec"] for s in scheds)
+        self.assertAlmostEqual(dead_head / 60, report["dead_head_min"], delta=1)
+        self.assertGreater(report["saved_min"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
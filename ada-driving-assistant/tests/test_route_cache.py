@@ -0,0 +1,83 @@
+"""
+Tests for route_cache.py — per-session LRU of compiled route polylines.
+"""
+
+import json
+import sys
+import unittest
+from unittest.mock import patch
+
+# Other test files stub location as a plain module — load the real one.
+for _key in ("location", "route_cache"):
+    sys.modules.pop(_key, None)
+
+import location      # noqa: E402
+import route_cache   # noqa: E402
+
+_ROUTE_A = json.dumps([[-122.27, 37.87], [-122.268, 37.871], [-122.266, 37.872]])
+_ROUTE_B = json.dumps([[-122.26, 37.86], [-122.259, 37.862]])
+
+
+class TestRouteCache(unittest.TestCase):
+
+    def setUp(self):
+        # route_cache imports location lazily — make sure it sees this module
+        patcher = patch.dict(sys.modules, {"location": location})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        route_cache.clear()
+
+    def test_miss_then_hit_returns_same_object(self):
+        first  = route_cache.get_compiled_route("s1", _ROUTE_A)
+        second = route_cache.get_compiled_route("s1", _ROUTE_A)
+        self.assertIs(first, second)
+        self.assertIsInstance(first, location.CompiledRoute)
+        stats = route_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_compiled_route_geometry(self):
+        route = route_cache.get_compiled_route("s1", _ROUTE_A)
+        self.assertEqual(len(route), 2)
+        self.assertEqual(route.cum_dist[0], 0.0)
+        self.assertAlmostEqual(route.cum_dist[-1], sum(route.seg_len))
+        self.assertEqual(route.bbox, (37.87, -122.27, 37.872, -122.266))
+
+    def test_changed_route_replaces_session_entry(self):
+        a = route_cache.get_compiled_route("s1", _ROUTE_A)
+        b = route_cache.get_compiled_route("s1", _ROUTE_B)
+        self.assertIsNot(a, b)
+        self.assertEqual(route_cache.stats()["size"], 1)
+
+    def test_lru_eviction(self):
+        with patch.object(route_cache, "_MAX_ENTRIES", 2):
+            route_cache.get_compiled_route("s1", _ROUTE_A)
+            route_cache.get_compiled_route("s2", _ROUTE_A)
+            route_cache.get_compiled_route("s1", _ROUTE_A)   # s1 now most recent
+            route_cache.get_compiled_route("s3", _ROUTE_B)   # evicts s2
+            stats = route_cache.stats()
+            self.assertEqual(stats["evictions"], 1)
+            self.assertEqual(stats["size"], 2)
+            route_cache.get_compiled_route("s1", _ROUTE_A)
+            self.assertEqual(route_cache.stats()["hits"], 2)
+
+    def test_invalidate(self):
+        route_cache.get_compiled_route("s1", _ROUTE_A)
+        route_cache.invalidate("s1")
+        self.assertEqual(route_cache.stats()["size"], 0)
+
+    def test_compiled_route_matches_raw_coords(self):
+        from datetime import datetime, timedelta, timezone
+        now = datetime.now(timezone.utc)
+        ev  = {"event_id": "e1", "type": "single_cone", "street": "",
+               "coordinates": {"lat": 37.8705, "lon": -122.269},
+               "active_at": (now - timedelta(hours=1)).isoformat(),
+               "inactive_at": (now + timedelta(hours=1)).isoformat()}
+        raw      = location.find_objects_along_route(json.loads(_ROUTE_A), [ev])
+        compiled = location.find_objects_along_route(
+            route_cache.get_compiled_route("s1", _ROUTE_A), [ev])
+        self.assertEqual(raw, compiled)
+        self.assertEqual(len(raw), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests for location.find_objects_along_route — NumPy engine vs pure-Python fallback.
+
+Builds a synthetic zig-zag route through Berkeley plus a cloud of random
+events around it, then checks both engines return identical objects,
+_distance_m values and ordering.
+"""
+
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Other test files stub location as a MagicMock module — load the real one.
+sys.modules.pop("location", None)
+
+import location  # noqa: E402
+
+_NOW = datetime.now(timezone.utc)
+
+
+def _route(n_vertices=120, seed=7):
+    rng = random.Random(seed)
+    lat, lon = 37.8600, -122.2900
+    coords = [[lon, lat]]
+    for i in range(n_vertices - 1):
+        if i % 17 == 5:
+            coords.append(list(coords[-1]))          # zero-length segment
+            continue
+        lat += rng.uniform(-0.0002, 0.0008)
+        lon += rng.uniform(-0.0003, 0.0009)
+        coords.append([lon, lat])
+    return coords
+
+
+def _events(route, n=600, seed=11):
+    rng    = random.Random(seed)
+    names  = ["Shattuck Avenue", "Telegraph Avenue", "Ashby Avenue", ""]
+    active = (_NOW - timedelta(hours=1)).isoformat()
+    later  = (_NOW + timedelta(hours=1)).isoformat()
+    evts   = []
+    for i in range(n):
+        lon, lat = rng.choice(route)
+        lat += rng.gauss(0, 0.0015)
+        lon += rng.gauss(0, 0.0015)
+        shape = i % 3
+        ev = {"event_id": f"ev-{i}", "type": "single_cone",
+              "street": rng.choice(names), "active_at": active, "inactive_at": later}
+        if shape == 0:
+            ev["coordinates"] = {"lat": lat, "lon": lon}
+        elif shape == 1:
+            ev["polygon"] = [{"lat": lat + d, "lon": lon - d} for d in (0, 0.0001, 0.0002)]
+        else:
+            ev["left_coordinates"]  = {"lat": lat, "lon": lon}
+            ev["right_coordinates"] = {"lat": lat + 0.0001, "lon": lon + 0.0001}
+        evts.append(ev)
+    # A few inactive / malformed events that both engines must drop
+    evts.append({**evts[0], "event_id": "future", "active_at": later})
+    evts.append({**evts[0], "event_id": "expired", "inactive_at": active})
+    evts.append({"event_id": "no-geom", "active_at": active, "inactive_at": later})
+    return evts
+
+
+@unittest.skipIf(location.np is None, "NumPy not installed")
+class TestAlongRouteParity(unittest.TestCase):
+
+    def _both(self, route, objects, **kw):
+        fast = location.find_objects_along_route(route, objects, **kw)
+        with patch.object(location, "np", None):
+            slow = location.find_objects_along_route(route, objects, **kw)
+        return fast, slow
+
+    def _assert_same(self, fast, slow):
+        self.assertEqual([o["event_id"] for o in fast], [o["event_id"] for o in slow])
+        self.assertEqual([o["_distance_m"] for o in fast], [o["_distance_m"] for o in slow])
+
+    def test_parity_without_route_streets(self):
+        route = _route()
+        fast, slow = self._both(route, _events(route))
+        self.assertGreater(len(slow), 0)
+        self._assert_same(fast, slow)
+
+    def test_parity_with_route_streets(self):
+        route = _route()
+        fast, slow = self._both(route, _events(route),
+                                route_streets=["Shattuck Avenue", "Ashby Avenue"])
+        self.assertGreater(len(slow), 0)
+        self._assert_same(fast, slow)
+
+    def test_parity_wide_corridor(self):
+        route = _route(seed=3)
+        fast, slow = self._both(route, _events(route, seed=5), corridor_m=250)
+        self._assert_same(fast, slow)
+
+    def test_parity_small_blocks(self):
+        route = _route()
+        with patch.object(location, "_NP_BLOCK_ELEM", 500):
+            fast, slow = self._both(route, _events(route))
+        self._assert_same(fast, slow)
+
+    def test_single_vertex_route_returns_nothing(self):
+        route = _route()[:1]
+        fast, slow = self._both(route, _events(_route()))
+        self.assertEqual(fast, [])
+        self.assertEqual(slow, [])
+
+    def test_sorted_by_distance(self):
+        route = _route()
+        fast, _ = self._both(route, _events(route))
+        dists = [o["_distance_m"] for o in fast]
+        self.assertEqual(dists, sorted(dists))
+
+
+if __name__ == "__main__":
+    unittest.main()
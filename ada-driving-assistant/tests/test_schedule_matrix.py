@@ -0,0 +1,338 @@
+"""
+Tests for schedule.DurationMatrix — fleet schedule timing from OSRM /table
+requests — and the travel-time cache kept in the fleet table, against a
+local OSRM stand-in (a tiny HTTP server on localhost) and an in-memory
+fleet table, plus the fleet-level batch reads and writes of schedules.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlsplit
+
+sys.modules.pop("schedule", None)
+
+import dynamo_batch             # noqa: E402
+import schedule as sched_mod   # noqa: E402
+
+_POOL = [{"address": f"{i}, Test Street", "lat": 37.85 + 0.003 * i, "lon": -122.30 + 0.002 * (i % 7)}
+         for i in range(40)]
+
+
+def _stand_in_sec(lat1, lon1, lat2, lon2):
+    """Deterministic 'road' duration the stand-in serves (Manhattan distance)."""
+    return round((abs(lat1 - lat2) + abs(lon1 - lon2)) * 100_000 / 10.0, 1)
+
+
+class _OsrmStandIn(BaseHTTPRequestHandler):
+    requests_seen: list = []
+    fail_next = 0
+    unroutable: set = set()
+
+    def do_GET(self):
+        url    = urlsplit(self.path)
+        params = parse_qs(url.query)
+        coords = [tuple(map(float, c.split(","))) for c in url.path.rsplit("/", 1)[1].split(";")]
+        type(self).requests_seen.append(len(coords))
+        if type(self).fail_next:
+            type(self).fail_next -= 1
+            self.send_response(500)
+            self.end_headers()
+            return
+        src = [int(i) for i in params["sources"][0].split(";")]
+        dst = [int(i) for i in params["destinations"][0].split(";")]
+        rows = [[None if {coords[i], coords[j]} & type(self).unroutable
+                 else _stand_in_sec(coords[i][1], coords[i][0], coords[j][1], coords[j][0])
+                 for j in dst] for i in src]
+        body = json.dumps({"code": "Ok", "durations": rows}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FleetTable:
+    """In-memory fleet table: BatchGetItem / BatchWriteItem on a dict."""
+
+    name = "ada-fleet-config"
+
+    def __init__(self):
+        self.items = {}
+        self.meta  = MagicMock()
+        self.meta.client.batch_get_item.side_effect   = self._get
+        self.meta.client.batch_write_item.side_effect = self._write
+
+    def _get(self, RequestItems):
+        keys = [k["config_key"] for k in RequestItems[self.name]["Keys"]]
+        return {"Responses": {self.name: [self.items[k] for k in keys if k in self.items]}}
+
+    def _write(self, RequestItems):
+        for r in RequestItems[self.name]:
+            self.items[r["PutRequest"]["Item"]["config_key"]] = r["PutRequest"]["Item"]
+        return {}
+
+
+class _StandInTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _OsrmStandIn)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/table/v1/driving"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _OsrmStandIn.requests_seen = []
+        _OsrmStandIn.fail_next = 0
+        _OsrmStandIn.unroutable = set()
+        self.fleet = _FleetTable()
+        for target, value in (("OSRM_TABLE_URL", self.url), ("_tbl", self.fleet),
+                              ("_travel_stats", {"hits": 0, "misses": 0, "stored": 0})):
+            p = patch.object(sched_mod, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+
+class TestDurationMatrix(_StandInTest):
+
+    def setUp(self):
+        super().setUp()
+        # No per-leg /route calls anywhere
+        p = patch.object(sched_mod, "osrm_duration_sec", side_effect=AssertionError("per-leg OSRM call"))
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _assert_legs_match_stand_in(self, sched):
+        for r in sched["rides"]:
+            self.assertEqual(r["dh_sec"], round(_stand_in_sec(r["dh_from_lat"], r["dh_from_lon"],
+                                                              r["from_lat"], r["from_lon"])))
+            self.assertEqual(r["ride_sec"], round(_stand_in_sec(r["from_lat"], r["from_lon"],
+                                                                r["to_lat"], r["to_lon"])))
+
+    def test_fleet_in_a_few_requests(self):
+        random.seed(1)
+        v_ids  = [sched_mod.van_id(i) for i in range(1, 11)]
+        scheds = sched_mod.generate_fleet_schedules(v_ids, "2026-01-05", _POOL)
+        self.assertEqual([s["van_id"] for s in scheds], v_ids)
+        self.assertLessEqual(len(_OsrmStandIn.requests_seen), 4)
+        self.assertTrue(all(n <= sched_mod.OSRM_TABLE_MAX for n in _OsrmStandIn.requests_seen))
+        for s in scheds:
+            self.assertEqual(len(s["rides"]), sched_mod.RIDES_PER_VAN)
+            self._assert_legs_match_stand_in(s)
+
+    def test_group_larger_than_a_request_is_split_into_blocks(self):
+        points = [(p["lat"], p["lon"]) for p in _POOL]
+        with patch.object(sched_mod, "OSRM_TABLE_MAX", 10):
+            m = sched_mod.DurationMatrix()
+            m.prefetch([points])
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 64)   # 8 × 8 blocks of 5
+        self.assertTrue(all(n <= 10 for n in _OsrmStandIn.requests_seen))
+        (a, b), (c, d) = points[3], points[37]
+        self.assertEqual(m.duration_sec(a, b, c, d), _stand_in_sec(a, b, c, d))
+        self.assertEqual(m.fallback_cells, 0)
+
+    def test_failed_request_and_unroutable_cells_fall_back_per_cell(self):
+        _OsrmStandIn.fail_next = 1
+        random.seed(2)
+        sched = sched_mod.generate_van_schedule("VAN_01", "2026-01-05", _POOL, use_osrm=True)
+        r = sched["rides"][0]
+        self.assertEqual(r["ride_sec"], round(sched_mod._fallback_sec(r["from_lat"], r["from_lon"],
+                                                                      r["to_lat"], r["to_lon"])))
+
+        p, q = _POOL[0], _POOL[1]
+        _OsrmStandIn.unroutable = {(q["lon"], q["lat"])}
+        m = sched_mod.DurationMatrix()
+        m.prefetch([[(p["lat"], p["lon"]), (q["lat"], q["lon"]), (_POOL[2]["lat"], _POOL[2]["lon"])]])
+        self.assertEqual(m.duration_sec(p["lat"], p["lon"], q["lat"], q["lon"]),
+                         sched_mod._fallback_sec(p["lat"], p["lon"], q["lat"], q["lon"]))
+        self.assertEqual(m.duration_sec(p["lat"], p["lon"], _POOL[2]["lat"], _POOL[2]["lon"]),
+                         _stand_in_sec(p["lat"], p["lon"], _POOL[2]["lat"], _POOL[2]["lon"]))
+        self.assertEqual(m.fallback_cells, 1)
+
+    def test_recompute_uses_one_request(self):
+        random.seed(3)
+        sched = sched_mod.generate_van_schedule("VAN_02", "2026-01-05", _POOL)   # straight-line
+        self.assertEqual(_OsrmStandIn.requests_seen, [])
+        sched_mod.recompute_schedule_timing(sched)
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 1)
+        self._assert_legs_match_stand_in(sched)
+        self.assertEqual(sched["rtb_sec"], round(_stand_in_sec(sched["rtb_from_lat"], sched["rtb_from_lon"],
+                                                               sched_mod.BASE_LAT, sched_mod.BASE_LON)))
+
+
+class TestTravelTimeCache(_StandInTest):
+
+    def _prefetch_leg(self, p, q):
+        a, b = (p["lat"], p["lon"]), (q["lat"], q["lon"])
+        sched_mod.DurationMatrix().prefetch([[a, b]], [[(a, b)]])
+
+    def test_next_day_is_served_from_cache(self):
+        v_ids = [sched_mod.van_id(i) for i in range(1, 4)]
+        random.seed(4)
+        first = sched_mod.generate_fleet_schedules(v_ids, "2026-01-05", _POOL)
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 1)
+        random.seed(4)
+        again = sched_mod.generate_fleet_schedules(v_ids, "2026-01-06", _POOL)
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 1)
+        self.assertEqual([s["rides"] for s in again], [s["rides"] for s in first])
+        stats = sched_mod.travel_time_stats()
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertGreater(stats["stored"], 0)
+
+    def test_only_schedule_legs_are_stored(self):
+        v_ids = [sched_mod.van_id(i) for i in range(1, 11)]
+        client = self.fleet.meta.client
+        random.seed(5)
+        sched_mod.generate_fleet_schedules(v_ids, "2026-01-05", _POOL)
+        legs = len(v_ids) * (2 * sched_mod.RIDES_PER_VAN + 1)   # fewer stored where vans share a leg
+        self.assertLessEqual(len(self.fleet.items), legs)
+        self.assertTrue(all(k.startswith("travel#") for k in self.fleet.items))
+        self.assertLessEqual(client.batch_get_item.call_count, -(-legs // dynamo_batch.BATCH_GET_SIZE))
+        self.assertLessEqual(client.batch_write_item.call_count, -(-legs // dynamo_batch.BATCH_WRITE_SIZE))
+
+    def test_partly_cached_group_stores_only_new_legs(self):
+        random.seed(6)
+        sched = sched_mod.generate_van_schedule("VAN_01", "2026-01-05", _POOL, use_osrm=True)
+        key = next(iter(self.fleet.items))
+        del self.fleet.items[key]
+        writes = self.fleet.meta.client.batch_write_item.call_count
+        sched_mod.recompute_schedule_timing(sched)
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 2)
+        self.assertEqual(self.fleet.meta.client.batch_write_item.call_count, writes + 1)
+        written = self.fleet.meta.client.batch_write_item.call_args.kwargs["RequestItems"]
+        self.assertEqual([r["PutRequest"]["Item"]["config_key"] for r in written[self.fleet.name]], [key])
+
+    def test_optimizer_matrix_is_not_cached(self):
+        random.seed(7)
+        sched_mod.optimize_fleet_schedules([sched_mod.van_id(i) for i in range(1, 4)], "2026-01-05", _POOL)
+        self.assertEqual(self.fleet.items, {})
+        self.fleet.meta.client.batch_get_item.assert_not_called()
+
+    def test_single_leg_lookup_uses_cache(self):
+        p, q = _POOL[5], _POOL[9]
+        self._prefetch_leg(p, q)
+        with patch.object(sched_mod.requests, "get", side_effect=AssertionError("network")):
+            self.assertEqual(sched_mod.osrm_duration_sec(p["lat"], p["lon"], q["lat"], q["lon"]),
+                             _stand_in_sec(p["lat"], p["lon"], q["lat"], q["lon"]))
+        self.assertEqual(sched_mod.travel_time_stats()["hits"], 1)
+
+    def test_entries_expire(self):
+        p, q = _POOL[5], _POOL[9]
+        with patch.object(sched_mod, "TRAVEL_TIME_TTL_S", -1):
+            self._prefetch_leg(p, q)
+        self._prefetch_leg(p, q)
+        self._prefetch_leg(p, q)
+        self.assertEqual(len(_OsrmStandIn.requests_seen), 2)
+
+    def test_keys_use_the_point_precision(self):
+        p, q = sched_mod._point(37.8712341, -122.2687654), sched_mod._point(37.8598761, -122.2912349)
+        sched_mod.DurationMatrix().prefetch([[p, q]], [[(p, q)]])
+        self.assertEqual(list(self.fleet.items), ["travel#driving#37.871234,-122.268765;37.859876,-122.291235"])
+        # Points a few centimetres apart are distinct legs, as they are in DurationMatrix
+        near = sched_mod._point(37.8712349, -122.2687654)
+        self.assertNotEqual(sched_mod._travel_key(p, q), sched_mod._travel_key(near, q))
+
+    def test_table_errors_only_cost_requests(self):
+        p, q = _POOL[5], _POOL[9]
+        self.fleet.meta.client.batch_get_item.side_effect = RuntimeError("table unavailable")
+        self.fleet.meta.client.batch_write_item.side_effect = RuntimeError("table unavailable")
+        a, b = (p["lat"], p["lon"]), (q["lat"], q["lon"])
+        with self.assertLogs("schedule", level="WARNING"):
+            m = sched_mod.DurationMatrix()
+            m.prefetch([[a, b]], [[(a, b)]])
+        self.assertEqual(m.duration_sec(*a, *b), _stand_in_sec(*a, *b))
+        self.assertEqual(sched_mod.travel_time_stats()["stored"], 0)
+
+
+class TestFleetStore(unittest.TestCase):
+    """save_schedules / get_schedules against an in-memory BatchWriteItem / BatchGetItem."""
+
+    def setUp(self):
+        self.items = {}
+        self.calls = {"write": [], "get": []}
+        self.table = MagicMock()
+        self.table.name = "ada-fleet-config"
+        self.table.meta.client.batch_write_item.side_effect = self._write
+        self.table.meta.client.batch_get_item.side_effect = self._get
+        for module, target, value in ((sched_mod, "_tbl", self.table),
+                                      (dynamo_batch, "backoff", lambda attempt: None)):
+            p = patch.object(module, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.throttle_once = False
+
+    def _write(self, RequestItems):
+        reqs = RequestItems[self.table.name]
+        self.calls["write"].append(len(reqs))
+        unprocessed = reqs[:2] if self.throttle_once else []
+        self.throttle_once = False
+        for r in reqs[len(unprocessed):]:
+            self.items[r["PutRequest"]["Item"]["config_key"]] = r["PutRequest"]["Item"]
+        return {"UnprocessedItems": {self.table.name: unprocessed}} if unprocessed else {}
+
+    def _get(self, RequestItems):
+        keys = RequestItems[self.table.name]["Keys"]
+        self.calls["get"].append(len(keys))
+        served, rest = (keys[:-1], keys[-1:]) if len(keys) > 3 else (keys, [])
+        resp = {"Responses": {self.table.name: [self.items[k["config_key"]] for k in served
+                                                if k["config_key"] in self.items]}}
+        if rest:
+            resp["UnprocessedKeys"] = {self.table.name: {"Keys": rest}}
+        return resp
+
+    def test_generate_save_and_read_back(self):
+        v_ids = [sched_mod.van_id(i) for i in range(1, 31)]
+        self.throttle_once = True
+        result = sched_mod.generate_and_save_fleet(v_ids, "2026-01-05", _POOL, use_osrm=False)
+        self.assertEqual(result, {"generated": v_ids, "errors": []})
+        self.assertEqual(self.calls["write"], [25, 2, 5])
+        self.table.put_item.assert_not_called()
+
+        with patch.object(sched_mod, "get_active_vans", return_value=[3, 1, 40, 2]):
+            scheds = sched_mod.get_all_schedules("2026-01-05")
+        self.assertEqual([s["van_id"] for s in scheds], ["VAN_03", "VAN_01", "VAN_02"])
+        self.assertEqual(self.calls["get"], [4, 1])          # one round trip + an unprocessed key
+        self.assertEqual(len(scheds[0]["rides"]), sched_mod.RIDES_PER_VAN)
+        self.assertIsInstance(scheds[0]["rides"][0]["from_lat"], float)
+        self.table.get_item.assert_not_called()
+
+    def test_unwritten_vans_are_reported(self):
+        self.table.meta.client.batch_write_item.side_effect = lambda RequestItems: {"UnprocessedItems": RequestItems}
+        result = sched_mod.generate_and_save_fleet(["VAN_01", "VAN_02"], "2026-01-05", _POOL, use_osrm=False)
+        self.assertEqual(result["generated"], [])
+        self.assertEqual([e["van_id"] for e in result["errors"]], ["VAN_01", "VAN_02"])
+        self.assertIn("unprocessed", result["errors"][0]["error"])
+
+    def test_rejected_schedule_reports_its_error(self):
+        from botocore.exceptions import ClientError
+
+        def _write(RequestItems):
+            if any(r["PutRequest"]["Item"]["van_id"] == "VAN_02" for r in RequestItems[self.table.name]):
+                raise ClientError({"Error": {"Code": "ValidationException",
+                                             "Message": "Item size has exceeded the maximum"}},
+                                  "BatchWriteItem")
+            return self._write(RequestItems)
+
+        self.table.meta.client.batch_write_item.side_effect = _write
+        v_ids  = [sched_mod.van_id(i) for i in range(1, 4)]
+        with self.assertLogs("dynamo_batch", level="ERROR"):
+            result = sched_mod.generate_and_save_fleet(v_ids, "2026-01-05", _POOL, use_osrm=False)
+        self.assertEqual(result["generated"], ["VAN_01", "VAN_03"])
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertIn("Item size has exceeded the maximum", result["errors"][0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Tests for the bounded session history in sessions.py: the verbatim window
+and its stable prefix, the token budget, and compaction of old turns into
+the archive and the running summary.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# test_lambda_handler.py stubs sessions as a MagicMock module — load the real one.
+sys.modules.pop("sessions", None)
+
+import sessions  # noqa: E402
+
+
+class _FileBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = os.path.join(tmp.name, "archive")
+        for name, value in (("_TABLE_NAME", None),
+                            ("_SESSIONS_FILE", os.path.join(tmp.name, "sessions.json")),
+                            ("_ARCHIVE_DIR", self.archive_dir),
+                            ("HISTORY_TURNS", 3),
+                            ("HISTORY_TOKEN_BUDGET", 2000)):
+            p = patch.object(sessions, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.sid = sessions.create_session("2020 Telegraph Ave", 37.866, -122.259, 0, "N")["id"]
+
+    def _chat(self, turns, start=1):
+        for n in range(start, start + turns):
+            sessions.add_message(self.sid, "user", f"Question {n}: is Shattuck clear?")
+            sessions.add_message(self.sid, "assistant", f"Answer {n}. Shattuck is clear. No cones.")
+
+
+class TestHistoryWindow(_FileBackendTest):
+
+    def test_short_drive_is_sent_verbatim(self):
+        self._chat(2)
+        window = sessions.history_window(self.sid)
+        self.assertEqual(window["turns"], [1, 2])
+        self.assertEqual(window["total_turns"], 2)
+        self.assertEqual(window["summarized_turns"], 0)
+        self.assertFalse(window["summary_included"])
+        self.assertEqual([m["role"] for m in window["messages"]], ["user", "assistant"] * 2)
+        self.assertEqual(window["messages"], sessions.get_history(self.sid))
+        self.assertEqual(window["tokens"], sum(sessions._tokens(m["content"]) for m in window["messages"]))
+
+    def test_every_stored_turn_is_sent(self):
+        self._chat(5)   # below the compaction threshold: all five still stored
+        window = sessions.history_window(self.sid)
+        self.assertEqual(len(sessions.get_session(self.sid)["messages"]), 10)
+        self.assertEqual(window["turns"], [1, 2, 3, 4, 5])
+        self.assertTrue(window["messages"][0]["content"].startswith("Question 1"))
+
+    def test_prefix_is_unchanged_across_turns_past_the_limit(self):
+        self._chat(7)   # compacts after turn 7: turns 5-7 stored
+        history = sessions.get_history(self.sid)
+        for n in (8, 9, 10):
+            self._chat(1, start=n)
+            longer = sessions.get_history(self.sid)
+            self.assertEqual(longer[:len(history)], history)
+            self.assertEqual(len(longer), len(history) + 2)
+            history = longer
+        self.assertEqual(sessions.history_window(self.sid)["turns"], [5, 6, 7, 8, 9, 10])
+
+    def test_unknown_session(self):
+        window = sessions.history_window("missing")
+        self.assertEqual((window["messages"], window["turns"]), ([], []))
+
+
+class TestCompaction(_FileBackendTest):
+
+    def test_old_turns_move_to_the_archive_and_summary(self):
+        self._chat(7)   # 3 in the window + 4 beyond it: compacts after turn 7
+        s = sessions.get_session(self.sid)
+        self.assertEqual(s["archived_turns"], 4)
+        self.assertEqual(len(s["messages"]), 6)
+        self.assertEqual(s["summary"].count("\n"), 3)
+        self.assertIn("- Q: Question 1: is Shattuck clear? A: Answer 1.", s["summary"])
+
+        with open(s["archive_keys"][0]) as f:
+            archived = json.load(f)
+        self.assertEqual(archived["first_turn"], 1)
+        self.assertEqual([m["content"] for m in archived["messages"]][::2],
+                         [f"Question {n}: is Shattuck clear?" for n in range(1, 5)])
+
+        window = sessions.history_window(self.sid)
+        self.assertEqual(window["turns"], [5, 6, 7])
+        self.assertEqual(window["total_turns"], 7)
+        self.assertEqual(window["summarized_turns"], 4)
+        self.assertTrue(window["summary_included"])
+        first = window["messages"][0]["content"]
+        self.assertTrue(first.startswith("[Earlier in this drive]\n- Q: Question 1"))
+        self.assertTrue(first.endswith("Question 5: is Shattuck clear?"))
+
+    def test_window_is_stable_between_compactions(self):
+        self._chat(7)
+        prefix = sessions.get_history(self.sid)
+        self._chat(3, start=8)
+        self.assertEqual(sessions.history_window(self.sid)["turns"], [5, 6, 7, 8, 9, 10])
+        self.assertEqual(sessions.get_session(self.sid)["archived_turns"], 4)
+        self._chat(1, start=11)
+        s = sessions.get_session(self.sid)
+        self.assertEqual((s["archived_turns"], len(s["archive_keys"])), (8, 2))
+        self.assertNotEqual(sessions.get_history(self.sid), prefix)
+
+    def test_token_budget_compacts_early(self):
+        self._chat(2)
+        per_turn = sessions.history_window(self.sid)["tokens"] // 2
+        with patch.object(sessions, "HISTORY_TOKEN_BUDGET", per_turn * 3 - 2):
+            self._chat(1, start=3)   # three turns exceed the budget: compacts below half of it
+            s = sessions.get_session(self.sid)
+            self.assertEqual(s["archived_turns"], 2)
+            window = sessions.history_window(self.sid)
+        self.assertEqual(window["turns"], [3])
+        self.assertLessEqual(window["tokens"], window["token_budget"])
+
+    def test_summary_is_bounded(self):
+        with patch.object(sessions, "_SUMMARY_MAX_CHARS", 200):
+            self._chat(15)
+        summary = sessions.get_session(self.sid)["summary"]
+        self.assertLessEqual(len(summary), 200)
+        self.assertNotIn("Question 1:", summary)
+
+    def test_archive_failure_keeps_messages(self):
+        self._chat(6)
+        with patch.object(sessions, "_archive_put", side_effect=OSError("disk full")), \
+             self.assertLogs("sessions", level="WARNING"):
+            self._chat(1, start=7)
+        s = sessions.get_session(self.sid)
+        self.assertEqual(len(s["messages"]), 14)
+        self.assertNotIn("summary", s)
+
+
+class TestDynamoCompaction(unittest.TestCase):
+
+    def test_removes_archived_messages_by_index(self):
+        messages = [{"role": r, "content": f"{r} {n}"} for n in range(8) for r in ("user", "assistant")]
+        session  = {"id": "s1", "messages": messages, "archived_turns": 2}
+        table, s3 = MagicMock(), MagicMock()
+        with patch.object(sessions, "_TABLE_NAME", "sessions"), \
+             patch.object(sessions, "_S3_BUCKET", "bucket"), \
+             patch.object(sessions, "HISTORY_TURNS", 3), \
+             patch.object(sessions, "_table", return_value=table), \
+             patch("boto3.client", return_value=s3):
+            self.assertTrue(sessions.compact_history(session))
+
+        put = s3.put_object.call_args.kwargs
+        self.assertEqual(put["Key"], "session-archive/s1/00003.json")
+        self.assertEqual(len(json.loads(put["Body"])["messages"]), 10)
+
+        kw = table.update_item.call_args.kwargs
+        self.assertTrue(kw["UpdateExpression"].startswith(
+            "REMOVE " + ", ".join(f"messages[{i}]" for i in range(10)) + " SET"))
+        self.assertEqual(kw["ExpressionAttributeValues"][":n"], 7)
+        self.assertEqual(kw["ExpressionAttributeValues"][":prev"], 2)
+        self.assertEqual(kw["ExpressionAttributeValues"][":key"], ["s3://bucket/session-archive/s1/00003.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for street_binary.py — compact memory-mapped city streets format.
+
+Round-trips a small synthetic streets dict through the binary file and
+checks the lazy segments behave like the JSON lists they replace.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Other test files stub location as a MagicMock module — load the real one.
+for _key in ("location", "street_index", "street_binary"):
+    sys.modules.pop(_key, None)
+
+import street_binary                                         # noqa: E402
+from street_binary import (PointList, bin_path, load_streets_bin,   # noqa: E402
+                           preferred_path, read_streets, write_streets_bin)
+from street_index import StreetIndex                         # noqa: E402
+
+
+def _seg(*pts):
+    return [{"lat": a, "lon": b} for a, b in pts]
+
+
+_DATA = {
+    "city": "Berkeley", "state": "CA", "country": "US",
+    "bbox": {"south": 37.84, "west": -122.32, "north": 37.91, "east": -122.23},
+    "streets": [
+        {"name": "Oak Street", "highway": "residential", "lanes_forward": 1, "lanes_backward": 1,
+         "segments": [_seg((37.8700, -122.2700), (37.8700, -122.2680), (37.8701, -122.2660)),
+                      _seg((37.8701, -122.2660), (37.8705, -122.2650))]},
+        {"name": "Avenida Drive", "highway": "tertiary", "lanes_forward": 2, "lanes_backward": 0,
+         "segments": [_seg((37.8690, -122.2690), (37.8710, -122.2690))]},
+        {"name": "Stub Lane", "highway": "residential",
+         "segments": [_seg((37.8800, -122.2800))]},
+        {"name": "Oak Street", "highway": "residential", "lanes_forward": 1, "lanes_backward": 1,
+         "segments": []},
+    ],
+}
+
+
+class TestStreetBinary(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.json_path = os.path.join(self._tmp.name, "city_streets.json")
+        with open(self.json_path, "w") as f:
+            json.dump(_DATA, f)
+        self.path = bin_path(self.json_path)
+        write_streets_bin(_DATA, self.path)
+
+    def test_round_trip_equals_json(self):
+        self.assertEqual(load_streets_bin(self.path), _DATA)
+
+    def test_round_trip_without_numpy(self):
+        with patch.object(street_binary, "np", None):
+            self.assertEqual(load_streets_bin(self.path), _DATA)
+
+    def test_legacy_waypoints_become_one_segment(self):
+        legacy = {"streets": [{"name": "Old Road", "highway": "residential",
+                               "waypoints": _seg((37.87, -122.27), (37.88, -122.26))}]}
+        write_streets_bin(legacy, self.path)
+        street = load_streets_bin(self.path)["streets"][0]
+        self.assertEqual(street["segments"], [legacy["streets"][0]["waypoints"]])
+        self.assertNotIn("lanes_forward", street)
+
+    def test_segments_are_lazy_point_lists(self):
+        seg = load_streets_bin(self.path)["streets"][0]["segments"][0]
+        self.assertIsInstance(seg, PointList)
+        self.assertEqual(len(seg), 3)
+        self.assertEqual(seg[-1], {"lat": 37.8701, "lon": -122.2660})
+        self.assertEqual(seg[1:], _DATA["streets"][0]["segments"][0][1:])
+        self.assertIs(type(seg[0]["lat"]), float)
+        self.assertEqual(seg.bbox(), (37.87, -122.27, 37.8701, -122.266))
+        self.assertEqual(seg.coords()[0], (37.87, -122.27))
+
+    def test_read_streets_by_extension(self):
+        self.assertEqual(read_streets(self.json_path), read_streets(self.path))
+
+    def test_preferred_path_skips_stale_binary(self):
+        self.assertEqual(preferred_path(self.json_path), self.path)
+        later = time.time() + 10
+        os.utime(self.json_path, (later, later))
+        self.assertEqual(preferred_path(self.json_path), self.json_path)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            load_streets_bin(self.json_path)
+
+    def test_street_index_same_results(self):
+        from_json = StreetIndex(_DATA)
+        from_bin  = StreetIndex(load_streets_bin(self.path))
+        self.assertEqual(from_bin.named, from_json.named)
+        self.assertEqual(from_bin.segments_in_radius(37.87, -122.268, 300),
+                         from_json.segments_in_radius(37.87, -122.268, 300))
+        self.assertEqual(from_bin.closest_point_pair("Oak Street", "Avenida Drive", 500),
+                         from_json.closest_point_pair("Oak Street", "Avenida Drive", 500))
+        self.assertEqual(from_bin.intersection("Oak Street", "Avenida Drive"),
+                         from_json.intersection("Oak Street", "Avenida Drive"))
+
+
+if __name__ == "__main__":
+    unittest.main()
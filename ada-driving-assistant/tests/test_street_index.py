@@ -0,0 +1,122 @@
+"""
+Tests for street_index.py — grid index over city_streets.json segments.
+
+Uses a tiny synthetic streets file so results can be checked against a
+brute-force scan without touching the real data.
+"""
+
+import sys
+import unittest
+
+# Other test files stub location as a MagicMock module — load the real one.
+for _key in ("location", "street_index"):
+    sys.modules.pop(_key, None)
+
+from location import haversine_m            # noqa: E402
+from street_index import StreetIndex         # noqa: E402
+
+
+def _seg(*pts):
+    return [{"lat": a, "lon": b} for a, b in pts]
+
+
+_DATA = {
+    "streets": [
+        {"name": "Oak Street", "highway": "residential",
+         "segments": [_seg((37.8700, -122.2700), (37.8700, -122.2680)),
+                      _seg((37.8700, -122.2680), (37.8700, -122.2660))]},
+        {"name": "Pine Avenue", "highway": "tertiary",
+         "segments": [_seg((37.8690, -122.2690), (37.8710, -122.2690))]},
+        {"name": "Far Road", "highway": "residential",
+         "segments": [_seg((37.9000, -122.3000), (37.9010, -122.3000))]},
+        {"name": "Unnamed_residential_1", "highway": "residential",
+         "segments": [_seg((37.8701, -122.2701), (37.8702, -122.2702))]},
+        {"name": "Stub Lane", "highway": "residential",
+         "segments": [_seg((37.8800, -122.2800))]},
+    ],
+}
+
+
+class TestStreetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = StreetIndex(_DATA)
+
+    def test_named_excludes_unnamed(self):
+        self.assertEqual(self.index.named,
+                         ["Oak Street", "Pine Avenue", "Far Road", "Stub Lane"])
+
+    def test_usable_named_requires_two_points(self):
+        names = [self.index.streets[i]["name"] for i in self.index.usable_named]
+        self.assertNotIn("Stub Lane", names)
+        self.assertIn("Oak Street", names)
+
+    def test_radius_query_is_superset_of_exact_hits_in_file_order(self):
+        lat, lon = 37.8700, -122.2690
+        sids = self.index.segments_in_radius(lat, lon, 300)
+        self.assertEqual(sids, sorted(sids))
+        for sid in range(len(self.index)):
+            _, seg = self.index.segment(sid)
+            if any(haversine_m(lat, lon, p["lat"], p["lon"]) <= 300 for p in seg):
+                self.assertIn(sid, sids)
+        far = [self.index.segment(s)[0]["name"] for s in sids]
+        self.assertNotIn("Far Road", far)
+
+    def test_nearest_segment(self):
+        street, seg, dist = self.index.nearest_segment(37.8705, -122.2690, max_m=200)
+        self.assertEqual(street["name"], "Pine Avenue")
+        self.assertLess(dist, 1.0)
+
+    def test_nearest_segment_none_beyond_max(self):
+        self.assertIsNone(self.index.nearest_segment(37.95, -122.35, max_m=200))
+
+    def test_closest_point_pair_matches_brute_force(self):
+        dist, p1, p2 = self.index.closest_point_pair("Oak Street", "Pine Avenue", max_m=500)
+        pts1 = self.index.street_points("Oak Street")
+        pts2 = self.index.street_points("Pine Avenue")
+        brute = min(haversine_m(a["lat"], a["lon"], b["lat"], b["lon"])
+                    for a in pts1 for b in pts2)
+        self.assertAlmostEqual(dist, brute)
+
+    def test_closest_point_pair_none_when_too_far(self):
+        self.assertIsNone(self.index.closest_point_pair("Oak Street", "Far Road", max_m=80))
+
+    def test_streets_named_is_case_insensitive(self):
+        self.assertEqual(len(self.index.streets_named("oak street")), 1)
+
+
+class TestIntersections(unittest.TestCase):
+
+    def setUp(self):
+        self.index = StreetIndex({"streets": [
+            {"name": "Oak Street", "highway": "residential",
+             "segments": [_seg((37.8700, -122.2700), (37.8700, -122.2680), (37.8700, -122.2660))]},
+            {"name": "Pine Avenue", "highway": "tertiary",
+             "segments": [_seg((37.8690, -122.2680), (37.8700, -122.2680), (37.8710, -122.2680))]},
+            {"name": "Loop Road", "highway": "residential",
+             "segments": [_seg((37.8700, -122.2660), (37.8710, -122.2670)),
+                          _seg((37.8710, -122.2690), (37.8700, -122.2700))]},
+            {"name": "Unnamed_residential_1", "highway": "residential",
+             "segments": [_seg((37.8700, -122.2700), (37.8690, -122.2700))]},
+        ]})
+
+    def _brute(self, a, b):
+        _, p1, p2 = self.index.closest_point_pair(a, b, max_m=80)
+        return (p1["lat"] + p2["lat"]) / 2, (p1["lon"] + p2["lon"]) / 2
+
+    def test_shared_node(self):
+        self.assertEqual(self.index.intersection("oak street", "Pine Avenue"), (37.87, -122.268))
+
+    def test_several_shared_nodes_follow_first_street_order(self):
+        for a, b in (("Oak Street", "Loop Road"), ("Loop Road", "Oak Street")):
+            self.assertEqual(self.index.intersection(a, b), self._brute(a, b))
+        self.assertNotEqual(self.index.intersection("Oak Street", "Loop Road"),
+                            self.index.intersection("Loop Road", "Oak Street"))
+
+    def test_no_shared_node(self):
+        self.assertIsNone(self.index.intersection("Pine Avenue", "Loop Road"))
+        self.assertIsNone(self.index.intersection("Oak Street", "Unnamed_residential_1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests for street_matcher.py and the question parsers that share it.
+
+Uses a handful of synthetic street names; the parking tests swap a matcher
+built from them into location's streets cache so no real data is loaded.
+"""
+
+import sys
+import unittest
+from unittest.mock import patch
+
+# Other test files stub location/parking as MagicMock modules — load the real ones.
+for _key in ("location", "parking", "street_index", "street_matcher"):
+    sys.modules.pop(_key, None)
+
+import location                                     # noqa: E402
+import parking                                      # noqa: E402
+from street_matcher import StreetMatcher, street_stem   # noqa: E402
+
+_NAMES = ["Shattuck Avenue", "University Avenue", "Ashby Ave", "A Street",
+          "Broadway", "Telegraph Avenue", "Manoa Street", "Ensenada Avenue"]
+
+
+class TestStreetMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = StreetMatcher(_NAMES)
+
+    def _kinds(self, question):
+        return {(m.name, m.kind) for m in self.matcher.mentions(question)}
+
+    def test_full_name_span(self):
+        q = "Is Telegraph Avenue open?"
+        [m] = [m for m in self.matcher.mentions(q) if m.kind == "full"]
+        self.assertEqual(m.name, "Telegraph Avenue")
+        self.assertEqual(q.lower()[m.start:m.end], "telegraph avenue")
+
+    def test_full_name_is_substring_match(self):
+        # Stored "Ashby Ave" is found inside "Ashby Avenue"
+        self.assertIn(("Ashby Ave", "full"), self._kinds("cones on ashby avenue"))
+
+    def test_abbreviated_variant_needs_word_boundary(self):
+        self.assertIn(("Shattuck Avenue", "abbrev"), self._kinds("shattuck ave. north"))
+        self.assertNotIn(("Shattuck Avenue", "abbrev"), self._kinds("shattuck avex"))
+
+    def test_stem_is_whole_word(self):
+        self.assertIn(("Shattuck Avenue", "stem"), self._kinds("near shattuck"))
+        self.assertNotIn(("Shattuck Avenue", "stem"), self._kinds("near shattucks"))
+        self.assertNotIn(("A Street", "stem"), self._kinds("ensenada and manoa"))
+
+    def test_overlapping_mentions(self):
+        names = {m.name for m in self.matcher.mentions("manoa street")}
+        self.assertEqual(names, {"Manoa Street", "A Street"})
+
+    def test_names_in_file_order(self):
+        q = "telegraph avenue and shattuck avenue"
+        self.assertEqual(self.matcher.names_in(q), ["Shattuck Avenue", "Telegraph Avenue"])
+
+    def test_street_stem(self):
+        self.assertEqual(street_stem("University Avenue"), "university")
+        self.assertEqual(street_stem("Broadway"), "broadway")
+
+
+class TestParsersShareMatcher(unittest.TestCase):
+
+    def setUp(self):
+        matcher = StreetMatcher(_NAMES)
+        p = patch.object(location, "_street_matcher", return_value=matcher)
+        p.start()
+        self.addCleanup(p.stop)
+        p = patch.object(parking, "_street_matcher", return_value=matcher)
+        p.start()
+        self.addCleanup(p.stop)
+        p = patch.object(parking, "_find_intersection", side_effect=lambda a, b, city=None: (a, b))
+        self.intersection = p.start()
+        self.addCleanup(p.stop)
+
+    def test_find_streets_mentioned_uses_full_names(self):
+        self.assertEqual(location.find_streets_mentioned("Traffic on Shattuck Avenue?"),
+                         ["Shattuck Avenue"])
+        self.assertEqual(location.find_streets_mentioned("Traffic on Shattuck?"), [])
+
+    def test_intersection_with_abbreviations(self):
+        lat, lon, _ = parking.extract_intersection_anchor("park near Shattuck Ave and University Ave")
+        self.assertEqual((lat, lon), ("Shattuck Avenue", "University Avenue"))
+
+    def test_intersection_with_stems(self):
+        lat, lon, _ = parking.extract_intersection_anchor("around university and shattuck")
+        self.assertEqual({lat, lon}, {"Shattuck Avenue", "University Avenue"})
+
+    def test_intersection_name_without_type_word(self):
+        lat, lon, _ = parking.extract_intersection_anchor("parking at Broadway and Telegraph")
+        self.assertEqual({lat, lon}, {"Broadway", "Telegraph Avenue"})
+
+    def test_intersection_ignores_stem_inside_word(self):
+        lat, lon, _ = parking.extract_intersection_anchor("parking near Ensenada and Manoa")
+        self.assertEqual({lat, lon}, {"Ensenada Avenue", "Manoa Street"})
+
+    def test_no_intersection_without_and(self):
+        self.assertIsNone(parking.extract_intersection_anchor("Shattuck or University?"))
+        self.intersection.assert_not_called()
+
+    def test_single_street_branch(self):
+        with patch.object(parking, "parking_on_street", return_value={"best_street": "x"}) as on:
+            parking.get_parking_context("parking on Telegraph Ave?")
+        on.assert_called_once_with("Telegraph Avenue", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for street_registry.py — per-city street snapshots under a memory budget —
+and the multi-city lookups in location.py and parking.py built on it.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Other test files stub location/parking as MagicMock modules — load the real ones.
+for _key in ("location", "parking", "parking_blocks", "street_index", "street_binary",
+             "street_matcher", "street_registry"):
+    sys.modules.pop(_key, None)
+
+import location                                                        # noqa: E402
+import parking                                                         # noqa: E402
+from street_registry import (CITIES, StreetRegistry, cities_at,       # noqa: E402
+                             cities_in_bbox)
+
+
+def _street(name, lat, lon):
+    return {"name": name, "highway": "residential",
+            "segments": [[{"lat": lat, "lon": lon}, {"lat": lat, "lon": lon + 0.001}],
+                         [{"lat": lat, "lon": lon + 0.001}, {"lat": lat, "lon": lon + 0.002}]]}
+
+
+class TestCityRouting(unittest.TestCase):
+
+    def test_point_in_nested_boxes_gets_smallest_first(self):
+        self.assertEqual(cities_at(37.8715, -122.2730)[0], "Berkeley")
+        self.assertIn("Oakland", cities_at(37.8715, -122.2730))
+        self.assertEqual(cities_at(37.8400, -122.2900)[0], "Emeryville")
+
+    def test_point_outside_every_city(self):
+        self.assertEqual(cities_at(37.7749, -122.4194), [])                     # San Francisco
+        self.assertEqual(location.street_cities(37.7749, -122.4194), ["Berkeley"])
+        self.assertEqual(location.street_cities(), ["Berkeley"])
+
+    def test_bbox_spanning_cities(self):
+        found = cities_in_bbox(37.80, -122.30, 37.93, -122.28)
+        self.assertTrue({"Berkeley", "ElCerrito", "Emeryville", "Oakland"} <= set(found))
+        self.assertEqual(location.street_cities(bbox=(37.95, -122.40, 37.96, -122.39)),
+                         ["Richmond"])
+
+
+class TestStreetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.built = []
+
+        def build(city, warm):
+            self.built.append(city)
+            return {"city": city, "cost": 40}
+
+        self.registry = StreetRegistry(build, lambda city, snap: False,
+                                       budget_bytes=100, revalidate_s=300)
+
+    def test_loads_each_city_once(self):
+        first = self.registry.snapshot("Albany")
+        self.assertIs(self.registry.snapshot("Albany"), first)
+        self.assertEqual(self.built, ["Albany"])
+
+    def test_evicts_least_recently_used_over_budget(self):
+        self.registry.snapshot("Albany")
+        self.registry.snapshot("Oakland")
+        self.registry.snapshot("Albany")           # Oakland is now least recently used
+        self.registry.snapshot("Richmond")
+        self.assertEqual(self.registry.loaded(), ["Albany", "Richmond"])
+        stats = self.registry.stats()
+        self.assertEqual((stats["loads"], stats["evictions"], stats["resident_bytes"]), (3, 1, 80))
+
+    def test_city_larger_than_budget_stays_resident(self):
+        self.registry.budget_bytes = 10
+        self.registry.snapshot("Albany")
+        self.registry.snapshot("Oakland")
+        self.assertEqual(self.registry.loaded(), ["Oakland"])
+
+    def test_unknown_city(self):
+        with self.assertRaises(KeyError):
+            self.registry.snapshot("Gotham")
+        self.assertEqual(self.built, [])
+
+
+class TestMultiCityLookups(unittest.TestCase):
+    """Berkeley and Albany files in a temp dir; lookups route between them."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        files = {"Berkeley": [_street("Oak Street", 37.8800, -122.3000)],
+                 "Albany":   [_street("Solano Avenue", 37.8900, -122.3000),
+                              _street("Oak Street", 37.8800, -122.3000)]}   # shared border street
+        for city, streets in files.items():
+            with open(os.path.join(tmp.name, CITIES[city].filename), "w") as f:
+                json.dump({"city": city, "streets": streets}, f)
+
+        self.registry = StreetRegistry(location._build_streets_snapshot, location._streets_changed,
+                                       budget_bytes=1 << 30, revalidate_s=300)
+        for target, value in (("_STREETS_DIR", tmp.name),
+                              ("_STREETS_TMP_DIR", os.path.join(tmp.name, "none")),
+                              ("_S3_BUCKET", None),
+                              ("_streets", self.registry)):
+            p = patch.object(location, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        p = patch.object(parking, "_is_daytime", return_value=True)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_street_names_from_requested_cities_only(self):
+        q = "Any hazards on Solano Avenue or Oak Street?"
+        self.assertEqual(location.find_streets_mentioned(q), ["Oak Street"])
+        self.assertEqual(self.registry.loaded(), ["Berkeley"])
+        self.assertEqual(location.find_streets_mentioned(q, cities=["Berkeley", "Albany"]),
+                         ["Oak Street", "Solano Avenue"])
+
+    def test_missing_city_file_is_skipped(self):
+        self.assertEqual(location.find_streets_mentioned("Oak Street?", cities=["Oakland", "Berkeley"]),
+                         ["Oak Street"])
+
+    def test_parking_near_merges_cities_once(self):
+        result = parking.parking_near(37.8800, -122.2990, 300)
+        self.assertEqual(len(result["blocks"]), 2)   # the Albany copies of Oak Street are dropped
+        self.assertIn("Albany", self.registry.loaded())
+
+    def test_parking_on_street_in_destination_city(self):
+        result = parking.get_parking_context("parking on Solano Avenue?",
+                                             dest_lat=37.8900, dest_lon=-122.2990)
+        self.assertEqual(result["best_street"], "Solano Avenue")
+        self.assertTrue(result["ask_cross_street"])
+
+    def test_random_location_in_city(self):
+        with patch.object(location, "reverse_geocode", return_value="Solano Ave"):
+            self.assertIn(location.random_location("Albany")["street"],
+                          ("Solano Avenue", "Oak Street"))
+            self.assertEqual(location.random_location()["street"], "Oak Street")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests for location's streets cache — fingerprint revalidation and the
+background snapshot swap.
+
+Points location at a temporary streets file; the revalidation thread is
+captured and run by hand so each step can be checked.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Other test files stub location as a MagicMock module — load the real one.
+for _key in ("location", "street_index", "street_binary", "street_matcher", "street_registry"):
+    sys.modules.pop(_key, None)
+
+import location                              # noqa: E402
+import street_registry                       # noqa: E402
+from street_registry import StreetRegistry   # noqa: E402
+
+
+def _data(*names):
+    return {"streets": [{"name": n, "highway": "residential",
+                         "segments": [[{"lat": 37.87, "lon": -122.27 + i * 0.001},
+                                       {"lat": 37.871, "lon": -122.27 + i * 0.001}]]}
+                        for i, n in enumerate(names)]}
+
+
+class _CapturedThread:
+    started: list = []
+
+    def __init__(self, target, args=(), **kw):
+        self.target, self.args = target, args
+
+    def start(self):
+        _CapturedThread.started.append(lambda: self.target(*self.args))
+
+
+class TestStreetsCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "city_streets.json")
+        self._write(_data("Oak Street"), mtime=1_000_000)
+
+        _CapturedThread.started = []
+        self.registry = StreetRegistry(location._build_streets_snapshot, location._streets_changed,
+                                       budget_bytes=1 << 30, revalidate_s=300)
+        for target, value in (("_STREETS_DIR", self._tmp.name),
+                              ("_STREETS_TMP_DIR", os.path.join(self._tmp.name, "none")),
+                              ("_S3_BUCKET", None),
+                              ("_streets", self.registry)):
+            p = patch.object(location, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        p = patch.object(street_registry.threading, "Thread", _CapturedThread)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _write(self, data, mtime):
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        os.utime(self.path, (mtime, mtime))
+
+    def _entry(self):
+        return self.registry._entries["Berkeley"]
+
+    def _expire(self):
+        self._entry()["checked_at"] -= self.registry.revalidate_s + 1
+
+    def test_loads_once_within_interval(self):
+        first = location._street_index()
+        with patch.object(self.registry, "_build") as build:
+            self.assertIs(location._street_index(), first)
+        build.assert_not_called()
+        self.assertEqual(_CapturedThread.started, [])
+
+    def test_unchanged_file_is_not_reparsed(self):
+        first = location._street_index()
+        self._expire()
+        location._street_index()
+        self.assertEqual(len(_CapturedThread.started), 1)
+        with patch.object(self.registry, "_build") as build:
+            _CapturedThread.started[0]()
+        build.assert_not_called()
+        self.assertIs(location._street_index(), first)
+        self.assertFalse(self._entry()["refreshing"])
+
+    def test_changed_file_swaps_in_background(self):
+        self.assertEqual(location._street_index().named, ["Oak Street"])
+        self._write(_data("Oak Street", "Pine Avenue"), mtime=2_000_000)
+        self._expire()
+
+        # Requests keep the old snapshot until the rebuild finishes
+        self.assertEqual(location._street_index().named, ["Oak Street"])
+        self.assertEqual(location._street_index().named, ["Oak Street"])
+        self.assertEqual(len(_CapturedThread.started), 1)   # single flight
+
+        _CapturedThread.started[0]()
+        snapshot = self._entry()["snapshot"]
+        self.assertEqual(snapshot["index"].named, ["Oak Street", "Pine Avenue"])
+        self.assertIsNotNone(snapshot["matcher"])            # warmed before the swap
+        self.assertIs(location._street_matcher(), snapshot["matcher"])
+
+    def test_failed_revalidation_keeps_old_snapshot(self):
+        first = location._street_index()
+        os.remove(self.path)
+        self._expire()
+        location._street_index()
+        with self.assertLogs("street_registry", level="WARNING"):
+            _CapturedThread.started[0]()
+        self.assertIs(location._street_index(), first)
+        self.assertFalse(self._entry()["refreshing"])
+
+
+class TestS3Revalidation(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "city_streets.json")
+        with open(self.path, "w") as f:
+            f.write("old")
+        with open(self.path + ".etag", "w") as f:
+            json.dump({"key": "CA/Berkeley/city_streets.json", "etag": '"v1"'}, f)
+        p = patch.object(location, "_S3_BUCKET", "bucket")
+        p.start()
+        self.addCleanup(p.stop)
+        self.s3 = MagicMock()
+        p = patch("boto3.client", return_value=self.s3)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_not_modified(self):
+        from botocore.exceptions import ClientError
+        self.s3.head_object.side_effect = ClientError(
+            {"Error": {"Code": "304", "Message": "Not Modified"}}, "HeadObject")
+        self.assertFalse(location._s3_copy_changed(self.path))
+        self.assertEqual(self.s3.head_object.call_args[1]["IfNoneMatch"], '"v1"')
+        self.s3.get_object.assert_not_called()
+
+    def test_modified_downloads_and_records_etag(self):
+        body = MagicMock()
+        body.iter_chunks.side_effect = lambda size: iter([b"new"])
+        self.s3.head_object.return_value = {"ETag": '"v2"'}
+        self.s3.get_object.return_value = {"Body": body, "ETag": '"v2"'}
+        self.assertTrue(location._s3_copy_changed(self.path))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "new")
+        with open(self.path + ".etag") as f:
+            self.assertEqual(json.load(f)["etag"], '"v2"')
+
+    def test_local_file_without_etag_is_not_checked(self):
+        os.remove(self.path + ".etag")
+        self.assertFalse(location._s3_copy_changed(self.path))
+        self.s3.head_object.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()